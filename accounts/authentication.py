@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from edi.conditional import bump_versions, get_versions
+
+
+def snapshot(instance):
+    return type(instance), instance._state.db, [
+        getattr(instance, field.attname) for field in instance._meta.concrete_fields
+    ]
+
+
+def restore(snapshot):
+    model, db, values = snapshot
+    return model.from_db(db, [field.attname for field in model._meta.concrete_fields], values)
+
+
+class TokenCache:
+    """
+    Bounded LRU of token key -> (user, token) with a time-to-live.
+
+    Entries hold the users' and tokens' field values and every hit builds
+    fresh instances from them, so nothing set on a user in one request is
+    seen by another. Deleting a token (logout) or saving a user
+    (deactivation, role change) revokes the tokens' entries in every worker:
+    it changes the tokens' versions in the shared ``TOKEN_CACHE_BACKEND``
+    cache, now and again on commit (see ``accounts.signals``), and a hit is
+    only served while the version read before the database lookup is still
+    current. Revocations only reach the other workers through a cache they
+    share, so with ``TOKEN_CACHE_BACKEND`` empty (the default with the
+    per-process locmem ``CACHE_BACKEND``) nothing is cached and every
+    request looks the token up.
+    """
+    version_key = 'accounts:token-version:{key}'
+
+    def __init__(self, maxsize=10000, ttl=300, backend=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        alias = self.backend or getattr(settings, 'TOKEN_CACHE_BACKEND', '')
+        return caches[alias] if alias else None
+
+    def version(self, key):
+        """
+        Current version of token ``key``; read it before loading the token
+        and pass it to ``set``
+        """
+        shared = self.shared
+        if shared is None:
+            return None
+        return get_versions(shared, [self.version_key.format(key=key)])[0]
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None:
+            user_id, user, token, version, expires = entry
+            if expires < time.monotonic() or version != self.version(key):
+                self.evict(key)
+                entry = None
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            if key in self.entries:
+                self.entries.move_to_end(key)
+            self.hits += 1
+        user, token = restore(user), restore(token)
+        token.user = user
+        return user, token
+
+    def set(self, key, user, token, version):
+        if self.shared is None or version is None:
+            return
+        entry = (user.pk, snapshot(user), snapshot(token), version, time.monotonic() + self.ttl)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def evict(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def revoke(self, keys):
+        """
+        Drop the entries of token ``keys`` in every worker, and once more on
+        commit, so an entry cached from the old rows before the commit is
+        dropped too
+        """
+        def revoke():
+            shared = self.shared
+            if shared is not None:
+                bump_versions(shared, [self.version_key.format(key=key) for key in keys])
+            with self.lock:
+                for key in keys:
+                    self.entries.pop(key, None)
+        keys = list(keys)
+        revoke()
+        transaction.on_commit(revoke)
+
+    def revoke_user(self, user_id):
+        if self.shared is None:
+            return
+        with self.lock:
+            keys = {key for key, entry in self.entries.items() if entry[0] == user_id}
+        keys.update(Token.objects.filter(user_id=user_id).values_list('key', flat=True))
+        self.revoke(keys)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+            }
+
+
+token_cache = TokenCache(
+    maxsize=getattr(settings, 'TOKEN_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'TOKEN_CACHE_TTL', 300),
+)
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that skips the Token + User query for tokens
+    seen recently
+    """
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        # A revocation committed while the rows are read changes the version
+        # read here, so the entry is never served
+        version = token_cache.version(key)
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token, version)
+        return user, token
@@ -21,6 +21,13 @@ class User(AbstractUser):
     middle_name = models.CharField(max_length=150, blank=True)
     phone_number = models.CharField(max_length=15, blank=True)
     sex= models.CharField(max_length=10, choices=Gender,null=False, blank=False)
+
+    class Meta(AbstractUser.Meta):
+        swappable = 'AUTH_USER_MODEL'
+        indexes = [
+            # Every role proxy manager filters on role
+            models.Index(fields=['role', '-date_joined'], name='user_role_joined_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}({self.get_role_display()})"
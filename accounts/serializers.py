@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from edi.sparse import DynamicFieldsMixin
 from django.contrib.auth import authenticate
 from .models import User, Staff, Trainer, Rworker, Department, Trainee, Innovator
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     User serializer for basic user information
     """
@@ -92,7 +93,7 @@ class LoginSerializer(serializers.Serializer):
             raise serializers.ValidationError('Must include username and password')
 
 
-class StaffSerializer(serializers.ModelSerializer):
+class StaffSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Staff serializer
     """
@@ -104,7 +105,7 @@ class StaffSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'date_joined')
 
 
-class TrainerSerializer(serializers.ModelSerializer):
+class TrainerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Trainer serializer
     """
@@ -115,7 +116,7 @@ class TrainerSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'date_joined')
 
 
-class RworkerSerializer(serializers.ModelSerializer):
+class RworkerSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Regional Worker serializer
     """
@@ -128,7 +129,7 @@ class RworkerSerializer(serializers.ModelSerializer):
         
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Department serializer
     """
@@ -139,7 +140,7 @@ class DepartmentSerializer(serializers.ModelSerializer):
         fields = ('id', 'dept_name', 'dept_head', 'dept_head_name', 'service')
 
 
-class TraineeSerializer(serializers.ModelSerializer):
+class TraineeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
    
    class Meta:
         model = Trainee
@@ -148,7 +149,7 @@ class TraineeSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'date_joined')
 
 
-class InnovatorSerializer(serializers.ModelSerializer):
+class InnovatorSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Innovator serializer
     """
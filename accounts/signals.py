@@ -0,0 +1,39 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from edi.conditional import table_versions
+from .authentication import token_cache
+from .models import User, Staff, Trainer, Rworker, Trainee, Department, Innovator
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    token_cache.revoke([instance.key])
+
+
+# The proxy admins save with the proxy as sender
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Staff)
+@receiver([post_save, post_delete], sender=Trainer)
+@receiver([post_save, post_delete], sender=Rworker)
+@receiver([post_save, post_delete], sender=Trainee)
+def evict_user_tokens(sender, instance, update_fields=None, **kwargs):
+    # Logging in saves last_login, which the cached user may keep stale
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    token_cache.revoke_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Department)
+@receiver([post_save, post_delete], sender=Innovator)
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Staff)
+@receiver([post_save, post_delete], sender=Trainer)
+@receiver([post_save, post_delete], sender=Rworker)
+@receiver([post_save, post_delete], sender=Trainee)
+def bump_table_version(sender, update_fields=None, **kwargs):
+    # Logging in saves last_login, which no reference list shows
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    table_versions.bump_on_commit(sender)
@@ -1,3 +1,205 @@
-from django.test import TestCase
+import asyncio
+import time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import path, reverse
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from .authentication import TokenCache, token_cache
+
+from edi.async_views import async_view
+from . import views
+from .models import User, Trainer, Department
+
+
+def slow_view(request):
+    time.sleep(0.5)
+    return HttpResponse('done')
+
+
+# URLconf of AsgiConcurrencyTests
+with override_settings(ASYNC_VIEWS=True):
+    urlpatterns = [path('slow/', async_view(slow_view))]
+
+
+class IndexUsageTests(TestCase):
+    """
+    Role proxy managers are served by the role index
+    """
+    def test_role_filter_uses_index(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = Trainer.objects.order_by('-date_joined').explain()
+        self.assertIn('user_role_joined_idx', plan)
+
+
+class AsyncViewTests(TestCase):
+    """
+    Read endpoints can be served as async views under ASGI
+    """
+    def test_wrapper_is_sync_without_flag(self):
+        self.assertIs(async_view(views.user_profile), views.user_profile)
+
+    @override_settings(ASYNC_VIEWS=True)
+    def test_async_profile(self):
+        view = async_view(views.user_profile)
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        self.assertTrue(view.csrf_exempt)
+        request = APIRequestFactory().get('/api/auth/profile/')
+        force_authenticate(request, user=User(username='async', role='staff'))
+        response = async_to_sync(view)(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], 'async')
+
+
+@override_settings(
+    ROOT_URLCONF='accounts.tests',
+    MIDDLEWARE=[name for name in settings.MIDDLEWARE if not name.startswith('whitenoise.')],
+)
+class AsgiConcurrencyTests(SimpleTestCase):
+    """
+    Under ASGI, with the middleware the ASYNC_VIEWS setting keeps, async views
+    run concurrently through the whole stack
+    """
+    def test_requests_overlap(self):
+        application = ASGIHandler()
+        scope = {'type': 'http', 'method': 'GET', 'path': '/slow/', 'query_string': b'',
+                 'headers': [], 'server': ('testserver', 80)}
+
+        async def request():
+            communicator = ApplicationCommunicator(application, scope)
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(5)
+            body = await communicator.receive_output(5)
+            return start['status'], body['body']
+
+        async def run():
+            return await asyncio.gather(*[request() for _ in range(4)])
+
+        started = time.monotonic()
+        responses = async_to_sync(run)()
+        elapsed = time.monotonic() - started
+        self.assertEqual(responses, [(200, b'done')] * 4)
+        # Serialised they would take 2 seconds
+        self.assertLess(elapsed, 1.5)
+
+
+@override_settings(TOKEN_CACHE_BACKEND='default')
+class CachingTokenAuthenticationTests(TestCase):
+    """
+    Token lookups are served from the cache until the token or user changes
+    """
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create(username='cached', role='trainer', sex='male')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('profile')
+
+    def test_second_request_skips_token_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(token_cache.stats()['hits'], 1)
+
+    def test_logout_evicts_token(self):
+        self.client.get(self.url)
+        self.client.post(reverse('logout'))
+        self.assertIn(self.client.get(self.url).status_code, (401, 403))
+
+    def test_deactivation_evicts_token(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIn(self.client.get(self.url).status_code, (401, 403))
+
+    def test_proxy_admin_save_evicts_token(self):
+        self.client.get(self.url)
+        trainer = Trainer.objects.get(pk=self.user.pk)
+        trainer.is_active = False
+        trainer.save()
+        self.assertIn(self.client.get(self.url).status_code, (401, 403))
+
+    def test_deactivation_reaches_other_workers(self):
+        other_worker = TokenCache()
+        other_worker.set(self.token.key, self.user, self.token,
+                         other_worker.version(self.token.key))
+        self.assertIsNotNone(other_worker.get(self.token.key))
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=self.user.pk).save()
+        self.assertIsNone(other_worker.get(self.token.key))
+
+    def test_hits_return_fresh_instances(self):
+        cache = TokenCache()
+        cache.set(self.token.key, self.user, self.token, cache.version(self.token.key))
+        first, token = cache.get(self.token.key)
+        first.first_name = 'changed'
+        second, _ = cache.get(self.token.key)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.first_name, '')
+        self.assertEqual((token.key, token.user), (self.token.key, first))
+
+    def test_lru_bound_and_ttl(self):
+        cache = TokenCache(maxsize=2, ttl=300)
+        for key in 'abc':
+            cache.set(key, self.user, self.token, cache.version(key))
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+        expired = TokenCache(maxsize=2, ttl=-1)
+        expired.set('a', self.user, self.token, expired.version('a'))
+        self.assertIsNone(expired.get('a'))
+
+    def test_revocation_during_lookup_is_not_cached(self):
+        lookup = TokenAuthentication.authenticate_credentials
+
+        def revoked_meanwhile(auth, key):
+            found = lookup(auth, key)
+            token_cache.revoke_user(self.user.pk)
+            return found
+
+        with mock.patch.object(TokenAuthentication, 'authenticate_credentials',
+                               revoked_meanwhile):
+            self.client.get(self.url)
+        self.assertIsNone(token_cache.get(self.token.key))
+
+    @override_settings(TOKEN_CACHE_BACKEND='')
+    def test_off_without_a_shared_backend(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+
+class ConditionalDepartmentListTests(TestCase):
+    """
+    The department list revalidates when a department or its head changes
+    """
+    def test_user_changes_bump_version(self):
+        staff = User.objects.create_user(username='staff', password='password123', role='staff', sex='male')
+        Department.objects.create(dept_name='Finance', dept_head=staff)
+        client = APIClient()
+        client.force_authenticate(staff)
+        url = reverse('department_list_create')
+        etag = client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.login(username='staff', password='password123')
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            staff.first_name = 'Abebe'
+            staff.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['dept_head_name'].split()[0], 'Abebe')
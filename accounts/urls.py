@@ -1,4 +1,5 @@
 from django.urls import path
+from edi.async_views import async_view
 from . import views
 
 urlpatterns = [
@@ -6,7 +7,7 @@ urlpatterns = [
     path('register/', views.register_user, name='register'),
     path('login/', views.login_user, name='login'),
     path('logout/', views.logout_user, name='logout'),
-    path('profile/', views.user_profile, name='profile'),
+    path('profile/', async_view(views.user_profile), name='profile'),
     path('profile/update/', views.update_profile, name='update_profile'),
     
     # User management endpoints
@@ -1,6 +1,8 @@
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from edi.conditional import ConditionalGetMixin
+from edi.sparse import SparseQuerysetMixin
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
@@ -102,13 +104,14 @@ def update_profile(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class StaffListView(generics.ListAPIView):
+class StaffListView(SparseQuerysetMixin, generics.ListAPIView):
     """
     List all staff members (Admin only)
     """
     queryset = Staff.objects.all()
     serializer_class = StaffSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-date_joined', '-id')
     
     def get_queryset(self):
         if self.request.user.role == 'admin':
@@ -116,46 +119,53 @@ class StaffListView(generics.ListAPIView):
         return Staff.objects.none()
 
 
-class TrainerListView(generics.ListAPIView):
+class TrainerListView(SparseQuerysetMixin, generics.ListAPIView):
     """
     List all trainers (Staff and Admin only)
     """
     queryset = Trainer.objects.all()
     serializer_class = TrainerSerializer
     permission_classes = [IsAdminOrStaff]
+    ordering = ('-date_joined', '-id')
 
 
-class TraineeListView(generics.ListAPIView):
+class TraineeListView(SparseQuerysetMixin, generics.ListAPIView):
     """
     List all trainers (Staff and Admin only)
     """
     queryset = Trainee.objects.all()
     serializer_class = TraineeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-date_joined', '-id')
 
-class RworkerListView(generics.ListAPIView):
+class RworkerListView(SparseQuerysetMixin, generics.ListAPIView):
     """
     List all regional workers (Staff and Admin only)
     """
     queryset = Rworker.objects.all()
     serializer_class = RworkerSerializer
     permission_classes = [IsAdminOrStaff]
+    ordering = ('-date_joined', '-id')
 
 
-class DepartmentListCreateView(generics.ListCreateAPIView):
+class DepartmentListCreateView(ConditionalGetMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     List and create departments
     """
-    queryset = Department.objects.all()
+    # The department head's name comes from the user table
+    version_models = (Department, User)
+    queryset = Department.objects.select_related('dept_head')
     serializer_class = DepartmentSerializer
     permission_classes = [IsAdminOrStaff]
+    # A small reference table the forms load whole with ?all=true
+    allow_all = True
 
 
-class DepartmentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class DepartmentDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a department
     """
-    queryset = Department.objects.all()
+    queryset = Department.objects.select_related('dept_head')
     serializer_class = DepartmentSerializer
     permission_classes = [IsAdminOrStaff]
 
@@ -178,16 +188,17 @@ class DepartmentDetailView(generics.RetrieveUpdateDestroyAPIView):
 #     permission_classes = [permissions.IsAuthenticated]
 
 
-class InnovatorListCreateView(generics.ListCreateAPIView):
+class InnovatorListCreateView(ConditionalGetMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     List and create innovators
     """
+    version_models = (Innovator,)
     queryset = Innovator.objects.all()
     serializer_class = InnovatorSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
-class InnovatorDetailView(generics.RetrieveUpdateDestroyAPIView):
+class InnovatorDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete an innovator
     """
@@ -0,0 +1,16 @@
+import django_filters
+
+from .models import Contract
+
+
+class ContractFilter(django_filters.FilterSet):
+    """
+    Contract filters
+    """
+    completion = django_filters.MultipleChoiceFilter(choices=Contract.STATUS_CHOICES)
+    created_date = django_filters.DateFromToRangeFilter()
+    end_date = django_filters.DateFromToRangeFilter()
+
+    class Meta:
+        model = Contract
+        fields = ('completion', 'for_training', 'signed_by', 'created_date', 'end_date')
@@ -0,0 +1,32 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from contracts.models import ContractUpload
+from contracts.uploads import UploadConflict, abort_upload
+
+
+class Command(BaseCommand):
+    """
+    Abort chunked uploads that stopped receiving chunks and delete their
+    part files; run it daily
+    """
+    help = 'Abort abandoned contract uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=float, default=24,
+                            help='Hours since the last chunk')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(hours=options['older_than'])
+        stale = ContractUpload.objects.filter(status='open', updated_date__lt=cutoff)
+        count = 0
+        for upload in stale.iterator():
+            try:
+                abort_upload(upload)
+            except UploadConflict:
+                # A chunk or the completion arrived meanwhile
+                continue
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Aborted {count} abandoned uploads'))
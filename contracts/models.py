@@ -1,10 +1,16 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth import get_user_model
-from training.models import Training, TrainingType
+from training.models import Training, TrainingType, RelatedQuerySet
 
 User = get_user_model()
 
 
+class ContractQuerySet(RelatedQuerySet):
+    select_related_fields = ('for_training', 'signed_by')
+
+
 class Contract(models.Model):
     """
     Contract model for training contracts
@@ -26,10 +32,49 @@ class Contract(models.Model):
     signed_date = models.DateField(auto_now=True)
     terms_and_conditions = models.TextField(blank=True)
     created_date = models.DateTimeField(auto_now_add=True)
+
+    objects = ContractQuerySet.as_manager()
     
     def __str__(self):
         return f"Contract For {self.for_training.training_type}"
     
     class Meta:
         ordering = ['-created_date']
+        indexes = [
+            models.Index(fields=['-created_date', '-id'], name='contract_created_idx'),
+            models.Index(fields=['signed_by', '-created_date'], name='contract_signer_created_idx'),
+        ]
+
+
+class ContractUpload(models.Model):
+    """
+    Chunked upload of a contract document in progress.
+
+    Chunks are appended to a part file under ``MEDIA_ROOT/uploads/``;
+    ``received`` is the number of bytes stored so far, from which an
+    interrupted client resumes.
+    """
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('complete', 'Complete'),
+        ('aborted', 'Aborted'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    contract = models.ForeignKey(Contract, on_delete=models.CASCADE, related_name='uploads')
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='contract_uploads')
+    filename = models.CharField(max_length=200)
+    size = models.PositiveBigIntegerField()
+    checksum = models.CharField(max_length=64)
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    created_date = models.DateTimeField(auto_now_add=True)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_date'], name='upload_status_updated_idx'),
+        ]
 
+    def __str__(self):
+        return f"Upload {self.filename} ({self.received}/{self.size})"
@@ -1,10 +1,12 @@
 from rest_framework import serializers
-from .models import Contract
+from edi.sparse import DynamicFieldsMixin
+from .models import Contract, ContractUpload
+from .uploads import max_upload_size
 from training.serializers import TrainingSerializer, TrainingTypeSerializer
 from accounts.serializers import UserSerializer
 
 
-class ContractSerializer(serializers.ModelSerializer):
+class ContractSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Contract serializer
     """
@@ -17,9 +19,29 @@ class ContractSerializer(serializers.ModelSerializer):
                   'signed_by_name', 'completion', 'end_date', 
                  'signed_date', 'terms_and_conditions', 'created_date')
         read_only_fields = ('created_date','signed_date')
+        expandable_fields = ('training_details',)
     
     def validate_id(self, value):
         if Contract.objects.filter(id=value).exists():
             raise serializers.ValidationError("Contract ID already exists")
         return value
 
+
+class ContractUploadSerializer(serializers.ModelSerializer):
+    """
+    Chunked contract upload serializer
+    """
+    checksum = serializers.RegexField(r'^[0-9a-fA-F]{64}$',
+                                      help_text='SHA-256 of the whole file, hex encoded')
+
+    class Meta:
+        model = ContractUpload
+        fields = ('id', 'contract', 'filename', 'size', 'checksum', 'received', 'status',
+                  'created_date', 'updated_date')
+        read_only_fields = ('contract', 'received', 'status', 'created_date', 'updated_date')
+
+    def validate_size(self, value):
+        if not 0 < value <= max_upload_size():
+            raise serializers.ValidationError(
+                f"Size must be between 1 and {max_upload_size()} bytes")
+        return value
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from edi.conditional import table_versions
+from .models import Contract
+
+
+@receiver([post_save, post_delete], sender=Contract)
+def bump_table_version(sender, **kwargs):
+    table_versions.bump_on_commit(sender)
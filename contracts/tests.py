@@ -1,3 +1,237 @@
-from django.test import TestCase
+import datetime
+import fcntl
+import hashlib
+import io
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from training.models import TrainingType
+from .models import Contract, ContractUpload
+from .uploads import complete_upload, part_path
+
+
+class IndexUsageTests(TestCase):
+    """
+    Contract lists are served by the signer/created indexes
+    """
+    def query_plan(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_signer_filter_uses_index(self):
+        signer = User.objects.create(username='signer', role='trainer', sex='male')
+        plan = self.query_plan(
+            Contract.objects.filter(signed_by=signer).order_by('-created_date'))
+        self.assertIn('contract_signer_created_idx', plan)
+
+    def test_list_order_uses_index(self):
+        plan = self.query_plan(Contract.objects.order_by('-created_date', '-id')[:50])
+        self.assertIn('contract_created_idx', plan)
+
+
+class ContractExportTests(TestCase):
+    """
+    Contract exports are scoped to the signer for trainers
+    """
+    def test_trainer_exports_own_contracts(self):
+        training_type = TrainingType.objects.create(training_type='Leadership')
+        trainer = User.objects.create(username='trainer', role='trainer', sex='male')
+        other = User.objects.create(username='other', role='trainer', sex='male')
+        for signer in (trainer, other):
+            Contract.objects.create(for_training=training_type, signed_by=signer,
+                                    end_date=datetime.date(2025, 1, 1))
+        client = APIClient()
+        client.force_authenticate(trainer)
+        response = client.get(reverse('contract_export'))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Leadership,trainer,draft', lines[1])
+
+
+class ChunkedUploadTests(TestCase):
+    """
+    Contract documents upload in resumable, checksummed chunks
+    """
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings_override = override_settings(MEDIA_ROOT=media, CONTRACT_UPLOAD_CHUNK_SIZE=4)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.signer = User.objects.create(username='signer', role='trainer', sex='male')
+        self.contract = Contract.objects.create(
+            for_training=TrainingType.objects.create(training_type='Leadership'),
+            signed_by=self.signer, end_date=datetime.date(2025, 1, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.signer)
+        self.content = b'scanned contract'
+
+    def start(self, content=None):
+        content = content or self.content
+        response = self.client.post(
+            reverse('start_contract_upload', args=[self.contract.pk]),
+            {'filename': 'scan 1.pdf', 'size': len(self.content),
+             'checksum': hashlib.sha256(content).hexdigest()}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return reverse('contract_upload', args=[response.data['id']])
+
+    def put(self, url, offset, chunk):
+        return self.client.generic('PUT', url, chunk, content_type='application/octet-stream',
+                                   HTTP_UPLOAD_OFFSET=str(offset))
+
+    def send_all(self, url):
+        for offset in range(0, len(self.content), 4):
+            response = self.put(url, offset, self.content[offset:offset + 4])
+            self.assertEqual(response.status_code, 200)
+
+    def test_upload_resume_and_complete(self):
+        url = self.start()
+        self.put(url, 0, self.content[:4])
+        response = self.put(url, 8, self.content[8:12])
+        self.assertEqual((response.status_code, response.data['received']), (409, 4))
+        self.assertEqual(self.client.get(url).data['received'], 4)
+        self.assertEqual(self.put(url, 4, self.content[4:9]).status_code, 400)
+
+        for offset in range(4, len(self.content), 4):
+            self.put(url, offset, self.content[offset:offset + 4])
+        response = self.client.post(url + 'complete/')
+        self.assertEqual(response.status_code, 200)
+
+        self.contract.refresh_from_db()
+        self.assertTrue(self.contract.contract_doc.name.startswith('Documents/scan_1'))
+        self.assertEqual(Path(self.contract.contract_doc.path).read_bytes(), self.content)
+        self.assertFalse(list(Path(self.contract.contract_doc.storage.location, 'uploads').iterdir()))
+
+    def test_checksum_mismatch_resets_upload(self):
+        url = self.start(content=b'something else!!')
+        self.send_all(url)
+        response = self.client.post(url + 'complete/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get(url).data['received'], 0)
+        self.contract.refresh_from_db()
+        self.assertFalse(self.contract.contract_doc)
+
+    def test_concurrent_completion_conflicts(self):
+        url = self.start()
+        self.send_all(url)
+        upload = ContractUpload.objects.get()
+        with open(part_path(upload), 'rb') as part:
+            fcntl.flock(part, fcntl.LOCK_EX)
+            self.assertEqual(self.client.post(url + 'complete/').status_code, 409)
+        self.assertEqual(self.client.post(url + 'complete/').status_code, 200)
+        self.assertEqual(self.client.post(url + 'complete/').status_code, 409)
+
+    def test_failed_transaction_keeps_upload_open(self):
+        url = self.start()
+        self.send_all(url)
+        upload = ContractUpload.objects.select_related('contract').get()
+        with mock.patch.object(Contract, 'save', side_effect=DatabaseError), \
+                self.assertRaises(DatabaseError):
+            complete_upload(upload)
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'open')
+        self.assertTrue(part_path(upload).exists())
+        self.assertEqual(self.client.post(url + 'complete/').status_code, 200)
+
+    def test_abort_conflicts_with_writes_and_completion(self):
+        url = self.start()
+        self.send_all(url)
+        upload = ContractUpload.objects.get()
+        with open(part_path(upload), 'rb') as part:
+            fcntl.flock(part, fcntl.LOCK_EX)
+            self.assertEqual(self.client.delete(url).status_code, 409)
+        self.assertEqual(self.client.post(url + 'complete/').status_code, 200)
+        self.assertEqual(self.client.delete(url).status_code, 409)
+        self.assertEqual(self.client.get(url).data['status'], 'complete')
+
+    def test_abort_removes_part_file(self):
+        url = self.start()
+        self.put(url, 0, self.content[:4])
+        upload = ContractUpload.objects.get()
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertFalse(part_path(upload).exists())
+        self.assertEqual(self.client.get(url).data['status'], 'aborted')
+
+    def test_incomplete_upload_cannot_complete(self):
+        url = self.start()
+        self.put(url, 0, self.content[:4])
+        self.assertEqual(self.client.post(url + 'complete/').status_code, 409)
+
+    def test_only_signer_or_staff(self):
+        other = User.objects.create(username='other', role='trainer', sex='male')
+        url = self.start()
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.post(reverse('start_contract_upload', args=[self.contract.pk]),
+                                    {'filename': 'x.pdf', 'size': 1, 'checksum': '0' * 64},
+                                    format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_abandoned_uploads_are_cleaned(self):
+        url = self.start()
+        self.put(url, 0, self.content[:4])
+        ContractUpload.objects.update(updated_date=datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc))
+        call_command('clean_contract_uploads', stdout=io.StringIO())
+        self.assertEqual(self.client.get(url).data['status'], 'aborted')
+
+
+class ContractDocumentTests(TestCase):
+    """
+    Contract documents download through nginx, or with range support from Django
+    """
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.signer = User.objects.create(username='signer', role='trainer', sex='male')
+        self.contract = Contract.objects.create(
+            for_training=TrainingType.objects.create(training_type='Leadership'),
+            signed_by=self.signer, end_date=datetime.date(2025, 1, 1))
+        self.contract.contract_doc.save('scan.pdf', ContentFile(b'0123456789'))
+        self.url = reverse('contract_document', args=[self.contract.pk])
+        self.client = APIClient()
+        self.client.force_authenticate(self.signer)
+
+    def test_accel_redirect(self):
+        with override_settings(MEDIA_ACCEL_REDIRECT=True):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.contract.contract_doc.name)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="scan.pdf"')
+        self.assertEqual(response.content, b'')
+
+    def test_range_requests(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=20-').status_code, 416)
+
+    def test_only_signer_or_staff(self):
+        self.client.force_authenticate(User.objects.create(username='other', role='trainer', sex='male'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_authenticate(User.objects.create(username='staff', role='staff', sex='male'))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
@@ -0,0 +1,194 @@
+import fcntl
+import hashlib
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import ContractUpload
+
+COPY_BUFFER = 64 * 1024
+
+
+class UploadConflict(Exception):
+    """
+    The chunk does not fit the upload's current state, the client should
+    re-read the offset and resume from there
+    """
+
+
+class UploadInvalid(Exception):
+    """
+    The chunk or upload can never be accepted as sent
+    """
+
+
+def max_upload_size():
+    return getattr(settings, 'CONTRACT_UPLOAD_MAX_SIZE', 500 * 1024 * 1024)
+
+
+def max_chunk_size():
+    return getattr(settings, 'CONTRACT_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+
+
+def part_path(upload):
+    return Path(settings.MEDIA_ROOT) / 'uploads' / f'{upload.pk}.part'
+
+
+def append_chunk(upload, offset, stream, length):
+    """
+    Write ``length`` bytes read from ``stream`` at ``offset`` of the part file.
+
+    The chunk is copied in small buffers, so memory does not depend on the
+    chunk size, under an exclusive lock on the part file so concurrent
+    requests for the same upload cannot interleave. A chunk cut short is
+    discarded: the next append at the recorded offset truncates it away.
+    Returns the new number of bytes received.
+    """
+    if length > max_chunk_size():
+        raise UploadInvalid(f'Chunks may be at most {max_chunk_size()} bytes')
+    if offset + length > upload.size:
+        raise UploadInvalid('Chunk extends past the declared size')
+
+    path = part_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(os.open(path, os.O_RDWR | os.O_CREAT, 0o640), 'r+b') as part:
+        try:
+            fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadConflict('Another chunk of this upload is being written')
+
+        upload.refresh_from_db(fields=['received', 'status'])
+        if upload.status != 'open':
+            raise UploadConflict(f'Upload is {upload.status}')
+        if offset != upload.received:
+            raise UploadConflict(f'Expected offset {upload.received}')
+
+        part.seek(offset)
+        part.truncate()
+        remaining = length
+        while remaining:
+            block = stream.read(min(COPY_BUFFER, remaining))
+            if not block:
+                raise UploadInvalid('Chunk ended before its declared length')
+            part.write(block)
+            remaining -= len(block)
+        part.flush()
+        os.fsync(part.fileno())
+
+        ContractUpload.objects.filter(pk=upload.pk, received=offset).update(
+            received=offset + length, updated_date=timezone.now())
+        upload.received = offset + length
+    return upload.received
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for block in iter(lambda: part.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def complete_upload(upload):
+    """
+    Verify the assembled file against the declared SHA-256 and attach it to
+    the contract.
+
+    Runs under the part file's lock, like ``append_chunk``, so a concurrent
+    completion or chunk gets a conflict. The upload row is claimed and the
+    contract saved before the part file is renamed into the contract's
+    storage directory, which lives on the same filesystem, so the document
+    is never copied; if the transaction fails the file is moved back and
+    the upload stays open. On a checksum mismatch the part is dropped and
+    the upload restarts at 0.
+    """
+    upload.refresh_from_db(fields=['received', 'status'])
+    if upload.status == 'open' and upload.received != upload.size:
+        raise UploadConflict(f'Only {upload.received} of {upload.size} bytes received')
+    path = part_path(upload)
+    try:
+        part = open(path, 'rb')
+    except FileNotFoundError:
+        raise UploadConflict('Upload is being completed by another request')
+    with part:
+        try:
+            fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadConflict('Upload is being written or completed by another request')
+
+        upload.refresh_from_db(fields=['received', 'status'])
+        if upload.status != 'open':
+            raise UploadConflict(f'Upload is {upload.status}')
+        if upload.received != upload.size:
+            raise UploadConflict(f'Only {upload.received} of {upload.size} bytes received')
+        try:
+            checksum = file_checksum(path)
+        except FileNotFoundError:
+            raise UploadConflict('Upload is being completed by another request')
+        if checksum != upload.checksum.lower():
+            path.unlink()
+            ContractUpload.objects.filter(pk=upload.pk).update(received=0,
+                                                               updated_date=timezone.now())
+            raise UploadInvalid('Checksum mismatch, the upload has been reset')
+
+        contract = upload.contract
+        storage = contract.contract_doc.storage
+        name = storage.get_available_name(contract.contract_doc.field.generate_filename(
+            contract, get_valid_filename(upload.filename)))
+        target = Path(storage.path(name))
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with transaction.atomic():
+                claimed = ContractUpload.objects.filter(pk=upload.pk, status='open').update(
+                    status='complete', updated_date=timezone.now())
+                if not claimed:
+                    raise UploadConflict('Upload is being completed by another request')
+                contract.contract_doc.name = name
+                contract.save(update_fields=['contract_doc'])
+                os.replace(path, target)
+        except FileNotFoundError:
+            raise UploadConflict('Upload is being completed by another request')
+        except Exception:
+            if target.exists() and not path.exists():
+                os.replace(target, path)
+            raise
+    upload.status = 'complete'
+    return contract
+
+
+def abort_upload(upload):
+    """
+    Mark an open upload aborted and delete its part file.
+
+    Takes the part file's lock, like ``append_chunk`` and ``complete_upload``,
+    and the upload row's lock, so a chunk being written or a completion
+    under way gets the conflict instead, and an upload that is no longer
+    open is left alone.
+    """
+    path = part_path(upload)
+    try:
+        part = open(path, 'rb')
+    except FileNotFoundError:
+        # No chunk yet, or a completion moved the file; the row decides
+        part = None
+    try:
+        if part is not None:
+            try:
+                fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadConflict('Upload is being written or completed by another request')
+        with transaction.atomic():
+            locked = ContractUpload.objects.select_for_update().get(pk=upload.pk)
+            if locked.status != 'open':
+                raise UploadConflict(f'Upload is {locked.status}')
+            locked.status = 'aborted'
+            locked.save(update_fields=['status', 'updated_date'])
+        path.unlink(missing_ok=True)
+    finally:
+        if part is not None:
+            part.close()
+    upload.status = 'aborted'
@@ -4,9 +4,15 @@ from . import views
 urlpatterns = [
     # Contract endpoints
     path('', views.ContractListCreateView.as_view(), name='contract_list_create'),
+    path('export/', views.ContractExportView.as_view(), name='contract_export'),
+    path('transition/', views.ContractTransitionView.as_view(), name='contract_transition'),
     path('<int:pk>/', views.ContractDetailView.as_view(), name='contract_detail'),
     path('<int:pk>/activate/', views.activate_contract, name='activate_contract'),
     path('<int:pk>/complete/', views.complete_contract, name='complete_contract'),
     path('<int:pk>/terminate/', views.terminate_contract, name='terminate_contract'),
+    path('<int:pk>/document/', views.contract_document, name='contract_document'),
+    path('<int:pk>/uploads/', views.start_contract_upload, name='start_contract_upload'),
+    path('uploads/<uuid:upload_id>/', views.contract_upload, name='contract_upload'),
+    path('uploads/<uuid:upload_id>/complete/', views.complete_contract_upload, name='complete_contract_upload'),
 ]
 
@@ -1,8 +1,20 @@
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from .models import Contract
-from .serializers import ContractSerializer
+from edi.files import serve_media
+from edi.response_cache import CachedListMixin
+from edi.sparse import SparseQuerysetMixin
+from django.shortcuts import get_object_or_404
+from accounts.models import User
+from training.models import TrainingType
+from .models import Contract, ContractUpload
+from .serializers import ContractSerializer, ContractUploadSerializer
+from .uploads import (
+    UploadConflict, UploadInvalid, append_chunk, complete_upload, abort_upload
+)
+from .filters import ContractFilter
+from edi.exports import ExportMixin
+from edi.transitions import BulkTransitionView
 import uuid
 
 
@@ -19,20 +31,25 @@ class IsTrainer(permissions.BasePermission):
         
 
 
-class ContractListCreateView(generics.ListCreateAPIView):
+class ContractListCreateView(CachedListMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     List and create contracts
     """
-    queryset = Contract.objects.all()
+    cache_tags = (Contract, TrainingType, User)
+    queryset = Contract.objects.with_related()
     serializer_class = ContractSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-created_date', '-id')
+    filterset_class = ContractFilter
+    search_fields = ['^for_training__training_type', '^signed_by__username']
+    ordering_fields = ['created_date', 'end_date', 'signed_date']
     
     def get_queryset(self):
-        queryset = Contract.objects.all()
+        queryset = Contract.objects.with_related()
         if self.request.user.role=='trainer':
             # self.permission_classes=[IsTrainer]
-            return queryset.filter(signed_by=self.request.user).order_by('-created_date')
-        return queryset.order_by('-created_date')
+            return queryset.filter(signed_by=self.request.user).order_by(*self.ordering)
+        return queryset.order_by(*self.ordering)
     
     def perform_create(self, serializer):
         if self.request.user.role =='trainer':
@@ -41,15 +58,46 @@ class ContractListCreateView(generics.ListCreateAPIView):
             serializer.save(signed_by=self.request.user)
 
 
-class ContractDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ContractExportView(ExportMixin, ContractListCreateView):
+    """
+    Export contracts as CSV or XLSX
+    """
+    export_filename = 'contracts'
+    export_fields = (
+        ('id', 'id'),
+        ('training_type', 'for_training__training_type'),
+        ('signed_by', 'signed_by__username'),
+        ('completion', 'completion'),
+        ('end_date', 'end_date'),
+        ('signed_date', 'signed_date'),
+        ('created_date', 'created_date'),
+        ('contract_doc', 'contract_doc'),
+    )
+
+
+class ContractDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a contract
     """
-    queryset = Contract.objects.all()
+    queryset = Contract.objects.with_related()
     serializer_class = ContractSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
+class ContractTransitionView(BulkTransitionView):
+    """
+    Activate, complete or terminate many contracts at once
+    """
+    queryset = Contract.objects.all()
+    permission_classes = [IsStaffOrAdmin]
+    state_field = 'completion'
+    transitions = {
+        'active': ('draft',),
+        'completed': ('active',),
+        'terminated': ('draft', 'active'),
+    }
+
+
 @api_view(['POST'])
 @permission_classes([IsStaffOrAdmin])
 def activate_contract(request, pk):
@@ -97,3 +145,101 @@ def terminate_contract(request, pk):
     except Contract.DoesNotExist:
         return Response({'error': 'Contract not found'}, status=status.HTTP_404_NOT_FOUND)
 
+
+def can_change_contract(user, contract):
+    return user.role in ['staff', 'admin'] or contract.signed_by_id == user.pk
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def contract_document(request, pk):
+    """
+    Download a contract's document.
+
+    Access is checked here, the bytes are sent by nginx (see
+    ``edi.files.serve_media``) so large scans do not tie up a worker.
+    """
+    contract = get_object_or_404(Contract, pk=pk)
+    if not can_change_contract(request.user, contract):
+        return Response({'error': 'You cannot view this contract'},
+                        status=status.HTTP_403_FORBIDDEN)
+    if not contract.contract_doc or not contract.contract_doc.storage.exists(contract.contract_doc.name):
+        return Response({'error': 'Contract has no document'}, status=status.HTTP_404_NOT_FOUND)
+    return serve_media(request, contract.contract_doc.name)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def start_contract_upload(request, pk):
+    """
+    Start a chunked upload of a contract's document.
+
+    Send ``filename``, ``size`` and the file's SHA-256 ``checksum``, then
+    PUT the bytes in order to the returned upload with an ``Upload-Offset``
+    header, and POST to its ``complete/`` endpoint once all are sent.
+    """
+    contract = get_object_or_404(Contract, pk=pk)
+    if not can_change_contract(request.user, contract):
+        return Response({'error': 'You cannot change this contract'},
+                        status=status.HTTP_403_FORBIDDEN)
+    serializer = ContractUploadSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    serializer.save(contract=contract, created_by=request.user)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([permissions.IsAuthenticated])
+def contract_upload(request, upload_id):
+    """
+    GET the upload's progress to resume it, PUT the next chunk as the raw
+    request body, or DELETE to abort the upload
+    """
+    upload = get_object_or_404(ContractUpload.objects.select_related('contract'), pk=upload_id)
+    if upload.created_by_id != request.user.pk and request.user.role not in ['staff', 'admin']:
+        return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'DELETE':
+        try:
+            abort_upload(upload)
+        except UploadConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    if request.method == 'PUT':
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.META['CONTENT_LENGTH'])
+        except (KeyError, ValueError):
+            return Response({'error': 'Upload-Offset and Content-Length headers are required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # The body is read straight from the request stream, never parsed
+            append_chunk(upload, offset, request.stream, length)
+        except UploadConflict as e:
+            upload.refresh_from_db()
+            return Response({'error': str(e), 'received': upload.received},
+                            status=status.HTTP_409_CONFLICT)
+        except UploadInvalid as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(ContractUploadSerializer(upload).data)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def complete_contract_upload(request, upload_id):
+    """
+    Verify a fully sent upload and attach it as the contract's document
+    """
+    upload = get_object_or_404(ContractUpload.objects.select_related('contract'), pk=upload_id)
+    if upload.created_by_id != request.user.pk and request.user.role not in ['staff', 'admin']:
+        return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        contract = complete_upload(upload)
+    except UploadConflict as e:
+        return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+    except UploadInvalid as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(ContractSerializer(contract, context={'request': request}).data)
@@ -9,8 +9,30 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from asgiref.wsgi import WsgiToAsgi
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'edi.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+from whitenoise import WhiteNoise  # noqa: E402
+
+
+def not_found(environ, start_response):
+    start_response('404 Not Found', [('Content-Type', 'text/plain')])
+    return [b'Not Found']
+
+
+# WhiteNoise is WSGI only; as a middleware it would pin every request to the
+# one thread-sensitive thread, so static files are answered here, before
+# Django, and the middleware is left out of the ASGI stack (see settings)
+static_files = WsgiToAsgi(WhiteNoise(not_found, root=settings.STATIC_ROOT,
+                                     prefix=settings.STATIC_URL))
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'].startswith(settings.STATIC_URL):
+        return await static_files(scope, receive, send)
+    return await django_application(scope, receive, send)
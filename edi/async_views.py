@@ -0,0 +1,41 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+def async_view(view):
+    """
+    Serve a DRF view as an async view when ``ASYNC_VIEWS`` is enabled.
+
+    On the pinned Django every sync view under ASGI runs on one shared
+    thread, so a slow list serialization stalls the whole worker. The async
+    variant runs the view, including rendering, in the thread pool with
+    ``thread_sensitive=False`` so read-heavy requests proceed concurrently
+    while the event loop keeps serving slow clients. Each pool thread keeps
+    its own connection, recycled per ``CONN_MAX_AGE``. This only helps while
+    every middleware is async capable, otherwise Django runs the chain and
+    the view on the single thread again. Under WSGI the view is returned
+    unchanged.
+    """
+    if not getattr(settings, 'ASYNC_VIEWS', False):
+        return view
+
+    def run(request, *args, **kwargs):
+        close_old_connections()
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                response.render()
+            return response
+        finally:
+            close_old_connections()
+
+    run_in_pool = sync_to_async(run, thread_sensitive=False)
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run_in_pool(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,109 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def get_versions(cache, keys):
+    """
+    Versions stored under ``keys`` in ``cache``, in order.
+
+    A version is a time in nanoseconds. One missing from the cache (never
+    set, or evicted) starts at the current time, so it never returns to a
+    value that earlier data may still be stored under.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(cache, keys):
+    """
+    Move the versions under ``keys`` to the current time, and at least one
+    past their current value when the clock is coarse
+    """
+    current = cache.get_many(keys)
+    now = time.time_ns()
+    cache.set_many({key: max(now, current.get(key, 0) + 1) for key in keys}, timeout=None)
+
+
+class TableVersions:
+    """
+    Change marker of database tables, kept in a cache shared by the workers.
+
+    A table's version is the time of its last committed change (see
+    ``get_versions``); post_save/post_delete receivers bump it (see the apps'
+    ``signals`` modules). Bulk ``update()`` and raw SQL fire no signals and
+    must bump explicitly.
+    """
+    key = 'edi:table-version:{table}'
+
+    def __init__(self, backend=None):
+        self.backend = backend
+
+    def table_key(self, model):
+        # Proxy models share their concrete model's table
+        return self.key.format(table=model._meta.concrete_model._meta.label_lower)
+
+    @property
+    def cache(self):
+        return caches[self.backend or getattr(settings, 'TABLE_VERSION_BACKEND', 'default')]
+
+    def get(self, *models):
+        """
+        Return the versions of the tables of ``models``, in order
+        """
+        return get_versions(self.cache, [self.table_key(model) for model in models])
+
+    def bump(self, *models):
+        bump_versions(self.cache, [self.table_key(model) for model in models])
+
+    def bump_on_commit(self, *models):
+        """
+        Bump now and again once the current transaction commits, so whatever
+        a reader cached from the old rows while it was open is dropped too
+        """
+        self.bump(*models)
+        transaction.on_commit(lambda: self.bump(*models))
+
+
+table_versions = TableVersions()
+
+
+class ConditionalGetMixin:
+    """
+    View mixin answering repeated GETs of reference data with 304.
+
+    The ETag hashes the versions of ``version_models`` with the full path
+    and the negotiated media type, so checking it costs one cache lookup and
+    no query or serialization. The response must depend only on those tables
+    and the URL, never on the user. Permissions are still checked first and
+    ``Cache-Control`` keeps the data out of shared caches, nginx passes the
+    validators through and the browser revalidates on every use.
+    """
+    version_models = ()
+    cache_control = 'private, no-cache'
+
+    def get(self, request, *args, **kwargs):
+        versions = table_versions.get(*self.version_models)
+        fingerprint = '|'.join([request.get_full_path(), request.accepted_media_type or '']
+                               + [str(version) for version in versions])
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        last_modified = max(versions) // 10 ** 9
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if 200 <= response.status_code < 400:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            response['Cache-Control'] = self.cache_control
+            patch_vary_headers(response, ('Authorization', 'Cookie'))
+        return response
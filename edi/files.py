@@ -0,0 +1,92 @@
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.encoding import escape_uri_path
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def content_disposition(filename, as_attachment=True):
+    kind = 'attachment' if as_attachment else 'inline'
+    try:
+        filename.encode('ascii')
+        return f'{kind}; filename="{filename}"'
+    except UnicodeEncodeError:
+        return f"{kind}; filename*=utf-8''{escape_uri_path(filename)}"
+
+
+class RangeFileWrapper:
+    """
+    Iterate over ``length`` bytes of ``file`` starting at ``offset``
+    """
+    def __init__(self, file, offset, length, block_size=64 * 1024):
+        self.file = file
+        self.file.seek(offset)
+        self.remaining = length
+        self.block_size = block_size
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.remaining <= 0:
+            raise StopIteration
+        data = self.file.read(min(self.block_size, self.remaining))
+        if not data:
+            raise StopIteration
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def serve_media(request, name, filename=None, content_type=None, as_attachment=True):
+    """
+    Response for the media file ``name`` (relative to ``MEDIA_ROOT``) once
+    the caller has checked access.
+
+    With ``MEDIA_ACCEL_REDIRECT`` enabled the response is empty and carries
+    an ``X-Accel-Redirect`` to ``MEDIA_ACCEL_PREFIX``, so nginx sends the
+    bytes from its internal location and the worker is free immediately.
+    Otherwise (development) the file is streamed from Django, honouring a
+    single ``Range: bytes=`` request so downloads can resume and PDFs open
+    progressively.
+    """
+    path = Path(settings.MEDIA_ROOT) / name
+    filename = filename or path.name
+    content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    if getattr(settings, 'MEDIA_ACCEL_REDIRECT', False):
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = escape_uri_path(prefix.rstrip('/') + '/' + str(name))
+        response['Content-Disposition'] = content_disposition(filename, as_attachment)
+        return response
+
+    size = os.path.getsize(path)
+    match = RANGE_RE.match(request.headers.get('Range', '').strip())
+    if match and any(match.groups()):
+        start, end = match.groups()
+        if start:
+            start, end = int(start), min(int(end) if end else size - 1, size - 1)
+        else:
+            # Suffix range: the last N bytes
+            start, end = max(size - int(end), 0), size - 1
+        if start > end or start >= size:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        response = FileResponse(RangeFileWrapper(open(path, 'rb'), start, end - start + 1),
+                                status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = content_disposition(filename, as_attachment)
+    return response
@@ -0,0 +1,22 @@
+from rest_framework import filters
+
+
+class OrderingFilter(filters.OrderingFilter):
+    """
+    Ordering filter with an explicit whitelist and a stable tiebreaker.
+
+    Only the fields listed in a view's ``ordering_fields`` may be used with
+    ``?ordering=``; views that list none keep their default ``ordering``.
+    The primary key is appended in the direction of the first field so that
+    rows with equal sort keys keep a stable position between pages.
+    """
+    ordering_fields = ()
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        ordering = tuple(ordering)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-pk' if ordering[0].startswith('-') else 'pk',)
+        return ordering
@@ -0,0 +1,173 @@
+import json
+from base64 import b64decode, b64encode
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination used by every list endpoint.
+
+    The ordering comes from the ordering filter when the client asked for
+    one, otherwise from the view's ``ordering`` attribute (falling back to
+    ``-pk``), and always ends with the primary key. The cursor holds the
+    values of every ordering column of the row it stops at and the next page
+    starts strictly after that tuple, so rows sharing a date, status or
+    amount are neither skipped nor repeated however many there are. Nullable
+    columns sort their NULLs last on every database.
+
+    Clients may pick a smaller or larger page with ``?page_size=`` up to
+    ``max_page_size``. ``?all=true`` skips pagination only on views that set
+    ``allow_all`` (small reference tables); elsewhere it is ignored.
+    """
+    ordering = ('-pk',)
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    all_query_param = 'all'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if getattr(view, 'allow_all', False) and \
+                request.query_params.get(self.all_query_param, '').lower() in ('1', 'true', 'yes'):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse, position = self.cursor or (False, None)
+
+        terms = self.resolve_terms(queryset.model, self.ordering, reverse)
+        queryset = queryset.order_by(*[self.order_expression(term) for term in terms])
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.following(terms, position))
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        if self.page:
+            self.next_position = self.position_of(self.page[-1])
+            self.previous_position = self.position_of(self.page[0])
+        else:
+            self.has_next = self.has_previous = False
+
+        self.display_page_controls = self.has_next or self.has_previous
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    break
+        ordering = ordering or getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = tuple(ordering)
+        if not any(term.lstrip('-') in ('id', 'pk') for term in ordering):
+            ordering += ('-pk' if ordering[0].startswith('-') else 'pk',)
+        return ordering
+
+    def resolve_terms(self, model, ordering, reverse):
+        """
+        Return ``(name, descending, nulls_last)`` for each ordering term in
+        the direction the page is read; ``nulls_last`` is None for columns
+        that cannot be NULL. NULLs come last reading forward, first reading
+        back.
+        """
+        terms = []
+        for term in ordering:
+            name = term.lstrip('-')
+            field = model._meta.pk
+            if name != 'pk':
+                current = model
+                for part in name.split('__'):
+                    field = current._meta.get_field(part)
+                    current = field.related_model
+            terms.append((name, term.startswith('-') != reverse, not reverse if field.null else None))
+        return terms
+
+    def order_expression(self, term):
+        name, descending, nulls_last = term
+        if nulls_last is None:
+            return f'-{name}' if descending else name
+        nulls = {'nulls_last': nulls_last, 'nulls_first': not nulls_last}
+        return F(name).desc(**nulls) if descending else F(name).asc(**nulls)
+
+    def following(self, terms, position):
+        """
+        Filter for the rows strictly after ``position`` in ``terms`` order
+        """
+        condition = None
+        matched = Q()
+        for (name, descending, nulls_last), value in zip(terms, position):
+            if value is None:
+                after = None if nulls_last else Q(**{f'{name}__isnull': False})
+                equal = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+                if nulls_last:
+                    after |= Q(**{f'{name}__isnull': True})
+                equal = Q(**{name: value})
+            if after is not None:
+                condition = matched & after if condition is None else condition | (matched & after)
+            matched &= equal
+        return Q(pk__in=[]) if condition is None else condition
+
+    def position_of(self, instance):
+        position = []
+        for term in self.ordering:
+            value = instance
+            for part in term.lstrip('-').split('__'):
+                value = value[part] if isinstance(value, dict) else getattr(value, part)
+                if value is None:
+                    break
+            if value is not None and hasattr(value, 'pk'):
+                value = value.pk
+            position.append(None if value is None else str(value))
+        return position
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            tokens = json.loads(b64decode(encoded.encode('ascii')).decode('ascii'))
+            reverse, position = bool(tokens['r']), tokens['p']
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering) or \
+                not all(value is None or isinstance(value, str) for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+    def encode_cursor(self, reverse, position):
+        tokens = json.dumps({'r': int(reverse), 'p': position}, separators=(',', ':'))
+        encoded = b64encode(tokens.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(False, self.next_position)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(True, self.previous_position)
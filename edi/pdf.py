@@ -0,0 +1,55 @@
+PAGE_WIDTH = 842
+PAGE_HEIGHT = 595
+
+
+def pdf_string(text):
+    """
+    PDF literal string, escaped for a content stream
+    """
+    text = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return '(' + text + ')'
+
+
+def render_pdf(lines, title_size=30, text_size=15):
+    """
+    Single landscape A4 page with ``lines`` centred under each other, the
+    first one as a bold title, inside a double border.
+
+    Uses only the built-in Helvetica fonts so no font files or PDF library
+    are needed; characters outside WinAnsi (Windows-1252) are replaced. Centring uses an
+    average glyph width, which is close enough for names and dates.
+    """
+    commands = [
+        '2 w 30 30 782 535 re S',
+        '0.5 w 40 40 762 515 re S',
+    ]
+    y = PAGE_HEIGHT - 150
+    for index, line in enumerate(lines):
+        font, size = ('F2', title_size) if index == 0 else ('F1', text_size)
+        x = max(50, (PAGE_WIDTH - len(line) * size * 0.5) / 2)
+        commands.append(f'BT /{font} {size} Tf {x:.1f} {y} Td {pdf_string(line)} Tj ET')
+        y -= size * (2.2 if index == 0 else 1.8)
+    content = '\n'.join(commands).encode('cp1252', 'replace')
+
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+         '/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>').encode(),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream',
+    ]
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        len(objects) + 1, xref)
+    return bytes(out)
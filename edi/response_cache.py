@@ -0,0 +1,110 @@
+import hashlib
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+
+from .conditional import table_versions
+
+
+class ResponseCache:
+    """
+    Rendered GET responses, keyed by URL, media type, audience and tags.
+
+    The tags are the models a response is built from. Their versions (see
+    ``edi.conditional.table_versions``) are part of the key, so a write to
+    any of the tables makes every response built from it unreachable at
+    once, without tracking or deleting keys; stale entries age out after
+    ``RESPONSE_CACHE_TIMEOUT``. Hits and misses are counted per endpoint in
+    this process.
+    """
+    key_format = 'edi:response:{endpoint}:{digest}'
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.counts = defaultdict(lambda: [0, 0])
+
+    @property
+    def cache(self):
+        return caches[self.backend or getattr(settings, 'RESPONSE_CACHE_BACKEND', 'default')]
+
+    def key(self, endpoint, request, audience, tags):
+        parts = [request.build_absolute_uri(), request.accepted_media_type or '', audience]
+        parts += [str(version) for version in table_versions.get(*tags)]
+        digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+        return self.key_format.format(endpoint=endpoint, digest=digest)
+
+    def get(self, endpoint, key):
+        cached = self.cache.get(key)
+        with self.lock:
+            self.counts[endpoint][0 if cached is not None else 1] += 1
+        return cached
+
+    def set(self, key, response):
+        self.cache.set(key, (response.content, response['Content-Type']),
+                       getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+
+    def stats(self):
+        with self.lock:
+            return {
+                endpoint: {'hits': hits, 'misses': misses,
+                           'hit_ratio': hits / (hits + misses) if hits + misses else 0.0}
+                for endpoint, (hits, misses) in sorted(self.counts.items())
+            }
+
+    def reset_stats(self):
+        with self.lock:
+            self.counts.clear()
+
+
+response_cache = ResponseCache()
+
+
+class CachedListMixin:
+    """
+    View mixin serving GETs from ``response_cache``.
+
+    ``cache_tags`` must name every model the serialized rows read from,
+    including related ones. Staff and admins share entries per role, other
+    users get their own, as list querysets are narrowed to the user's rows.
+    """
+    cache_tags = ()
+
+    def cache_audience(self, request):
+        if request.user.role in ['staff', 'admin']:
+            return request.user.role
+        return f'user:{request.user.pk}'
+
+    def get(self, request, *args, **kwargs):
+        match = request.resolver_match
+        endpoint = match.url_name if match and match.url_name else type(self).__name__
+        key = response_cache.key(endpoint, request, self.cache_audience(request), self.cache_tags)
+        cached = response_cache.get(endpoint, key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.add_post_render_callback(lambda rendered: response_cache.set(key, rendered))
+        return response
+
+
+class IsStaffOrAdmin(BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.role in ['staff', 'admin']
+
+
+@api_view(['GET'])
+@permission_classes([IsStaffOrAdmin])
+def cache_stats(request):
+    """
+    Response cache hit rate per endpoint, for the worker that answers
+    """
+    return Response(response_cache.stats())
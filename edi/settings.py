@@ -40,9 +40,12 @@ INSTALLED_APPS = [
     'accounts',
     'training',
     'contracts',
+    'jobs',
+    'monitoring',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -72,28 +75,54 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'edi.wsgi.application'
+ASGI_APPLICATION = 'edi.asgi.application'
+
+# Serve the read-heavy list views as async views; enable when running under
+# ASGI (uvicorn workers), leave off under WSGI. Every middleware must then be
+# async capable or the chain runs on a single thread, so WhiteNoise is left
+# out and edi.asgi serves the static files
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+if ASYNC_VIEWS:
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Configured from the environment so production can run on PostgreSQL while
+# local development keeps the SQLite file. DB_ENGINE is 'sqlite3' or
+# 'postgresql'. Persistent connections are kept for DB_CONN_MAX_AGE seconds.
+# Set DB_PGBOUNCER when connecting through PgBouncer in transaction pooling
+# mode, which cannot keep server-side cursors open between transactions.
+
+DB_ENGINE = config('DB_ENGINE', default='sqlite3')
+
+if DB_ENGINE == 'sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {
+                'timeout': config('DB_TIMEOUT', default=20, cast=int),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': f'django.db.backends.{DB_ENGINE}',
+            'NAME': config('DB_NAME', default='ediworking'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'DISABLE_SERVER_SIDE_CURSORS': config('DB_PGBOUNCER', default=False, cast=bool),
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
+        }
     }
-}
 
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.postgresql_psycopg2',
-#         'NAME': 'ediworking',
-#         'USER': 'postgres',
-#         'PASSWORD': 'password123',
-#         'HOST': 'localhost',
-#         'PORT': '5432',
-#     }
-# }
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -133,7 +162,28 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # Media files
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_ROOT = Path(config('MEDIA_ROOT', default=str(BASE_DIR / 'media')))
+
+# Protected media (contract documents, certificates) is checked by Django and
+# sent by nginx from the internal location MEDIA_ACCEL_PREFIX, which must map
+# to MEDIA_ROOT; without nginx Django streams the file itself
+MEDIA_ACCEL_REDIRECT = config('MEDIA_ACCEL_REDIRECT', default=False, cast=bool)
+MEDIA_ACCEL_PREFIX = config('MEDIA_ACCEL_PREFIX', default='/protected-media/')
+
+# Worker processes used to render certificate PDFs in batches, defaults to
+# one per CPU
+CERTIFICATE_RENDER_PROCESSES = config('CERTIFICATE_RENDER_PROCESSES', default=0, cast=int)
+
+# Background jobs record a heartbeat every JOB_HEARTBEAT_INTERVAL seconds;
+# runworker --stale-after must be several intervals long
+JOB_HEARTBEAT_INTERVAL = config('JOB_HEARTBEAT_INTERVAL', default=30, cast=int)
+# Seconds an idempotency key keeps returning the job it queued
+JOB_IDEMPOTENCY_WINDOW = config('JOB_IDEMPOTENCY_WINDOW', default=86400, cast=int)
+
+# Chunked contract uploads: largest document and largest single chunk, in
+# bytes; a chunk should upload well within the gunicorn timeout
+CONTRACT_UPLOAD_MAX_SIZE = config('CONTRACT_UPLOAD_MAX_SIZE', default=500 * 1024 * 1024, cast=int)
+CONTRACT_UPLOAD_CHUNK_SIZE = config('CONTRACT_UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -147,16 +197,112 @@ AUTH_USER_MODEL = 'accounts.User'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
-        
+        'accounts.authentication.CachingTokenAuthentication',
+    ],
+    'DEFAULT_FILTER_BACKENDS': [
+        'django_filters.rest_framework.DjangoFilterBackend',
+        'rest_framework.filters.SearchFilter',
+        'edi.filters.OrderingFilter',
     ],
-    'DEFAULT_FILTER_BACKENDS': 
-        ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    # 'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    # 'PAGE_SIZE': 10,
+    'DEFAULT_PAGINATION_CLASS': 'edi.pagination.CursorPagination',
+    'PAGE_SIZE': 50,
+}
+
+# Payment rate cache: CACHES alias sharing rates across workers and lifetime
+# of the shared tables in seconds; set the alias empty to keep the rates in
+# process memory only, which is only correct with a single worker
+RATE_CACHE_BACKEND = config('RATE_CACHE_BACKEND', default='default')
+RATE_CACHE_TIMEOUT = config('RATE_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Report results cache: CACHES alias and lifetime in seconds; writes to the
+# reported tables invalidate results before the lifetime ends
+REPORT_CACHE_BACKEND = config('REPORT_CACHE_BACKEND', default='default')
+REPORT_CACHE_TIMEOUT = config('REPORT_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Cache shared by the workers. CACHE_BACKEND is locmem (per process, for
+# development and tests), file (shared by the processes of one host) or redis
+# (shared across hosts, through django-redis); CACHE_LOCATION overrides the
+# directory or redis URL
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHE_LOCATIONS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'edi'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'redis': ('django_redis.cache.RedisCache', 'redis://redis:6379/1'),
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_LOCATIONS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default=CACHE_LOCATIONS[CACHE_BACKEND][1]),
+        'KEY_PREFIX': 'edi',
+        'TIMEOUT': 300,
+    },
+}
+if CACHE_BACKEND != 'redis':
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int),
+    }
+
+# Authenticated tokens are cached per process for TOKEN_CACHE_TTL seconds;
+# revocations reach every worker through the TOKEN_CACHE_BACKEND alias, so
+# the cache is off unless that alias is shared by the workers (not locmem)
+TOKEN_CACHE_SIZE = config('TOKEN_CACHE_SIZE', default=10000, cast=int)
+TOKEN_CACHE_TTL = config('TOKEN_CACHE_TTL', default=300, cast=int)
+TOKEN_CACHE_BACKEND = config('TOKEN_CACHE_BACKEND',
+                             default='' if CACHE_BACKEND == 'locmem' else 'default')
+
+# Cached list responses: CACHES alias and lifetime in seconds; writes to the
+# tables a list is built from invalidate it before the lifetime ends
+RESPONSE_CACHE_BACKEND = config('RESPONSE_CACHE_BACKEND', default='default')
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Version markers of reference tables for conditional GETs; the CACHES alias
+# must be shared by all web workers
+TABLE_VERSION_BACKEND = config('TABLE_VERSION_BACKEND', default='default')
+
+# Request profiling: a request at least PROFILING_SLOW_REQUEST_MS long is
+# logged as slow, one repeating a statement PROFILING_DUPLICATE_THRESHOLD
+# times as a likely N+1; per-endpoint totals are saved every
+# PROFILING_FLUSH_INTERVAL seconds for manage.py slow_endpoints.
+# PROFILING_SERVER_TIMING sends each request's timings and query count back
+# in a Server-Timing header, on under DEBUG only as it exposes them to clients
+PROFILING_SLOW_REQUEST_MS = config('PROFILING_SLOW_REQUEST_MS', default=1000, cast=int)
+PROFILING_DUPLICATE_THRESHOLD = config('PROFILING_DUPLICATE_THRESHOLD', default=5, cast=int)
+PROFILING_FLUSH_INTERVAL = config('PROFILING_FLUSH_INTERVAL', default=60, cast=int)
+PROFILING_SERVER_TIMING = config('PROFILING_SERVER_TIMING', default=DEBUG, cast=bool)
+
+# Prometheus metrics at /metrics: with METRICS_DIR every process writes its
+# values there every METRICS_FLUSH_INTERVAL seconds and a scrape sums them;
+# snapshots not rewritten for METRICS_RETIRE_AFTER seconds are folded into
+# one file, empty the directory on deploy. Scrapes need METRICS_TOKEN as a
+# bearer token; without one /metrics is only served with DEBUG on
+METRICS_DIR = config('METRICS_DIR', default=None)
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=10, cast=int)
+METRICS_RETIRE_AFTER = config('METRICS_RETIRE_AFTER', default=300, cast=int)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Logs go to the console, as JSON lines with LOG_FORMAT=json
+LOG_FORMAT = config('LOG_FORMAT', default='text')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'text': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+        'json': {'()': 'monitoring.formatters.JsonFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': LOG_FORMAT},
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': config('LOG_LEVEL', default='INFO'),
+    },
+    'loggers': {
+        # Client errors (4xx) are part of normal operation, log server errors
+        'django.request': {'level': 'ERROR'},
+    },
 }
 
 # CORS settings
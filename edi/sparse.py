@@ -0,0 +1,94 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def query_param_set(request, name):
+    """
+    Comma separated query parameter as a set, or None when absent
+    """
+    if request is None or name not in request.query_params:
+        return None
+    return {item.strip() for item in request.query_params[name].split(',') if item.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin for sparse fieldsets and expansion control.
+
+    On GET requests ``?fields=id,status`` keeps only the listed fields and
+    ``?expand=training_details`` keeps only the listed nested serializers
+    named in ``Meta.expandable_fields``; without the parameters every field
+    is returned as before. Only the top-level serializer of a response is
+    narrowed, nested serializers keep their own fields.
+    """
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method != 'GET' or not self.is_response_root():
+            return fields
+
+        only = query_param_set(request, 'fields')
+        expand = query_param_set(request, 'expand')
+        for name in getattr(self.Meta, 'expandable_fields', ()):
+            if expand is not None and name not in expand:
+                fields.pop(name, None)
+        if only is not None:
+            for name in list(fields):
+                if name not in only and name not in (expand or ()):
+                    fields.pop(name)
+        return fields
+
+    def is_response_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+
+class SparseQuerysetMixin:
+    """
+    View mixin narrowing the queryset to the fields a sparse response needs.
+
+    When ``?fields=`` or ``?expand=`` is given, relations declared on the
+    queryset's ``select_related_fields`` are only joined if a remaining
+    serializer field reads them, and ``only()`` limits the columns loaded
+    from the main table to those fields, the foreign keys being joined and
+    the ordering columns.
+    """
+    def narrow_queryset(self, queryset):
+        request = self.request
+        if query_param_set(request, 'fields') is None and query_param_set(request, 'expand') is None:
+            return queryset
+
+        model = queryset.model
+        roots = set()
+        for field in self.get_serializer().fields.values():
+            source = getattr(field, 'source', None)
+            if not source or source == '*':
+                continue
+            roots.add(source.split('.')[0])
+
+        relations = [
+            path for path in getattr(queryset, 'select_related_fields', ())
+            if path.split('__')[0] in roots
+        ]
+        ordering = list(getattr(self, 'ordering', None) or ())
+        ordering += list(getattr(self, 'ordering_fields', None) or ())
+        columns = {model._meta.pk.name}
+        for name in roots | {path.split('__')[0] for path in relations} | \
+                {term.lstrip('-') for term in ordering}:
+            try:
+                model_field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(name)
+
+        if hasattr(queryset, 'select_related_fields'):
+            queryset = queryset.select_related(None)
+            if relations:
+                queryset = queryset.select_related(*relations)
+        return queryset.only(*columns)
+
+    def filter_queryset(self, queryset):
+        return self.narrow_queryset(super().filter_queryset(queryset))
@@ -0,0 +1,73 @@
+from django.db import transaction
+from rest_framework import generics, serializers, status
+from rest_framework.response import Response
+
+from .conditional import table_versions
+
+
+class BulkTransitionSerializer(serializers.Serializer):
+    """
+    Bulk transition serializer: the ids to move and the target state
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False,
+                                max_length=10000)
+    state = serializers.ChoiceField(choices=())
+
+    def __init__(self, *args, transitions=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['state'].choices = list(transitions or ())
+
+
+class BulkTransitionView(generics.GenericAPIView):
+    """
+    Move many rows to a new state in one UPDATE.
+
+    ``transitions`` maps each target state to the states it may be reached
+    from. A request ``{"ids": [...], "state": "<target>"}`` runs a single
+    ``UPDATE ... WHERE id IN (...) AND <state_field> IN (<allowed>)`` over
+    the view's queryset, after locking the matching rows, and returns the
+    ids that changed; ids that are missing or not in an allowed state are
+    returned as skipped.
+    """
+    state_field = 'status'
+    transitions = {}
+
+    def get_serializer(self, *args, **kwargs):
+        return BulkTransitionSerializer(*args, transitions=self.transitions, **kwargs)
+
+    def get_extra_updates(self, state):
+        """
+        Additional column values to set when moving to ``state``
+        """
+        return {}
+
+    def transitioned(self, ids, state):
+        """
+        Called inside the transaction with the ids that were moved to ``state``;
+        the bulk UPDATE sends no model signals
+        """
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        state = serializer.validated_data['state']
+
+        allowed = {f'{self.state_field}__in': self.transitions[state]}
+        eligible = self.get_queryset().filter(id__in=ids, **allowed)
+        with transaction.atomic():
+            # Lock the rows so the returned ids are exactly the updated ones
+            updated = list(eligible.select_for_update(of=('self',)).values_list('id', flat=True))
+            self.get_queryset().model._default_manager.filter(id__in=updated, **allowed).update(
+                **{self.state_field: state}, **self.get_extra_updates(state))
+            if updated:
+                self.transitioned(updated, state)
+                table_versions.bump_on_commit(self.get_queryset().model)
+
+        updated_set = set(updated)
+        return Response({
+            'state': state,
+            'updated': sorted(updated_set),
+            'skipped': [pk for pk in ids if pk not in updated_set],
+        })
@@ -17,10 +17,17 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from edi.response_cache import cache_stats
+from monitoring.views import metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('accounts.urls')),
     path('api/training/', include('training.urls')),
     path('api/contracts/', include('contracts.urls')),
+    path('api/jobs/', include('jobs.urls')),
+    path('api/monitoring/', include('monitoring.urls')),
+    path('api/cache/stats/', cache_stats, name='cache_stats'),
+    path('metrics', metrics, name='metrics'),
 ]
 
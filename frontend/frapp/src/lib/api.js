@@ -36,6 +36,23 @@ api.interceptors.response.use(
   }
 );
 
+// List endpoints are cursor-paginated; the server only honours ?all=true on
+// small reference tables (departments, training types)
+const ALL = { params: { all: true } };
+const PAGE_SIZE = 200;
+
+// The screens still filter and count client side, so follow the cursor one
+// bounded page at a time and hand back the rows as a plain array
+const getPages = async (url, params = {}) => {
+  let response = await api.get(url, { params: { ...params, page_size: PAGE_SIZE } });
+  const rows = [...response.data.results];
+  while (response.data.next) {
+    response = await api.get(response.data.next);
+    rows.push(...response.data.results);
+  }
+  return { ...response, data: rows };
+};
+
 // Authentication API
 export const authAPI = {
   login: (credentials) => api.post('/auth/login/', credentials),
@@ -47,13 +64,13 @@ export const authAPI = {
 
 // User Management API
 export const userAPI = {
-  getStaff: () => api.get('/auth/staff/', ),
-  getTrainers: () => api.get('/auth/trainers/', ),
-  getRworkers: () => api.get('/auth/rworkers/', ),
-  getTrainees: () => api.get('/auth/trainees/', ), // Pass params here
+  getStaff: () => getPages('/auth/staff/'),
+  getTrainers: () => getPages('/auth/trainers/'),
+  getRworkers: () => getPages('/auth/rworkers/'),
+  getTrainees: () => getPages('/auth/trainees/'), // Pass params here
   createUser: (data) => api.post('auth/register/', data),
   createInnovator: (data) => api.post('/auth/innovators/', data),
-  getInnovators:() =>api.get(`/auth/innovators/`),
+  getInnovators:() =>getPages(`/auth/innovators/`),
   getInnovatorsdetails:(id) =>api.get(`/auth/innovators/${id}`),
   // updateTrainee: (id, data) => api.put(`/auth/trainees/${id}`, data),
   // deleteTrainee: (id) => api.delete(`/auth/trainees/${id}`),
@@ -61,7 +78,7 @@ export const userAPI = {
 
 // Department API
 export const departmentAPI = {
-  getDepartments: () => api.get('auth/departments'),
+  getDepartments: () => api.get('auth/departments', ALL),
   createDepartment: (data) => api.post('auth/departments', data),
   updateDepartment: (id, data) => api.put(`auth/departments/${id}`, data),
   deleteDepartment: (id) => api.delete(`auth/departments/${id}`),
@@ -69,17 +86,17 @@ export const departmentAPI = {
 
 // Training API
 export const trainingAPI = {
-  getTrainingTypes: () => api.get('/training/types'),
+  getTrainingTypes: () => api.get('/training/types', ALL),
   createTrainingType: (data) => api.post('/training/types', data),
   updateTrainingType: (id, data) => api.put(`/training/types/${id}`, data),
   deleteTrainingType: (id) => api.delete(`/training/types/${id}`),
   
-  getTrainingSessions: () => api.get('/training/sessions/'),
+  getTrainingSessions: () => getPages('/training/sessions/'),
   createTrainingSession: (data) => api.post('/training/sessions/', data),
   updateTrainingSession: (id, data) => api.put(`/training/sessions/${id}`, data),
   deleteTrainingSession: (id) => api.delete(`/training/sessions/${id}`),
   
-  getApplications: () => api.get('/training/applications/'),
+  getApplications: () => getPages('/training/applications/'),
   createApplication: (data) => api.post('/training/applications/', data),
   approveApplication: (id) => api.post(`/training/applications/${id}/approve/`),
   rejectApplication: (id) => api.post(`/training/applications/${id}/reject/`),
@@ -102,7 +119,7 @@ export const trainingAPI = {
 
 // Contract API
 export const contractAPI = {
-  getContracts: () => api.get('/contracts/'),
+  getContracts: () => getPages('/contracts/'),
   createContract: (data) => api.post('/contracts/', data),
   updateContract: (id, data) => api.put(`/contracts/${id}/`, data),
   deleteContract: (id) => api.delete(`/contracts/${id}/`),
@@ -113,12 +130,12 @@ export const contractAPI = {
 
 // Dashboard API
 export const dashboardAPI = {
-  getStats: () => api.get('/dashboard/stats'),
+  getStats: () => api.get('/training/dashboard/'),
 };
 
 
 export const paymentAPI={
-  getPayments: () => api.get('/training/payments/'),
+  getPayments: () => getPages('/training/payments/'),
   createPayment: (data) => api.post('/training/payments/', data),
   approvePayment: (id) => api.post(`/training/payments/${id}/approve/`),
   rejectPayment:(id)=>api.post(`/training/payments/${id}/reject/`),
@@ -126,18 +143,18 @@ export const paymentAPI={
 
 };
 export const warrantyAPI={
-  getWarranties: () => api.get('/training/warranties/'),
+  getWarranties: () => getPages('/training/warranties/'),
   createWarranty: (data) => api.post('/training/warranties/', data),
 };
 
 export const innovationAPI={
-  getInnovations: () => api.get('/training/innovations/'),
+  getInnovations: () => getPages('/training/innovations/'),
   createInnovation: (data) => api.post('/training/innovations/', data),
   updateInnovations:() => api.put(`/training/payments/${id}/update/`),
 };
 
 export const certificateAPI={
-  getCertificates: () => api.get('/training/certificates/'),
+  getCertificates: () => getPages('/training/certificates/'),
   createCertificate: (data) => api.post('/training/certificates/', data),
 };
 
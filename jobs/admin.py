@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """
+    Job Admin
+    """
+    list_display = ('id', 'name', 'status', 'attempts', 'progress', 'progress_total',
+                    'created_by', 'created_date', 'finished_date')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'idempotency_key')
+    ordering = ('-created_date',)
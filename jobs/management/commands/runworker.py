@@ -0,0 +1,88 @@
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import requeue_stale, run_pending, worker_name
+
+stopping = False
+
+
+def request_stop(signum, frame):
+    global stopping
+    stopping = True
+
+
+def work(poll_interval, stale_after):
+    """
+    Worker process loop: run due jobs one at a time, sleep when the queue
+    is empty, and exit between jobs once asked to stop
+    """
+    # The parent handles interrupts and forwards a SIGTERM to each worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, request_stop)
+    name = worker_name()
+    requeue_stale(stale_after)
+    while not stopping:
+        try:
+            if not run_pending(limit=1, worker=name):
+                requeue_stale(stale_after)
+                time.sleep(poll_interval)
+        finally:
+            # Do not hold a connection open while idle
+            connections.close_all()
+
+
+class Command(BaseCommand):
+    """
+    Run queued jobs in a pool of worker processes.
+
+    Workers poll the job table, so any number of them can run on any host
+    next to the web processes; ``--once`` drains the queue in this process
+    and exits, which is what tests and cron-style deployments use.
+    """
+    help = 'Process background jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help='Seconds without a heartbeat after which a running job '
+                                 'is considered abandoned')
+        parser.add_argument('--once', action='store_true',
+                            help='Run the jobs that are due now and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            requeue_stale(options['stale_after'])
+            count = run_pending()
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} jobs'))
+            return
+
+        # Children must open their own database connections
+        connections.close_all()
+
+        def spawn():
+            process = multiprocessing.Process(
+                target=work, args=(options['poll_interval'], options['stale_after']))
+            process.start()
+            return process
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        processes = [spawn() for _ in range(max(1, options['processes']))]
+        self.stdout.write(f'Started {len(processes)} workers')
+        while not stopping:
+            for n, process in enumerate(processes):
+                if not process.is_alive():
+                    self.stderr.write(f'Worker {process.pid} exited, restarting')
+                    processes[n] = spawn()
+            time.sleep(options['poll_interval'])
+
+        self.stdout.write('Stopping workers after their current job')
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
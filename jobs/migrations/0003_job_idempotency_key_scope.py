@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_heartbeat_date'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(fields=('name', 'created_by', 'idempotency_key'), name='job_idempotency_key_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('created_by__isnull', True)), fields=('name', 'idempotency_key'), name='job_system_idempotency_key_uniq'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class Job(models.Model):
+    """
+    Queued background job, picked up by ``manage.py runworker``
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    idempotency_key = models.CharField(max_length=100, null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='jobs')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    progress = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_date = models.DateTimeField(auto_now_add=True)
+    started_date = models.DateTimeField(null=True, blank=True)
+    heartbeat_date = models.DateTimeField(null=True, blank=True)
+    finished_date = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+            models.Index(fields=['created_by', '-created_date'], name='job_creator_created_idx'),
+        ]
+        # Idempotency keys are scoped to the job name and the user
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'created_by', 'idempotency_key'],
+                                    name='job_idempotency_key_uniq'),
+            models.UniqueConstraint(fields=['name', 'idempotency_key'],
+                                    condition=models.Q(created_by__isnull=True),
+                                    name='job_system_idempotency_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk} {self.name} - {self.status}"
+
+    def set_progress(self, done, total=None):
+        """
+        Record how far a running job has got, readable through the API;
+        also counts as a heartbeat
+        """
+        self.progress = done
+        fields = {'progress': done, 'heartbeat_date': timezone.now()}
+        if total is not None:
+            self.progress_total = total
+            fields['progress_total'] = total
+        Job.objects.filter(pk=self.pk).update(**fields)
@@ -0,0 +1,213 @@
+import datetime
+import logging
+import os
+import socket
+import threading
+import traceback
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+handlers = {}
+
+
+def task(name):
+    """
+    Register ``fn(job, **args)`` as the handler of jobs called ``name``.
+
+    The return value must be JSON serialisable and is stored as the job's
+    result. Handlers may run more than once when a worker dies or an
+    attempt fails, so they should be safe to repeat.
+    """
+    def register(fn):
+        handlers[name] = fn
+        return fn
+    return register
+
+
+class IdempotencyKeyReused(Exception):
+    """
+    The idempotency key already queued the same job with other arguments
+    """
+
+
+def idempotent_job(name, user, idempotency_key):
+    """
+    The job ``user`` queued as ``name`` under ``idempotency_key`` within the
+    last ``JOB_IDEMPOTENCY_WINDOW`` seconds, or None. An older job gives up
+    its key so it can be used again.
+    """
+    job = Job.objects.filter(name=name, created_by=user, idempotency_key=idempotency_key).first()
+    if job is None:
+        return None
+    window = datetime.timedelta(seconds=getattr(settings, 'JOB_IDEMPOTENCY_WINDOW', 86400))
+    if job.created_date < timezone.now() - window:
+        Job.objects.filter(pk=job.pk).update(idempotency_key=None)
+        return None
+    return job
+
+
+def enqueue(name, args=None, user=None, idempotency_key=None, max_attempts=3):
+    """
+    Queue a job and return it.
+
+    A job ``user`` already queued as ``name`` under the same
+    ``idempotency_key`` is returned instead of creating a second one, as long
+    as it was queued with the same ``args`` (IdempotencyKeyReused otherwise)
+    and within the idempotency window.
+    """
+    if name not in handlers:
+        raise ValueError(f"Unknown job {name!r}")
+    args = args or {}
+    existing = idempotent_job(name, user, idempotency_key) if idempotency_key else None
+    if existing is None:
+        try:
+            with transaction.atomic():
+                return Job.objects.create(name=name, args=args, created_by=user,
+                                          idempotency_key=idempotency_key or None,
+                                          max_attempts=max_attempts)
+        except IntegrityError:
+            # Another request with the same key won the race
+            existing = Job.objects.get(name=name, created_by=user,
+                                       idempotency_key=idempotency_key)
+    if existing.args != args:
+        raise IdempotencyKeyReused(
+            f"Idempotency key {idempotency_key!r} was used with different arguments")
+    return existing
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_next(worker=None):
+    """
+    Mark the oldest due job as running and return it, or None.
+
+    The claim is a conditional UPDATE on the job's status, so two workers
+    racing for the same row cannot both win, on any database backend.
+    """
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status='queued', run_after__lte=now)
+        .order_by('run_after', 'id').values_list('id', flat=True)[:10]
+    )
+    for job_id in candidates:
+        claimed = Job.objects.filter(pk=job_id, status='queued').update(
+            status='running', worker=worker or worker_name(), started_date=now,
+            heartbeat_date=now, attempts=F('attempts') + 1)
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff between attempts: 2, 4, 8 ... seconds, capped at 10 minutes
+    """
+    return datetime.timedelta(seconds=min(2 ** attempts, 600))
+
+
+class Heartbeat:
+    """
+    Refresh a running job's ``heartbeat_date`` every ``JOB_HEARTBEAT_INTERVAL``
+    seconds from a background thread, so ``requeue_stale`` tells a long job
+    from one whose worker died. The first beat comes after one interval, as
+    claiming the job already set it.
+    """
+    def __init__(self, job):
+        self.job = job
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        interval = getattr(settings, 'JOB_HEARTBEAT_INTERVAL', 30)
+        try:
+            while not self.stopped.wait(interval):
+                try:
+                    Job.objects.filter(pk=self.job.pk, worker=self.job.worker,
+                                       status='running').update(heartbeat_date=timezone.now())
+                except DatabaseError:
+                    logger.exception('Could not record heartbeat of job %s', self.job.pk)
+        finally:
+            connections.close_all()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+def finish(job, **fields):
+    """
+    Save the outcome of a job, unless it was requeued and claimed by another
+    worker or cancelled meanwhile; returns whether it was saved
+    """
+    saved = Job.objects.filter(pk=job.pk, worker=job.worker, status='running').update(**fields)
+    if not saved:
+        logger.warning('Job %s is no longer owned by %s, its outcome is dropped',
+                       job.pk, job.worker)
+    for name, value in fields.items():
+        setattr(job, name, value)
+    return bool(saved)
+
+
+def run_job(job):
+    """
+    Run a claimed job and record the outcome; failed attempts are queued
+    again after a backoff until ``max_attempts`` is reached
+    """
+    try:
+        with Heartbeat(job):
+            result = handlers[job.name](job, **job.args)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            finish(job, error=error, status='queued',
+                   run_after=timezone.now() + retry_delay(job.attempts))
+        else:
+            finish(job, error=error, status='failed', finished_date=timezone.now())
+        return job
+
+    finish(job, status='succeeded', result=result, error='', finished_date=timezone.now())
+    return job
+
+
+def requeue_stale(timeout):
+    """
+    Queue again the jobs whose worker has not sent a heartbeat for
+    ``timeout`` seconds, typically because it was killed; jobs out of
+    attempts are failed
+    """
+    now = timezone.now()
+    cutoff = now - datetime.timedelta(seconds=timeout)
+    stale = Job.objects.filter(
+        Q(heartbeat_date__lt=cutoff) | Q(heartbeat_date__isnull=True, started_date__lt=cutoff),
+        status='running')
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', error='Worker stopped responding', finished_date=now)
+    return stale.update(status='queued', worker='', run_after=now)
+
+
+def run_pending(limit=None, worker=None):
+    """
+    Run due jobs in this process until none are left (or ``limit`` ran),
+    returns the number of jobs run
+    """
+    count = 0
+    while limit is None or count < limit:
+        job = claim_next(worker)
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
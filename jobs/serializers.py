@@ -0,0 +1,14 @@
+from rest_framework import serializers
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """
+    Job serializer
+    """
+    class Meta:
+        model = Job
+        fields = ('id', 'name', 'args', 'status', 'attempts', 'max_attempts',
+                  'progress', 'progress_total', 'result', 'error',
+                  'created_by', 'created_date', 'started_date', 'heartbeat_date', 'finished_date')
+        read_only_fields = fields
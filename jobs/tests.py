@@ -0,0 +1,148 @@
+import datetime
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from .models import Job
+from .queue import (
+    IdempotencyKeyReused, task, enqueue, claim_next, run_job, run_pending, requeue_stale,
+)
+
+calls = []
+
+
+@task('jobs.test.echo')
+def echo(job, value):
+    job.set_progress(1, 1)
+    calls.append(value)
+    return {'value': value}
+
+
+@task('jobs.test.flaky')
+def flaky(job):
+    if job.attempts < 2:
+        raise RuntimeError('first attempt fails')
+    return 'ok'
+
+
+class JobQueueTests(TestCase):
+    """
+    Jobs are claimed once, retried with backoff and reported through the API
+    """
+    def setUp(self):
+        calls.clear()
+        self.user = User.objects.create_user(
+            username='trainer', password='password123', role='trainer', sex='female')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_run_records_result_and_progress(self):
+        job = enqueue('jobs.test.echo', {'value': 3}, user=self.user)
+        self.assertEqual(run_pending(), 1)
+        response = self.client.get(reverse('job_detail', args=[job.pk]))
+        self.assertEqual(response.data['status'], 'succeeded')
+        self.assertEqual(response.data['result'], {'value': 3})
+        self.assertEqual((response.data['progress'], response.data['progress_total']), (1, 1))
+        self.assertEqual(calls, [3])
+
+    def test_job_is_claimed_once(self):
+        job = enqueue('jobs.test.echo', {'value': 1})
+        self.assertEqual(claim_next('a').pk, job.pk)
+        self.assertIsNone(claim_next('b'))
+
+    def test_idempotency_key(self):
+        first = enqueue('jobs.test.echo', {'value': 1}, idempotency_key='k')
+        second = enqueue('jobs.test.echo', {'value': 1}, idempotency_key='k')
+        self.assertEqual(first.pk, second.pk)
+        with self.assertRaises(IdempotencyKeyReused):
+            enqueue('jobs.test.echo', {'value': 2}, idempotency_key='k')
+        run_pending()
+        self.assertEqual(calls, [1])
+
+    def test_idempotency_key_is_scoped_to_name_and_user(self):
+        other = User.objects.create_user(
+            username='other', password='password123', role='trainer', sex='male')
+        jobs = {
+            enqueue('jobs.test.echo', {'value': 1}, user=self.user, idempotency_key='k').pk,
+            enqueue('jobs.test.echo', {'value': 1}, user=other, idempotency_key='k').pk,
+            enqueue('jobs.test.flaky', user=self.user, idempotency_key='k').pk,
+        }
+        self.assertEqual(len(jobs), 3)
+
+    def test_idempotency_key_expires(self):
+        first = enqueue('jobs.test.echo', {'value': 1}, user=self.user, idempotency_key='k')
+        Job.objects.filter(pk=first.pk).update(
+            created_date=timezone.now() - datetime.timedelta(days=2))
+        second = enqueue('jobs.test.echo', {'value': 2}, user=self.user, idempotency_key='k')
+        self.assertNotEqual(first.pk, second.pk)
+        first.refresh_from_db()
+        self.assertIsNone(first.idempotency_key)
+
+    def test_failed_attempt_is_retried_after_backoff(self):
+        job = enqueue('jobs.test.flaky', max_attempts=2)
+        run_job(claim_next())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn('first attempt fails', job.error)
+        self.assertIsNone(claim_next())
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        run_job(claim_next())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.attempts), ('succeeded', 'ok', 2))
+
+    def test_stale_jobs_are_requeued_or_failed(self):
+        enqueue('jobs.test.echo', {'value': 1})
+        spent = enqueue('jobs.test.echo', {'value': 2}, max_attempts=1)
+        claim_next()
+        claim_next()
+        Job.objects.update(heartbeat_date=timezone.now() - datetime.timedelta(hours=2))
+        self.assertEqual(requeue_stale(3600), 1)
+        spent.refresh_from_db()
+        self.assertEqual(spent.status, 'failed')
+        self.assertEqual(run_pending(), 1)
+
+    def test_long_job_with_heartbeat_is_not_requeued(self):
+        job = enqueue('jobs.test.echo', {'value': 1})
+        claim_next()
+        Job.objects.update(started_date=timezone.now() - datetime.timedelta(hours=2))
+        job.refresh_from_db()
+        job.set_progress(1, 2)
+        self.assertEqual(requeue_stale(300), 0)
+
+    def test_requeued_job_outcome_is_not_overwritten(self):
+        enqueue('jobs.test.echo', {'value': 1})
+        first = claim_next('a')
+        Job.objects.update(heartbeat_date=timezone.now() - datetime.timedelta(hours=2))
+        requeue_stale(300)
+        second = claim_next('b')
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            run_job(first)
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.worker), ('running', 'b'))
+        run_job(second)
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'succeeded')
+
+    def test_cancel_and_visibility(self):
+        job = enqueue('jobs.test.echo', {'value': 1}, user=self.user)
+        other = enqueue('jobs.test.echo', {'value': 2})
+        self.assertEqual([item['id'] for item in self.client.get(reverse('job_list')).data['results']],
+                         [job.pk])
+        self.assertEqual(self.client.get(reverse('job_detail', args=[other.pk])).status_code, 404)
+
+        response = self.client.post(reverse('cancel_job', args=[job.pk]))
+        self.assertEqual(response.data['status'], 'cancelled')
+        response = self.client.post(reverse('cancel_job', args=[job.pk]))
+        self.assertEqual(response.status_code, 409)
+
+    def test_runworker_once(self):
+        enqueue('jobs.test.echo', {'value': 1})
+        out = io.StringIO()
+        call_command('runworker', '--once', stdout=out)
+        self.assertIn('Ran 1 jobs', out.getvalue())
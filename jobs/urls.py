@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.JobListView.as_view(), name='job_list'),
+    path('<int:pk>/', views.JobDetailView.as_view(), name='job_detail'),
+    path('<int:pk>/cancel/', views.cancel_job, name='cancel_job'),
+]
@@ -0,0 +1,66 @@
+from rest_framework import generics, permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from .models import Job
+from .serializers import JobSerializer
+
+
+def accepted(request, job):
+    """
+    202 response for an operation handed to the job queue, pointing at the
+    job's status endpoint
+    """
+    location = request.build_absolute_uri(reverse('job_detail', args=[job.pk]))
+    return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED,
+                    headers={'Location': location})
+
+
+def visible_jobs(user):
+    queryset = Job.objects.all()
+    if user.role not in ['staff', 'admin']:
+        queryset = queryset.filter(created_by=user)
+    return queryset
+
+
+class JobListView(generics.ListAPIView):
+    """
+    List jobs, users other than staff only see the jobs they started
+    """
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-created_date', '-id')
+    filterset_fields = ('status', 'name')
+    ordering_fields = ['created_date']
+
+    def get_queryset(self):
+        return visible_jobs(self.request.user).order_by(*self.ordering)
+
+
+class JobDetailView(generics.RetrieveAPIView):
+    """
+    Status, progress and result of a job
+    """
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return visible_jobs(self.request.user)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def cancel_job(request, pk):
+    """
+    Cancel a job that has not started yet
+    """
+    job = get_object_or_404(visible_jobs(request.user), pk=pk)
+    if not Job.objects.filter(pk=job.pk, status='queued').update(status='cancelled'):
+        return Response(
+            {"error": f"Job is {job.status} and can no longer be cancelled"},
+            status=status.HTTP_409_CONFLICT
+        )
+    job.refresh_from_db()
+    return Response(JobSerializer(job).data)
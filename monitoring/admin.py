@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import EndpointStat
+
+
+@admin.register(EndpointStat)
+class EndpointStatAdmin(admin.ModelAdmin):
+    """
+    Endpoint Stat Admin
+    """
+    list_display = ('endpoint', 'date', 'requests', 'errors', 'slow_requests', 'max_time',
+                    'queries', 'duplicate_requests')
+    list_filter = ('date',)
+    search_fields = ('endpoint',)
+    ordering = ('-date', 'endpoint')
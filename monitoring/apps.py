@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import collectors  # noqa: F401
+        from .profiling import install_recorder
+        connection_created.connect(install_recorder, dispatch_uid='monitoring.install_recorder')
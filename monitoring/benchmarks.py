@@ -0,0 +1,510 @@
+import datetime
+import itertools
+import json
+import random
+import threading
+import time
+from collections import deque
+
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from contracts.models import Contract
+from edi.conditional import table_versions
+from training.models import (
+    TrainingType, Training, TrainingApplication, Payment, PaymentRate, TrainerLevel
+)
+from training.rate_cache import rate_cache
+from training.reports import report_cache
+
+PREFIX = 'bench-'
+PASSWORD = 'bench-password'
+BATCH_SIZE = 5000
+# Sessions the seeded applications are spread over, and sessions left open
+# for the apply scenario
+SESSIONS = 2000
+
+
+def batched(objects, size=BATCH_SIZE):
+    iterator = iter(objects)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_insert(model, objects):
+    """
+    Insert a generator of unsaved objects in batches, never holding more
+    than one batch in memory; no signals are sent
+    """
+    count = 0
+    for batch in batched(objects):
+        model.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+        count += len(batch)
+    return count
+
+
+def seeded_volumes():
+    users = User.objects.filter(username__startswith=PREFIX)
+    return {
+        'trainers': users.filter(role='trainer').count(),
+        'applications': TrainingApplication.objects.filter(
+            for_training__training_id__startswith=PREFIX + 't-').count(),
+        'payments': Payment.objects.filter(reason__startswith=PREFIX + 'pay-').count(),
+        'contracts': Contract.objects.filter(signed_by__username__startswith=PREFIX).count(),
+    }
+
+
+SEEDED_MODELS = (User, Token, PaymentRate, TrainerLevel, TrainingType, Training,
+                 TrainingApplication, Payment, Contract)
+
+
+def invalidate_caches():
+    """
+    Bulk writes send no signals, so drop what the receivers would have
+    """
+    rate_cache.invalidate_on_commit()
+    report_cache.invalidate_on_commit()
+    table_versions.bump_on_commit(*SEEDED_MODELS)
+
+
+def clear():
+    """
+    Delete every seeded row, children first. The rows are deleted in SQL
+    without loading them, as a cascading delete would fetch and signal all
+    half a million payments one by one.
+    """
+    users = User.objects.filter(username__startswith=PREFIX)
+    trainings = Training.objects.filter(training_id__startswith=PREFIX)
+    with transaction.atomic():
+        for queryset in (
+            Payment.objects.filter(requested_by__in=users),
+            TrainingApplication.objects.filter(for_training__in=trainings),
+            TrainingApplication.objects.filter(trainer__in=users),
+            Contract.objects.filter(signed_by__in=users),
+            TrainerLevel.objects.filter(trainer__in=users),
+            Token.objects.filter(user__in=users),
+            trainings,
+        ):
+            queryset._raw_delete(queryset.db)
+        users.delete()
+        TrainingType.objects.filter(training_type__startswith=PREFIX).delete()
+        PaymentRate.objects.filter(level__startswith=PREFIX).delete()
+        invalidate_caches()
+
+
+def seed(trainers, applications, payments, contracts, log=lambda message: None):
+    """
+    Seed the volumes with bulk inserts. Every user shares one password hash
+    and gets a token up front, so seeding does not spend its time hashing.
+    """
+    start = datetime.date(2025, 1, 1)
+    password = make_password(PASSWORD)
+    with transaction.atomic():
+        staff = User.objects.create(username=PREFIX + 'staff', role='staff', sex='male',
+                                    password=password)
+        bulk_insert(User, (
+            User(username=f'{PREFIX}trainer-{n}', role='trainer', sex='female' if n % 2 else 'male',
+                 first_name='Bench', last_name=str(n), password=password)
+            for n in range(trainers)
+        ))
+        trainer_ids = list(User.objects.filter(username__startswith=PREFIX + 'trainer-')
+                           .order_by('id').values_list('id', flat=True))
+        bulk_insert(Token, (Token(key=Token.generate_key(), user_id=pk)
+                            for pk in [staff.pk] + trainer_ids))
+        log(f'{len(trainer_ids)} trainers')
+
+        rate = PaymentRate.objects.create(level=PREFIX + 'level', per_day=100)
+        bulk_insert(TrainerLevel, (TrainerLevel(trainer_id=pk, trainer_level=rate)
+                                   for pk in trainer_ids))
+        training_type = TrainingType.objects.create(training_type=PREFIX + 'type')
+
+        sessions = min(SESSIONS, max(1, applications))
+        bulk_insert(Training, (
+            Training(training_id=f'{PREFIX}t-{n}', given_by_id=trainer_ids[n % len(trainer_ids)],
+                     training_type=training_type, given_date=start + datetime.timedelta(days=n % 365),
+                     end_date=start + datetime.timedelta(days=n % 365 + n % 5),
+                     given_location='Addis Ababa')
+            for n in range(sessions)
+        ))
+        Training.objects.create(training_id=PREFIX + 'open', given_by_id=trainer_ids[0],
+                                training_type=training_type, given_date=start,
+                                end_date=start + datetime.timedelta(days=2),
+                                given_location='Addis Ababa')
+        session_ids = list(Training.objects.filter(training_id__startswith=PREFIX + 't-')
+                           .order_by('id').values_list('id', flat=True))
+
+        # Application n goes to session n % sessions, from a trainer that
+        # has not applied to that session yet
+        statuses = ['completed'] * 6 + ['approved'] * 2 + ['pending'] * 2
+        bulk_insert(TrainingApplication, (
+            TrainingApplication(
+                for_training_id=session_ids[n % sessions],
+                trainer_id=trainer_ids[(n % sessions + n // sessions) % len(trainer_ids)],
+                status=statuses[n % len(statuses)])
+            for n in range(min(applications, sessions * len(trainer_ids)))
+        ))
+        log(f'{applications} applications over {sessions} sessions')
+
+        bulk_insert(Payment, (
+            Payment(requested_by_id=trainer_ids[n % len(trainer_ids)], reason=f'{PREFIX}pay-{n}',
+                    amount=100 * (1 + n % 5), status='approved' if n % 3 else 'pending')
+            for n in range(payments)
+        ))
+        log(f'{payments} payments')
+
+        bulk_insert(Contract, (
+            Contract(for_training=training_type, signed_by_id=trainer_ids[n % len(trainer_ids)],
+                     end_date=start + datetime.timedelta(days=365),
+                     completion=['draft', 'active', 'completed'][n % 3])
+            for n in range(contracts)
+        ))
+        log(f'{contracts} contracts')
+        invalidate_caches()
+
+
+class Scenario:
+    """
+    One API call measured by the harness. ``targets(count)`` resets what
+    earlier runs changed and returns the arguments of up to ``count`` calls,
+    ``prepare(target)`` runs untimed before each call and ``call(client,
+    target)`` makes one and returns the response.
+    """
+    name = None
+
+    def __init__(self, context):
+        self.context = context
+
+    def targets(self, count):
+        return [None] * count
+
+    def prepare(self, target):
+        pass
+
+    def call(self, client, target):
+        raise NotImplementedError
+
+    def auth(self, user_id):
+        return {'HTTP_AUTHORIZATION': f'Token {self.context.tokens[user_id]}'}
+
+
+class Login(Scenario):
+    name = 'login'
+
+    def targets(self, count):
+        return [f'{PREFIX}trainer-{n % len(self.context.trainers)}' for n in range(count)]
+
+    def call(self, client, username):
+        response = client.post('/api/auth/login/', {'username': username, 'password': PASSWORD},
+                               format='json')
+        # The session would authenticate the client's next calls as this user
+        client.cookies.clear()
+        return response
+
+
+class ListApplications(Scenario):
+    name = 'list_applications'
+
+    def targets(self, count):
+        return [self.context.trainers[n % len(self.context.trainers)] for n in range(count)]
+
+    def call(self, client, trainer_id):
+        return client.get('/api/training/applications/', **self.auth(trainer_id))
+
+
+class ListAllApplications(Scenario):
+    """
+    Staff browsing applications, every other call filtered by a trainer
+    """
+    name = 'list_applications_staff'
+
+    def targets(self, count):
+        return [{} if n % 2 else {'trainer': self.context.trainers[n % len(self.context.trainers)]}
+                for n in range(count)]
+
+    def call(self, client, params):
+        return client.get('/api/training/applications/', params, **self.auth(self.context.staff))
+
+
+class Apply(Scenario):
+    name = 'apply'
+
+    def targets(self, count):
+        training = Training.objects.get(training_id=PREFIX + 'open')
+        TrainingApplication.objects.filter(for_training=training).delete()
+        return [(training.pk, trainer_id) for trainer_id in self.context.trainers[:count]]
+
+    def call(self, client, target):
+        training_id, trainer_id = target
+        return client.post(f'/api/training/applications/{training_id}/apply/', {},
+                           format='json', **self.auth(trainer_id))
+
+
+class RequestPayment(Scenario):
+    name = 'request_payment'
+
+    def targets(self, count):
+        Payment.objects.filter(reason__startswith=PREFIX + 't-').delete()
+        return list(
+            TrainingApplication.objects.filter(for_training__training_id__startswith=PREFIX + 't-',
+                                               status='completed')
+            .order_by('id').values_list('id', 'trainer_id')[:count]
+        )
+
+    def call(self, client, target):
+        application_id, trainer_id = target
+        return client.post(f'/api/training/payments/{application_id}/request/', {},
+                           format='json', **self.auth(trainer_id))
+
+
+class DecidePayment(Scenario):
+    """
+    Approve or reject seeded payments, set back to pending first. Approvals
+    take the oldest payments and rejections the newest, so the two do not
+    meet unless a run asks for more calls than there are payments.
+    """
+    action = None
+    ordering = 'id'
+
+    def targets(self, count):
+        payments = Payment.objects.filter(reason__startswith=PREFIX + 'pay-')
+        ids = list(payments.order_by(self.ordering).values_list('id', flat=True)[:count])
+        payments.filter(id__in=ids).update(status='pending', approved_by=None)
+        table_versions.bump_on_commit(Payment)
+        return ids
+
+    def call(self, client, payment_id):
+        return client.post(f'/api/training/payments/{payment_id}/{self.action}/',
+                           **self.auth(self.context.staff))
+
+
+class ApprovePayment(DecidePayment):
+    name = 'approve_payment'
+    action = 'approve'
+
+
+class RejectPayment(DecidePayment):
+    name = 'reject_payment'
+    action = 'reject'
+    ordering = '-id'
+
+
+class ListContracts(Scenario):
+    """
+    Staff browsing contracts, every other call filtered by a signer. The
+    list is served from the response cache once seen, so the contract
+    table's version is bumped before each call to time the listing itself.
+    """
+    name = 'list_contracts'
+
+    def targets(self, count):
+        return [{} if n % 2 else {'signed_by': self.context.trainers[n % len(self.context.trainers)]}
+                for n in range(count)]
+
+    def prepare(self, params):
+        table_versions.bump(Contract)
+
+    def call(self, client, params):
+        return client.get('/api/contracts/', params, **self.auth(self.context.staff))
+
+
+SCENARIOS = {scenario.name: scenario for scenario in (
+    Login, ListApplications, ListAllApplications, Apply, RequestPayment,
+    ApprovePayment, RejectPayment, ListContracts,
+)}
+
+# Share of each scenario in the mixed load profile
+LOAD_PROFILE = {
+    'list_applications': 30,
+    'list_applications_staff': 10,
+    'list_contracts': 10,
+    'apply': 15,
+    'request_payment': 15,
+    'approve_payment': 8,
+    'reject_payment': 2,
+    'login': 10,
+}
+
+
+class Context:
+    """
+    Ids and tokens of the seeded users the scenarios act as
+    """
+    def __init__(self):
+        users = User.objects.filter(username__startswith=PREFIX)
+        self.staff = users.get(role='staff').pk
+        self.trainers = list(users.filter(role='trainer').order_by('id').values_list('id', flat=True))
+        self.tokens = dict(Token.objects.filter(user__username__startswith=PREFIX)
+                           .values_list('user_id', 'key'))
+
+
+def percentile(latencies, fraction):
+    return latencies[min(len(latencies) - 1, max(0, int(len(latencies) * fraction + 0.5) - 1))]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    if not latencies:
+        return {'requests': 0, 'errors': errors, 'rps': 0.0, 'p50_ms': None, 'p99_ms': None}
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, name, latency, ok):
+        with self.lock:
+            if ok:
+                self.latencies.setdefault(name, []).append(latency)
+            else:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+
+def timed_call(scenario, client, target, recorder, expected=(200, 201)):
+    scenario.prepare(target)
+    started = time.perf_counter()
+    try:
+        response = scenario.call(client, target)
+        ok = response.status_code in expected
+    except Exception:
+        ok = False
+    recorder.add(scenario.name, time.perf_counter() - started, ok)
+
+
+def run_in_threads(users, work):
+    """
+    Run ``work(client)`` on ``users`` threads, each with its own client and
+    database connection like separate workers; one user runs in this thread
+    """
+    def user():
+        try:
+            work(APIClient())
+        finally:
+            connections.close_all()
+
+    if users == 1:
+        work(APIClient())
+        return
+    threads = [threading.Thread(target=user) for _ in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def benchmark(names, iterations, users=1, warmup=5):
+    """
+    Measure each scenario on its own: ``warmup`` unmeasured calls, then
+    ``iterations`` calls spread over ``users`` threads
+    """
+    context = Context()
+    results = {}
+    for name in names:
+        scenario = SCENARIOS[name](context)
+        targets = deque(scenario.targets(warmup + iterations))
+        client = APIClient()
+        for _ in range(min(warmup, len(targets))):
+            target = targets.popleft()
+            scenario.prepare(target)
+            scenario.call(client, target)
+
+        recorder = Recorder()
+
+        def work(client):
+            while True:
+                try:
+                    target = targets.popleft()
+                except IndexError:
+                    return
+                timed_call(scenario, client, target, recorder)
+
+        started = time.perf_counter()
+        run_in_threads(users, work)
+        elapsed = time.perf_counter() - started
+        results[name] = summarize(recorder.latencies.get(name, []), recorder.errors.get(name, 0),
+                                  elapsed)
+    return results
+
+
+def load(duration, users, profile=None):
+    """
+    Mixed load: ``users`` threads pick scenarios by the weights of
+    ``profile`` (``LOAD_PROFILE`` by default) until ``duration`` seconds
+    have passed. A scenario that runs out of targets drops out of the mix.
+    """
+    profile = profile or LOAD_PROFILE
+    context = Context()
+    # Enough targets for the whole run at a generous request rate
+    budget = int(duration * 500)
+    scenarios = {name: SCENARIOS[name](context) for name in profile}
+    targets = {name: deque(scenario.targets(budget)) for name, scenario in scenarios.items()}
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+    names, weights = list(profile), list(profile.values())
+
+    def work(client):
+        picker = random.Random()
+        while time.monotonic() < deadline:
+            name = picker.choices(names, weights)[0]
+            try:
+                target = targets[name].popleft()
+            except IndexError:
+                continue
+            timed_call(scenarios[name], client, target, recorder)
+
+    started = time.perf_counter()
+    run_in_threads(users, work)
+    elapsed = time.perf_counter() - started
+    results = {name: summarize(recorder.latencies.get(name, []), recorder.errors.get(name, 0),
+                               elapsed)
+               for name in profile}
+    results['total'] = summarize(
+        [latency for values in recorder.latencies.values() for latency in values],
+        sum(recorder.errors.values()), elapsed)
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Messages for the scenarios whose p50 or p99 grew by more than
+    ``tolerance`` (a fraction) over the baseline, or that started failing
+    """
+    found = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['errors'] > base.get('errors', 0):
+            found.append(f'{name}: {result["errors"]} errors, baseline {base.get("errors", 0)}')
+        for key in ('p50_ms', 'p99_ms'):
+            if result[key] is None or not base.get(key):
+                continue
+            if result[key] > base[key] * (1 + tolerance):
+                found.append(f'{name}: {key} {result[key]} over baseline {base[key]} '
+                             f'(+{(result[key] / base[key] - 1) * 100:.0f}%)')
+    return found
+
+
+def load_baseline(path):
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def save_baseline(path, meta, results):
+    with open(path, 'w') as baseline:
+        json.dump({'meta': meta, 'results': results}, baseline, indent=2, sort_keys=True)
+        baseline.write('\n')
@@ -0,0 +1,27 @@
+from accounts.authentication import token_cache
+from edi.response_cache import response_cache
+from training.rate_cache import rate_cache
+from training.reports import report_cache
+
+from .metrics import Counter, registry
+
+cache_hits = Counter('edi_cache_hits_total', 'Lookups answered from a cache', ['cache'])
+cache_misses = Counter('edi_cache_misses_total', 'Lookups that missed a cache', ['cache'])
+
+
+@registry.collector
+def cache_stats():
+    """
+    Hit and miss counts of the application caches, per process; the hit
+    ratio is hits / (hits + misses)
+    """
+    caches = {
+        'tokens': token_cache.stats(),
+        'rates': rate_cache.stats(),
+        'reports': report_cache.stats(),
+    }
+    for endpoint, stats in response_cache.stats().items():
+        caches[f'responses:{endpoint}'] = stats
+    for name, stats in caches.items():
+        yield cache_hits.name, {'cache': name}, stats['hits']
+        yield cache_misses.name, {'cache': name}, stats['misses']
@@ -0,0 +1,96 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from monitoring import benchmarks
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the API's hot paths through the full middleware stack.
+
+    The volumes are seeded once with bulk inserts and kept for later runs
+    (``--reseed`` replaces them, ``--clean`` only deletes them); every
+    scenario resets the rows it changes before it runs. ``bench`` times each
+    scenario on its own, ``load`` runs the weighted mix of
+    ``benchmarks.LOAD_PROFILE`` from ``--users`` threads for ``--duration``
+    seconds. ``--save-baseline`` records the results and a later run with
+    ``--baseline`` fails when a p50 or p99 is more than ``--tolerance``
+    slower. Point it at a database you can throw away; with more than one
+    user SQLite fails concurrent writes with "database is locked", so load
+    test against the production database engine.
+    """
+    help = 'Benchmark and load test the API against seeded volumes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('mode', nargs='?', choices=['bench', 'load'], default='bench')
+        parser.add_argument('--trainers', type=int, default=10000)
+        parser.add_argument('--applications', type=int, default=100000)
+        parser.add_argument('--payments', type=int, default=500000)
+        parser.add_argument('--contracts', type=int, default=10000)
+        parser.add_argument('--reseed', action='store_true')
+        parser.add_argument('--clean', action='store_true')
+        parser.add_argument('--scenario', action='append', choices=sorted(benchmarks.SCENARIOS),
+                            help='Run only these scenarios (bench mode)')
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--users', type=int, default=1)
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument('--baseline', help='JSON file to compare the results with')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Write the results to --baseline instead of comparing')
+        parser.add_argument('--tolerance', type=float, default=0.5)
+
+    def handle(self, *args, **options):
+        if options['clean']:
+            benchmarks.clear()
+            self.stdout.write('Seeded rows deleted')
+            return
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError('--save-baseline needs --baseline')
+
+        volumes = {name: options[name] for name in ('trainers', 'applications', 'payments',
+                                                     'contracts')}
+        if options['reseed'] or not benchmarks.seeded_volumes()['trainers']:
+            benchmarks.clear()
+            benchmarks.seed(**volumes, log=lambda message: self.stdout.write(f'Seeded {message}'))
+        volumes = benchmarks.seeded_volumes()
+
+        if options['mode'] == 'bench':
+            results = benchmarks.benchmark(options['scenario'] or list(benchmarks.SCENARIOS),
+                                           options['iterations'], options['users'],
+                                           options['warmup'])
+        else:
+            results = benchmarks.load(options['duration'], options['users'])
+        self.report(results)
+
+        meta = {'mode': options['mode'], 'vendor': connection.vendor, 'users': options['users'],
+                'volumes': volumes}
+        path = options['baseline']
+        if not path:
+            return
+        if options['save_baseline']:
+            benchmarks.save_baseline(path, meta, results)
+            self.stdout.write(f'Baseline written to {path}')
+            return
+        if not os.path.exists(path):
+            raise CommandError(f'No baseline at {path}; run with --save-baseline first')
+
+        baseline = benchmarks.load_baseline(path)
+        if baseline['meta'] != meta:
+            self.stderr.write(f'Warning: baseline was recorded with {baseline["meta"]}, '
+                              f'this run used {meta}')
+        found = benchmarks.regressions(results, baseline['results'], options['tolerance'])
+        if found:
+            raise CommandError('Regressions against the baseline:\n  ' + '\n  '.join(found))
+        self.stdout.write(f'No regressions over {options["tolerance"]:.0%} against {path}')
+
+    def report(self, results):
+        self.stdout.write(f'{"scenario":<25} {"requests":>9} {"errors":>7} {"req/s":>8} '
+                          f'{"p50 ms":>9} {"p99 ms":>9}')
+        for name, row in results.items():
+            p50 = '-' if row['p50_ms'] is None else f'{row["p50_ms"]:.1f}'
+            p99 = '-' if row['p99_ms'] is None else f'{row["p99_ms"]:.1f}'
+            self.stdout.write(f'{name:<25} {row["requests"]:>9} {row["errors"]:>7} '
+                              f'{row["rps"]:>8.1f} {p50:>9} {p99:>9}')
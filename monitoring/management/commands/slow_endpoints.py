@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from monitoring.profiling import ORDERINGS, slow_endpoints
+
+
+class Command(BaseCommand):
+    """
+    Print the slowest endpoints from the statistics the profiling
+    middleware collects; ``--json`` prints the same rows as the staff
+    ``/api/monitoring/slow-endpoints/`` endpoint.
+    """
+    help = 'Report the slowest API endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--order', choices=ORDERINGS, default='avg_time')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        rows = slow_endpoints(options['days'], options['order'], options['limit'])
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        if not rows:
+            self.stdout.write('No requests recorded')
+            return
+
+        self.stdout.write(f'{"endpoint":<55} {"requests":>9} {"avg ms":>9} {"max ms":>9} '
+                          f'{"queries":>8} {"sql ms":>8} {"N+1":>6} {"errors":>6}')
+        for row in rows:
+            self.stdout.write(
+                f'{row["endpoint"][:55]:<55} {row["requests"]:>9} {row["avg_time"]:>9.1f} '
+                f'{row["max_time"]:>9.1f} {row["avg_queries"]:>8.1f} {row["avg_sql_time"]:>8.1f} '
+                f'{row["duplicate_requests"]:>6} {row["errors"]:>6}')
+        repeated = [row for row in rows if row['duplicate_sample']]
+        for row in repeated:
+            self.stdout.write(f'\nRepeated in {row["endpoint"]}:\n  {row["duplicate_sample"]}')
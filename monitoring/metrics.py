@@ -0,0 +1,265 @@
+import fcntl
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Registry:
+    """
+    Metrics of this process, merged with the other processes' on scrape.
+
+    Updating a metric only touches a dict under a lock. When ``METRICS_DIR``
+    is set every process (gunicorn workers, job workers) writes a snapshot
+    of its values to ``<pid>-<start time>.json`` there, from a background
+    thread every ``METRICS_FLUSH_INTERVAL`` seconds and right before it
+    serves a scrape, and the scrape sums the snapshots of all processes, so
+    counters keep the counts of workers that have exited. A scrape folds
+    the snapshots not rewritten for ``METRICS_RETIRE_AFTER`` seconds, those
+    of exited processes, into ``retired.json``, so the directory holds one
+    file per live process plus that one. It should be emptied when the
+    deployment starts. Without it a scrape shows this process only.
+    """
+    retired_name = 'retired.json'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.collectors = []
+        self.values = {}
+        self.pid = os.getpid()
+        self.started = time.time_ns()
+        self.flusher_pid = None
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def collector(self, fn):
+        """
+        Register ``fn()`` returning ``(name, labels, value)`` counter samples
+        read at snapshot time, for counts kept elsewhere such as cache stats
+        """
+        self.collectors.append(fn)
+        return fn
+
+    def update(self, key, fn):
+        with self.lock:
+            if self.pid != os.getpid():
+                # Forked: the parent's values are in the parent's snapshot
+                self.pid = os.getpid()
+                self.started = time.time_ns()
+                self.values = {}
+                self.flusher_pid = None
+            self.values[key] = fn(self.values.get(key))
+            if self.flusher_pid is None and getattr(settings, 'METRICS_DIR', None):
+                self.flusher_pid = self.pid
+                threading.Thread(target=self.flush_periodically, daemon=True).start()
+
+    def snapshot(self):
+        with self.lock:
+            samples = [[name, dict(labels), list(value) if isinstance(value, list) else value]
+                       for (name, labels), value in self.values.items()]
+        for fn in self.collectors:
+            for name, labels, value in fn():
+                samples.append([name, labels, value])
+        return samples
+
+    def snapshot_name(self):
+        # The start time keeps a reused pid from overwriting an exited
+        # process's counts
+        with self.lock:
+            if self.pid != os.getpid():
+                return f'{os.getpid()}-{time.time_ns()}.json'
+            return f'{self.pid}-{self.started}.json'
+
+    def write_snapshot(self):
+        directory = Path(settings.METRICS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        write_json(directory / self.snapshot_name(), self.snapshot())
+
+    def retire_stale(self, directory):
+        """
+        Add the snapshots of processes that stopped writing them to
+        ``retired.json`` and delete them
+        """
+        cutoff = time.time() - getattr(settings, 'METRICS_RETIRE_AFTER', 300)
+        stale = []
+        for path in directory.glob('*.json'):
+            try:
+                if path.name != self.retired_name and path.stat().st_mtime < cutoff:
+                    stale.append(path)
+            except FileNotFoundError:
+                continue
+        if not stale:
+            return
+        with open(directory / 'retired.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            snapshots = []
+            for path in [directory / self.retired_name] + stale:
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except FileNotFoundError:
+                    # Retired by a concurrent scrape
+                    continue
+                except ValueError:
+                    logger.warning('Dropping unreadable metrics snapshot %s', path)
+            totals = sum_samples(snapshots)
+            write_json(directory / self.retired_name,
+                       [[name, dict(labels), value] for (name, labels), value in totals.items()])
+            for path in stale:
+                path.unlink(missing_ok=True)
+
+    def flush_periodically(self):
+        while True:
+            time.sleep(getattr(settings, 'METRICS_FLUSH_INTERVAL', 10))
+            if not getattr(settings, 'METRICS_DIR', None):
+                continue
+            try:
+                self.write_snapshot()
+            except OSError:
+                logger.exception('Could not write metrics snapshot')
+
+    def collect(self):
+        """
+        Samples of every process, summed per name and labels
+        """
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if not directory:
+            return sum_samples([self.snapshot()])
+        self.write_snapshot()
+        directory = Path(directory)
+        self.retire_stale(directory)
+        snapshots = []
+        for path in directory.glob('*.json'):
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return sum_samples(snapshots)
+
+    def render(self):
+        """
+        Prometheus text exposition format
+        """
+        totals = self.collect()
+        by_name = {name: [] for name in self.metrics}
+        for (name, labels), value in sorted(totals.items()):
+            by_name.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, samples in by_name.items():
+            metric = self.metrics.get(name)
+            if not samples:
+                if metric.labelnames:
+                    continue
+                # Unlabelled counters and histograms are shown before their first update
+                samples = [((), 0 if metric.kind == 'counter' else [0] * (len(metric.buckets) + 3))]
+            lines.append(f'# HELP {name} {metric.help if metric else name}')
+            lines.append(f'# TYPE {name} {metric.kind if metric else "counter"}')
+            for labels, value in samples:
+                if isinstance(metric, Histogram):
+                    lines.extend(metric.render_samples(labels, value))
+                else:
+                    lines.append(f'{name}{format_labels(labels)} {format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def write_json(path, data):
+    fd, temp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'w') as out:
+        json.dump(data, out)
+    os.replace(temp, path)
+
+
+def sum_samples(snapshots):
+    """
+    Samples of ``snapshots`` summed per ``(name, sorted labels)``
+    """
+    totals = {}
+    for samples in snapshots:
+        for name, labels, value in samples:
+            key = (name, tuple(sorted(labels.items())))
+            if isinstance(value, list):
+                current = totals.get(key) or [0] * len(value)
+                totals[key] = [a + b for a, b in zip(current, value)]
+            else:
+                totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def format_value(value):
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def inc(self, amount=1, **labels):
+        key = (self.name, tuple((name, labels[name]) for name in self.labelnames))
+        registry.update(key, lambda value: (value or 0) + amount)
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        registry.register(self)
+
+    def observe(self, amount, **labels):
+        key = (self.name, tuple((name, labels[name]) for name in self.labelnames))
+        # Per-bucket counts followed by the sum and the total count
+        index = next((n for n, bound in enumerate(self.buckets) if amount <= bound),
+                     len(self.buckets))
+
+        def add(value):
+            value = value or [0] * (len(self.buckets) + 3)
+            value[index] += 1
+            value[-2] += amount
+            value[-1] += 1
+            return value
+        registry.update(key, add)
+
+    def render_samples(self, labels, value):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), value):
+            cumulative += count
+            bucket_labels = labels + (('le', format_value(float(bound))),)
+            yield f'{self.name}_bucket{format_labels(bucket_labels)} {cumulative}'
+        yield f'{self.name}_sum{format_labels(labels)} {format_value(float(value[-2]))}'
+        yield f'{self.name}_count{format_labels(labels)} {value[-1]}'
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import Counter, Histogram
+from .profiling import QueryRecorder, collector, current_recorder, install_recorder
+
+logger = logging.getLogger('monitoring.requests')
+
+request_latency = Histogram('edi_http_request_duration_seconds', 'Request latency',
+                            ['view', 'method'])
+request_queries = Histogram('edi_http_request_db_queries', 'Database queries per request',
+                            ['view'], buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+request_count = Counter('edi_http_requests_total', 'Requests by response status',
+                        ['view', 'method', 'status'])
+
+
+class ProfilingMiddleware:
+    """
+    Measure each request's wall time, query count and SQL time.
+
+    The timings are logged, added to the per-endpoint statistics behind
+    ``manage.py slow_endpoints``, named by method and URL pattern, and to the
+    ``/metrics`` histograms, labelled by URL name; with
+    ``PROFILING_SERVER_TIMING`` (on under DEBUG) they are also sent back in a
+    ``Server-Timing`` header. A request running the same statement
+    ``PROFILING_DUPLICATE_THRESHOLD`` times or more is logged as a likely
+    N+1. Queries are attributed through a context variable, so those run in
+    the thread pool of ``ASYNC_VIEWS`` are counted too. The middleware runs
+    natively under ASGI, so it never pins requests to one thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Marks the instance as async for the handler, like MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        recorder, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        recorder, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    def start(self):
+        for connection in connections.all():
+            install_recorder(connection)
+        recorder = QueryRecorder()
+        return recorder, current_recorder.set(recorder), time.perf_counter()
+
+    def finish(self, request, response, recorder, started):
+        duration = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            # Static files and unknown URLs
+            return response
+        endpoint = f'{request.method} /{match.route}'
+        duplicates = recorder.duplicates(getattr(settings, 'PROFILING_DUPLICATE_THRESHOLD', 5))
+        slow = duration >= getattr(settings, 'PROFILING_SLOW_REQUEST_MS', 1000)
+
+        if getattr(settings, 'PROFILING_SERVER_TIMING', False):
+            response['Server-Timing'] = (
+                f'app;dur={duration:.1f}, '
+                f'db;dur={recorder.time * 1000:.1f};desc="{recorder.count} queries"')
+
+        fields = {
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'duration_ms': round(duration, 1),
+            'queries': recorder.count,
+            'sql_ms': round(recorder.time * 1000, 1),
+        }
+        if duplicates:
+            sql, times = duplicates[0]
+            logger.warning('Repeated query in %s', endpoint,
+                           extra={**fields, 'repeated': times, 'sql': sql})
+        if slow:
+            logger.warning('Slow request to %s', endpoint, extra=fields)
+        else:
+            logger.debug('Request to %s', endpoint, extra=fields)
+
+        collector.record(endpoint, response.status_code, duration, recorder, duplicates, slow)
+        view = match.url_name or match.route
+        request_latency.observe(duration / 1000, view=view, method=request.method)
+        request_queries.observe(recorder.count, view=view)
+        request_count.inc(view=view, method=request.method, status=response.status_code)
+        return response
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EndpointStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=255)),
+                ('date', models.DateField()),
+                ('requests', models.PositiveBigIntegerField(default=0)),
+                ('errors', models.PositiveBigIntegerField(default=0)),
+                ('slow_requests', models.PositiveBigIntegerField(default=0)),
+                ('total_time', models.FloatField(default=0)),
+                ('max_time', models.FloatField(default=0)),
+                ('queries', models.PositiveBigIntegerField(default=0)),
+                ('sql_time', models.FloatField(default=0)),
+                ('duplicate_requests', models.PositiveBigIntegerField(default=0)),
+                ('duplicate_sample', models.TextField(blank=True)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='endpointstat',
+            index=models.Index(fields=['date'], name='endpoint_stat_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='endpointstat',
+            constraint=models.UniqueConstraint(fields=('endpoint', 'date'), name='unique_endpoint_stat_per_day'),
+        ),
+    ]
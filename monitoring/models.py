@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class EndpointStat(models.Model):
+    """
+    Request timings of one endpoint over one day, accumulated by the
+    profiling middleware of every web worker. Times are in milliseconds.
+    """
+    endpoint = models.CharField(max_length=255)
+    date = models.DateField()
+    requests = models.PositiveBigIntegerField(default=0)
+    errors = models.PositiveBigIntegerField(default=0)
+    slow_requests = models.PositiveBigIntegerField(default=0)
+    total_time = models.FloatField(default=0)
+    max_time = models.FloatField(default=0)
+    queries = models.PositiveBigIntegerField(default=0)
+    sql_time = models.FloatField(default=0)
+    duplicate_requests = models.PositiveBigIntegerField(default=0)
+    duplicate_sample = models.TextField(blank=True)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['endpoint', 'date'], name='unique_endpoint_stat_per_day'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='endpoint_stat_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint} on {self.date}"
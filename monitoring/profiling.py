@@ -0,0 +1,174 @@
+import contextvars
+import datetime
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F, Max, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import EndpointStat
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting and timing the queries of a request.
+
+    Queries are grouped by their SQL with placeholders, so the same
+    statement run again with other parameters, the signature of an N+1
+    loop, shows up as a repeated entry.
+    """
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self, threshold):
+        """
+        ``(sql, times)`` of the statements run at least ``threshold`` times,
+        most repeated first
+        """
+        return [(sql, times) for sql, times in self.statements.most_common() if times >= threshold]
+
+
+# Recorder of the request being served; context variables follow a request
+# into the threads sync_to_async runs it on
+current_recorder = contextvars.ContextVar('monitoring_recorder', default=None)
+
+
+def record_queries(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_recorder(connection, **kwargs):
+    """
+    Add ``record_queries`` to a connection's execute wrappers once; connected
+    to ``connection_created`` so connections of every thread get it
+    """
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+class Collector:
+    """
+    Per-process totals per endpoint, added to the ``EndpointStat`` rows of
+    the day every ``PROFILING_FLUSH_INTERVAL`` seconds with one UPDATE per
+    endpoint. The writes run on a background thread with its own database
+    connection, so they never add to a request's time or query count; up
+    to one interval of requests is lost when a worker stops.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.flusher_pid = None
+
+    def record(self, endpoint, status_code, duration, recorder, duplicates, slow):
+        with self.lock:
+            totals = self.pending.setdefault(endpoint, {
+                'requests': 0, 'errors': 0, 'slow_requests': 0, 'total_time': 0.0,
+                'max_time': 0.0, 'queries': 0, 'sql_time': 0.0, 'duplicate_requests': 0,
+                'duplicate_sample': '',
+            })
+            totals['requests'] += 1
+            totals['errors'] += status_code >= 500
+            totals['slow_requests'] += slow
+            totals['total_time'] += duration
+            totals['max_time'] = max(totals['max_time'], duration)
+            totals['queries'] += recorder.count
+            totals['sql_time'] += recorder.time * 1000
+            if duplicates:
+                totals['duplicate_requests'] += 1
+                totals['duplicate_sample'] = duplicates[0][0]
+            # Started lazily, and again in a forked worker
+            if self.flusher_pid != os.getpid():
+                self.flusher_pid = os.getpid()
+                threading.Thread(target=self.flush_periodically, daemon=True).start()
+
+    def flush_periodically(self):
+        while True:
+            time.sleep(getattr(settings, 'PROFILING_FLUSH_INTERVAL', 60))
+            try:
+                self.flush_quietly()
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        today = timezone.localdate()
+        for endpoint, totals in pending.items():
+            sample = totals.pop('duplicate_sample')
+            with transaction.atomic():
+                EndpointStat.objects.get_or_create(endpoint=endpoint[:255], date=today)
+                updates = {
+                    name: F(name) + value for name, value in totals.items() if name != 'max_time'
+                }
+                updates['max_time'] = Greatest(F('max_time'), totals['max_time'])
+                if sample:
+                    updates['duplicate_sample'] = sample
+                EndpointStat.objects.filter(endpoint=endpoint[:255], date=today).update(**updates)
+        return len(pending)
+
+    def flush_quietly(self):
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.exception('Could not save endpoint statistics')
+
+
+collector = Collector()
+
+ORDERINGS = ('avg_time', 'max_time', 'total_time', 'avg_queries', 'duplicate_requests')
+
+
+def slow_endpoints(days=7, order='avg_time', limit=20):
+    """
+    Endpoints over the last ``days`` days, slowest first by ``order`` (one of
+    ``ORDERINGS``), with their averages in milliseconds
+    """
+    since = timezone.localdate() - datetime.timedelta(days=days - 1)
+    totals = ('requests', 'errors', 'slow_requests', 'total_time', 'queries', 'sql_time',
+              'duplicate_requests')
+    rows = (
+        EndpointStat.objects.filter(date__gte=since).values('endpoint')
+        # Aliased, as annotations may not shadow the model's own fields
+        .annotate(**{f'sum_{name}': Sum(name) for name in totals},
+                  peak_time=Max('max_time'), sample=Max('duplicate_sample'))
+    )
+    report = []
+    for row in rows:
+        requests = row['sum_requests'] or 1
+        report.append({
+            'endpoint': row['endpoint'],
+            'requests': row['sum_requests'],
+            'errors': row['sum_errors'],
+            'slow_requests': row['sum_slow_requests'],
+            'avg_time': round(row['sum_total_time'] / requests, 2),
+            'max_time': round(row['peak_time'], 2),
+            'total_time': round(row['sum_total_time'], 2),
+            'avg_queries': round(row['sum_queries'] / requests, 2),
+            'avg_sql_time': round(row['sum_sql_time'] / requests, 2),
+            'duplicate_requests': row['sum_duplicate_requests'],
+            'duplicate_sample': row['sample'],
+        })
+    report.sort(key=lambda row: row[order], reverse=True)
+    return report[:limit]
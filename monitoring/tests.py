@@ -0,0 +1,223 @@
+import asyncio
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from edi.response_cache import response_cache
+from training.models import Payment, TrainingType
+from .formatters import JsonFormatter
+from .metrics import registry
+from .middleware import ProfilingMiddleware
+from .models import EndpointStat
+from .profiling import QueryRecorder, collector
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """
+    Requests are timed, N+1 queries flagged and totals reported per endpoint
+    """
+    def setUp(self):
+        collector.pending.clear()
+        self.staff = User.objects.create_user(
+            username='staff', password='password123', role='staff', sex='male')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    @override_settings(PROFILING_SERVER_TIMING=True)
+    def test_server_timing_and_report(self):
+        url = reverse('training_type_list_create')
+        response = self.client.get(url)
+        self.assertRegex(response['Server-Timing'],
+                         r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$')
+        self.client.get(url)
+        collector.flush()
+        stat = EndpointStat.objects.get(endpoint='GET /api/training/types/')
+        self.assertEqual(stat.requests, 2)
+
+        response = self.client.get(reverse('slow_endpoint_report'), {'order': 'max_time'})
+        row = next(row for row in response.data if row['endpoint'] == 'GET /api/training/types/')
+        self.assertEqual(row['requests'], 2)
+        out = io.StringIO()
+        call_command('slow_endpoints', '--json', stdout=out)
+        self.assertIn('GET /api/training/types/', [row['endpoint'] for row in json.loads(out.getvalue())])
+
+    def test_server_timing_is_off_by_default(self):
+        response = self.client.get(reverse('training_type_list_create'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_runs_natively_under_asgi(self):
+        async def view(request):
+            return HttpResponse()
+        middleware = ProfilingMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        self.assertFalse(asyncio.iscoroutinefunction(ProfilingMiddleware(lambda request: None)))
+
+    def test_repeated_statements_are_grouped(self):
+        for n in range(3):
+            TrainingType.objects.create(training_type=f'Type {n}')
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for pk in TrainingType.objects.values_list('pk', flat=True):
+                TrainingType.objects.get(pk=pk)
+        self.assertEqual(recorder.count, 4)
+        [(sql, times)] = recorder.duplicates(3)
+        self.assertEqual(times, 3)
+        self.assertIn('WHERE "training_trainingtype"."id" = %s', sql)
+
+    @override_settings(PROFILING_DUPLICATE_THRESHOLD=1)
+    def test_repeated_queries_are_logged_and_counted(self):
+        url = reverse('training_type_list_create')
+        with self.assertLogs('monitoring.requests', 'WARNING') as logs:
+            self.client.get(url)
+        self.assertEqual(logs.records[0].endpoint, 'GET /api/training/types/')
+        self.assertTrue(logs.records[0].sql.startswith('SELECT'))
+        collector.flush()
+        stat = EndpointStat.objects.get(endpoint='GET /api/training/types/')
+        self.assertEqual(stat.duplicate_requests, 1)
+        self.assertTrue(stat.duplicate_sample.startswith('SELECT'))
+
+    def test_report_is_staff_only(self):
+        self.client.force_authenticate(User.objects.create(username='t', role='trainer', sex='male'))
+        self.assertEqual(self.client.get(reverse('slow_endpoint_report')).status_code, 403)
+
+    def test_json_log_lines_carry_extra_fields(self):
+        record = logging.makeLogRecord({'msg': 'Slow request', 'levelname': 'WARNING',
+                                        'name': 'monitoring.requests', 'queries': 12})
+        line = json.loads(JsonFormatter().format(record))
+        self.assertEqual((line['message'], line['queries']), ('Slow request', 12))
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsTests(TestCase):
+    """
+    /metrics exposes request histograms and business counters of all workers
+    """
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            username='staff', password='password123', role='staff', sex='male')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        return response.content.decode()
+
+    def sample(self, text, line_start):
+        for line in text.splitlines():
+            if line.startswith(line_start + ' '):
+                return float(line.rsplit(' ', 1)[1])
+        return 0.0
+
+    def test_request_histograms(self):
+        self.client.get(reverse('training_type_list_create'))
+        text = self.scrape()
+        self.assertIn('# TYPE edi_http_request_duration_seconds histogram', text)
+        self.assertGreaterEqual(self.sample(
+            text, 'edi_http_request_duration_seconds_bucket'
+                  '{method="GET",view="training_type_list_create",le="+Inf"}'), 1)
+        self.assertGreaterEqual(self.sample(
+            text, 'edi_http_request_db_queries_count{view="training_type_list_create"}'), 1)
+        self.assertIn('edi_cache_hits_total{cache="rates"}', text)
+
+    def test_business_counters(self):
+        before = self.sample(self.scrape(), 'edi_payments_requested_total')
+        Payment.objects.create(requested_by=self.staff, reason='TR-1', amount=10)
+        self.assertEqual(self.sample(self.scrape(), 'edi_payments_requested_total'), before + 1)
+
+    def test_snapshots_of_all_processes_are_summed(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        Path(directory, '1.json').write_text(json.dumps([
+            ['edi_certificates_issued_total', {}, 5],
+        ]))
+        with override_settings(METRICS_DIR=directory):
+            mine = self.sample(self.scrape(), 'edi_certificates_issued_total')
+            Payment.objects.create(requested_by=self.staff, reason='TR-1', amount=10)
+            self.assertEqual(len(list(Path(directory).glob(f'{os.getpid()}-*.json'))), 1)
+        self.assertEqual(mine, self.sample(self.scrape(), 'edi_certificates_issued_total') + 5)
+
+    def test_snapshots_of_exited_processes_are_retired(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for name in ('1-100.json', '2-100.json'):
+            path = Path(directory, name)
+            path.write_text(json.dumps([['edi_certificates_issued_total', {}, 5]]))
+            os.utime(path, (0, 0))
+        with override_settings(METRICS_DIR=directory):
+            total = self.sample(self.scrape(), 'edi_certificates_issued_total')
+            self.assertEqual(sorted(path.name for path in Path(directory).glob('*.json')),
+                             sorted(['retired.json', registry.snapshot_name()]))
+            self.assertEqual(self.sample(self.scrape(), 'edi_certificates_issued_total'), total)
+        self.assertEqual(total, self.sample(self.scrape(), 'edi_certificates_issued_total') + 10)
+
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        self.assertIn('edi_http_requests_total', self.scrape())
+
+    @override_settings(METRICS_TOKEN='')
+    def test_closed_without_token_unless_debug(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempdir)
+        self.baseline = os.path.join(self.tempdir, 'baseline.json')
+
+    def run_benchmark(self, *args):
+        out = io.StringIO()
+        call_command('benchmark_api', '--trainers=5', '--applications=40', '--payments=30',
+                     '--contracts=5', '--iterations=4', '--warmup=1', *args,
+                     stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_scenarios_succeed_and_baseline_is_saved(self):
+        self.run_benchmark('--baseline', self.baseline, '--save-baseline')
+        results = json.loads(Path(self.baseline).read_text())['results']
+        self.assertEqual(set(results), {
+            'login', 'list_applications', 'list_applications_staff', 'apply', 'request_payment',
+            'approve_payment', 'reject_payment', 'list_contracts',
+        })
+        for name, row in results.items():
+            self.assertEqual(row['errors'], 0, name)
+            self.assertEqual(row['requests'], 4, name)
+        self.assertEqual(Payment.objects.filter(reason__startswith='bench-pay-').count(), 30)
+
+    def test_regression_fails_the_run(self):
+        self.run_benchmark('--scenario', 'list_contracts', '--baseline', self.baseline,
+                           '--save-baseline')
+        baseline = json.loads(Path(self.baseline).read_text())
+        baseline['results']['list_contracts'].update(p50_ms=0.001, p99_ms=0.001)
+        Path(self.baseline).write_text(json.dumps(baseline))
+        with self.assertRaisesMessage(CommandError, 'list_contracts: p50_ms'):
+            self.run_benchmark('--scenario', 'list_contracts', '--baseline', self.baseline)
+
+    def test_contract_listing_is_not_served_from_the_response_cache(self):
+        response_cache.reset_stats()
+        self.run_benchmark('--scenario', 'list_contracts')
+        self.assertEqual(response_cache.stats()['contract_list_create']['hits'], 0)
+
+    def test_load_mix_and_clean(self):
+        output = self.run_benchmark('load', '--duration=0.5')
+        self.assertIn('total', output)
+        call_command('benchmark_api', '--clean', stdout=io.StringIO())
+        self.assertFalse(User.objects.filter(username__startswith='bench-').exists())
+        self.assertFalse(TrainingType.objects.filter(training_type__startswith='bench-').exists())
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('slow-endpoints/', views.slow_endpoint_report, name='slow_endpoint_report'),
+]
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import permissions, serializers, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from .metrics import registry
+from .profiling import ORDERINGS, slow_endpoints
+
+
+class IsStaffOrAdmin(permissions.BasePermission):
+    """
+    Custom permission to only allow staff or admin users.
+    """
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.role in ['staff', 'admin']
+
+
+class SlowEndpointFilterSerializer(serializers.Serializer):
+    days = serializers.IntegerField(min_value=1, max_value=366, default=7)
+    order = serializers.ChoiceField(choices=ORDERINGS, default='avg_time')
+    limit = serializers.IntegerField(min_value=1, max_value=500, default=20)
+
+
+@api_view(['GET'])
+@permission_classes([IsStaffOrAdmin])
+def slow_endpoint_report(request):
+    """
+    Slowest endpoints over the last ``days`` days, ordered by ``order``;
+    each worker adds its latest requests every ``PROFILING_FLUSH_INTERVAL``
+    seconds
+    """
+    filters = SlowEndpointFilterSerializer(data=request.query_params)
+    if not filters.is_valid():
+        return Response({'errors': filters.errors}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(slow_endpoints(**filters.validated_data))
+
+
+def metrics(request):
+    """
+    Metrics of all the workers in the Prometheus text format; requires
+    ``Authorization: Bearer <METRICS_TOKEN>``. Without a token it is only
+    open with DEBUG on, otherwise it is closed.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse('METRICS_TOKEN is not set', status=403,
+                                content_type='text/plain')
+    elif not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
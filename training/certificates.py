@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+from edi.conditional import table_versions
+from edi.pdf import render_pdf
+
+from .dashboard import schedule_refresh
+from .metrics import certificates_issued
+from .models import Certificate, TrainingApplication
+from .reports import report_cache
+
+CERTIFIED_STATES = ('approved', 'completed')
+
+DEFAULT_CERTIFICATE_TEMPLATE = """Certificate of Completion
+
+This certifies that
+{{ name }}
+has completed the {{ training_type }} training {{ training_id }}
+held in {{ location }} from {{ start_date }} to {{ end_date }}
+
+Given on {{ given_date }}, trainer {{ trainer }}
+Certificate {{ certificate_id }}"""
+
+# Templates are edited through the API, so they are not Django templates:
+# only these ``{{ name }}`` placeholders are replaced, nothing else runs
+CERTIFICATE_PLACEHOLDERS = (
+    'name', 'training_type', 'training_id', 'location', 'start_date', 'end_date',
+    'given_date', 'trainer', 'certificate_id',
+)
+PLACEHOLDER = re.compile(r'{{\s*(\w+)\s*}}')
+
+
+def unknown_placeholders(template):
+    """
+    Placeholders of ``template`` that no certificate fills in
+    """
+    return sorted({name for name in PLACEHOLDER.findall(template)
+                   if name not in CERTIFICATE_PLACEHOLDERS})
+
+
+def fill_template(template, context):
+    return PLACEHOLDER.sub(lambda match: context.get(match.group(1), match.group(0)), template)
+
+
+@transaction.atomic
+def issue_certificates(training, given_date=None, batch_size=1000):
+    """
+    Certify every approved or completed participant of ``training``.
+
+    The certificates are written with one ``bulk_create`` that skips rows
+    the ``unique_certificate_per_training`` constraint rejects, so people
+    who already hold one are left alone without a lookup per person.
+    Returns ``(created_ids, skipped_user_ids)``.
+    """
+    participants = list(
+        TrainingApplication.objects.filter(for_training=training, status__in=CERTIFIED_STATES)
+        .order_by('trainer_id').values_list('trainer_id', flat=True)
+    )
+    given_date = given_date or training.end_date
+    certificates = [
+        Certificate(certificate_id=str(uuid.uuid4()), certified_id=user_id,
+                    given_for=training, given_date=given_date)
+        for user_id in participants
+    ]
+    Certificate.objects.bulk_create(certificates, batch_size=batch_size, ignore_conflicts=True)
+
+    # Conflicting rows get no primary key, so read back the ones written
+    generated = {certificate.certificate_id for certificate in certificates}
+    created = {
+        user_id: pk
+        for user_id, pk, certificate_id in Certificate.objects.filter(given_for=training)
+        .values_list('certified_id', 'id', 'certificate_id')
+        if certificate_id in generated
+    }
+    if created:
+        # bulk_create sends no post_save
+        schedule_refresh(training.given_by_id)
+        report_cache.invalidate_on_commit()
+        table_versions.bump_on_commit(Certificate)
+        certificates_issued.inc(len(created))
+    return (
+        sorted(created.values()),
+        [user_id for user_id in participants if user_id not in created],
+    )
+
+
+def certificate_context(certificate):
+    """
+    Values a certificate template can use; expects the relations loaded by
+    ``Certificate.objects.with_related()``
+    """
+    training = certificate.given_for
+    return {
+        'name': certificate.certified.full_name.strip() or certificate.certified.username,
+        'training_type': training.training_type.training_type,
+        'training_id': training.training_id,
+        'location': training.given_location,
+        'start_date': training.given_date.isoformat(),
+        'end_date': training.end_date.isoformat(),
+        'given_date': certificate.given_date.isoformat(),
+        'trainer': training.given_by.full_name.strip() or training.given_by.username,
+        'certificate_id': str(certificate.certificate_id),
+    }
+
+
+def certificate_document(certificate):
+    """
+    ``(digest, lines)`` of a certificate's PDF. The digest hashes the
+    template and every value printed, so it changes exactly when the
+    rendered document would.
+    """
+    template = certificate.given_for.training_type.certificate_template \
+        or DEFAULT_CERTIFICATE_TEMPLATE
+    context = certificate_context(certificate)
+    digest = hashlib.sha256(
+        json.dumps([template, context], sort_keys=True).encode()).hexdigest()
+    text = fill_template(template, context)
+    return digest, [line.strip() for line in text.strip().splitlines()]
+
+
+def certificate_path(digest):
+    return Path(settings.MEDIA_ROOT) / 'certificates' / digest[:2] / f'{digest}.pdf'
+
+
+def write_certificate_pdf(path, lines):
+    """
+    Render ``lines`` to ``path`` unless the file exists; the file appears
+    atomically so concurrent renderers never serve a partial PDF
+    """
+    path = Path(path)
+    if path.exists():
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, partial = tempfile.mkstemp(prefix=f'{path.name}.', suffix='.partial', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            out.write(render_pdf(lines))
+        os.chmod(partial, 0o644)
+        os.replace(partial, path)
+    except BaseException:
+        os.unlink(partial)
+        raise
+    return True
+
+
+def render_certificate(certificate):
+    """
+    Path and digest of a certificate's PDF, rendering it on first request
+    """
+    digest, lines = certificate_document(certificate)
+    path = certificate_path(digest)
+    write_certificate_pdf(path, lines)
+    return path, digest
+
+
+def render_certificates(certificates, processes=None, progress=None):
+    """
+    Render the PDFs missing from the cache for ``certificates`` in a pool
+    of ``processes`` (``CERTIFICATE_RENDER_PROCESSES`` by default) and
+    return how many were written. ``progress(done, total)`` is called as
+    documents complete.
+    """
+    pending = []
+    for certificate in certificates:
+        digest, lines = certificate_document(certificate)
+        path = certificate_path(digest)
+        if not path.exists():
+            pending.append((str(path), lines))
+    if processes is None:
+        processes = getattr(settings, 'CERTIFICATE_RENDER_PROCESSES', None) or os.cpu_count()
+
+    if processes <= 1 or len(pending) < 2:
+        results = (write_certificate_pdf(path, lines) for path, lines in pending)
+        written = 0
+        for done, result in enumerate(results, start=1):
+            written += result
+            if progress:
+                progress(done, len(pending))
+        return written
+
+    written = 0
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        results = pool.map(write_certificate_pdf, *zip(*pending), chunksize=50)
+        for done, result in enumerate(results, start=1):
+            written += result
+            if progress and (done % 50 == 0 or done == len(pending)):
+                progress(done, len(pending))
+    return written
@@ -0,0 +1,127 @@
+import logging
+
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.utils import timezone
+
+from accounts.models import User
+from jobs.queue import enqueue
+from .models import Training, TrainingApplication, Certificate, Payment, TrainerDashboard
+
+logger = logging.getLogger(__name__)
+
+APPROVED_PAYMENT_STATES = ('approved', 'completed')
+
+
+def compute_dashboards(trainer_ids, today=None):
+    """
+    Dashboard figures for ``trainer_ids`` as {trainer_id: TrainerDashboard}.
+
+    One grouped query per source table, so the cost does not depend on how
+    many trainers are refreshed at once.
+    """
+    today = today or timezone.localdate()
+    now = timezone.now()
+    trainer_ids = list(trainer_ids)
+    # bulk_update skips auto_now, so the timestamp is set here
+    rows = {pk: TrainerDashboard(trainer_id=pk, updated_at=now) for pk in trainer_ids}
+
+    applications = (
+        TrainingApplication.objects.filter(trainer_id__in=trainer_ids)
+        .values('trainer_id')
+        .annotate(**{
+            f'applications_{state}': Count('id', filter=Q(status=state))
+            for state, _ in TrainingApplication.STATUS_CHOICES
+        })
+    )
+    payments = (
+        Payment.objects.filter(requested_by_id__in=trainer_ids)
+        .values('requested_by_id')
+        .annotate(
+            payments_requested=Sum('amount'),
+            payments_approved=Sum('amount', filter=Q(status__in=APPROVED_PAYMENT_STATES)),
+        )
+    )
+    certificates = (
+        Certificate.objects.filter(given_for__given_by_id__in=trainer_ids)
+        .values('given_for__given_by_id')
+        .annotate(certificates_issued=Count('id'))
+    )
+    sessions = (
+        Training.objects.filter(given_by_id__in=trainer_ids, given_date__gte=today)
+        .values('given_by_id')
+        .annotate(upcoming_sessions=Count('id'), next_session_date=Min('given_date'))
+    )
+
+    for queryset, key in ((applications, 'trainer_id'), (payments, 'requested_by_id'),
+                          (certificates, 'given_for__given_by_id'), (sessions, 'given_by_id')):
+        for values in queryset.order_by():
+            row = rows[values.pop(key)]
+            for field, value in values.items():
+                if value is not None:
+                    setattr(row, field, value)
+    return rows
+
+
+def refresh_dashboards(trainer_ids):
+    """
+    Recompute and store the dashboard rows of the given trainers; ids of
+    other users are skipped and their rows removed.
+
+    Missing rows are inserted first and every row is locked before the
+    figures are computed, so concurrent refreshes of a trainer wait for
+    each other and the last one to commit stores the newest figures.
+    """
+    trainer_ids = {pk for pk in trainer_ids if pk is not None}
+    with transaction.atomic():
+        trainers = set(
+            User.objects.filter(pk__in=trainer_ids, role='trainer').values_list('pk', flat=True)
+        )
+        TrainerDashboard.objects.filter(trainer_id__in=trainer_ids - trainers).delete()
+        if not trainers:
+            return {}
+        TrainerDashboard.objects.bulk_create(
+            [TrainerDashboard(trainer_id=pk) for pk in trainers], ignore_conflicts=True)
+        list(TrainerDashboard.objects.select_for_update().filter(trainer_id__in=trainers)
+             .values_list('trainer_id', flat=True))
+        rows = compute_dashboards(trainers)
+        fields = [f.name for f in TrainerDashboard._meta.concrete_fields if not f.primary_key]
+        TrainerDashboard.objects.bulk_update(rows.values(), fields)
+    return rows
+
+
+def enqueue_refresh(trainer_ids):
+    try:
+        enqueue('training.refresh_dashboards', {'trainers': trainer_ids})
+    except Exception:
+        # The write that triggered the refresh has committed already; the
+        # next refresh or rebuild_dashboards corrects the rows
+        logger.exception('Could not queue the dashboard refresh of %s', trainer_ids)
+
+
+def schedule_refresh(*trainer_ids):
+    """
+    Queue a job refreshing the given trainers' dashboards once the current
+    transaction commits, so rolled back writes never reach the summary and
+    the request that wrote only pays for inserting the job. The figures
+    change when a worker (``manage.py runworker``) has run it; failed runs
+    are retried by the queue. Failing to queue is logged, never raised into
+    the request that wrote.
+    """
+    trainer_ids = sorted({pk for pk in trainer_ids if pk is not None})
+    if trainer_ids:
+        transaction.on_commit(lambda: enqueue_refresh(trainer_ids))
+
+
+def rebuild_dashboards(batch_size=500):
+    """
+    Recompute every trainer's dashboard, returns the number of rows written
+    """
+    # Rows of users who are no longer trainers are removed on the way
+    trainer_ids = sorted(
+        set(User.objects.filter(role='trainer').values_list('pk', flat=True))
+        | set(TrainerDashboard.objects.values_list('trainer_id', flat=True))
+    )
+    for start in range(0, len(trainer_ids), batch_size):
+        refresh_dashboards(trainer_ids[start:start + batch_size])
+    return len(trainer_ids)
@@ -0,0 +1,82 @@
+import django_filters
+
+from .models import (
+    Training, TrainingApplication, Certificate, Payment, Innovation, WarrantyMoney
+)
+
+
+class TrainingFilter(django_filters.FilterSet):
+    """
+    Training filters: ``?given_date_after=&given_date_before=``,
+    ``?given_location=`` (case-insensitive substring) and the related ids
+    """
+    given_date = django_filters.DateFromToRangeFilter()
+    end_date = django_filters.DateFromToRangeFilter()
+    given_location = django_filters.CharFilter(lookup_expr='icontains')
+
+    class Meta:
+        model = Training
+        fields = ('given_by', 'training_type', 'given_location', 'given_date', 'end_date')
+
+
+class TrainingApplicationFilter(django_filters.FilterSet):
+    """
+    Training application filters
+    """
+    status = django_filters.MultipleChoiceFilter(choices=TrainingApplication.STATUS_CHOICES)
+    training_type = django_filters.NumberFilter(field_name='for_training__training_type')
+    applied_date = django_filters.DateFromToRangeFilter()
+
+    class Meta:
+        model = TrainingApplication
+        fields = ('status', 'trainer', 'for_training', 'training_type', 'applied_date')
+
+
+class CertificateFilter(django_filters.FilterSet):
+    """
+    Certificate filters
+    """
+    training_type = django_filters.NumberFilter(field_name='given_for__training_type')
+    given_date = django_filters.DateFromToRangeFilter()
+
+    class Meta:
+        model = Certificate
+        fields = ('certified', 'given_for', 'training_type', 'given_date')
+
+
+class PaymentFilter(django_filters.FilterSet):
+    """
+    Payment filters
+    """
+    status = django_filters.MultipleChoiceFilter(choices=Payment.STATUS_CHOICES)
+    created_date = django_filters.DateFromToRangeFilter()
+    amount_min = django_filters.NumberFilter(field_name='amount', lookup_expr='gte')
+    amount_max = django_filters.NumberFilter(field_name='amount', lookup_expr='lte')
+
+    class Meta:
+        model = Payment
+        fields = ('status', 'requested_by', 'approved_by', 'reason', 'created_date')
+
+
+class InnovationFilter(django_filters.FilterSet):
+    """
+    Innovation filters
+    """
+    created_date = django_filters.DateFromToRangeFilter()
+
+    class Meta:
+        model = Innovation
+        fields = ('innovator', 'created_date')
+
+
+class WarrantyMoneyFilter(django_filters.FilterSet):
+    """
+    Warranty money filters
+    """
+    status = django_filters.MultipleChoiceFilter(choices=WarrantyMoney.STATUS_CHOICES)
+    created_date = django_filters.DateFromToRangeFilter()
+    expiry_date = django_filters.DateFromToRangeFilter()
+
+    class Meta:
+        model = WarrantyMoney
+        fields = ('status', 'allowed_for', 'created_date', 'expiry_date')
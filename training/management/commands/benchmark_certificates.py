@@ -0,0 +1,81 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from training.models import TrainingType, Training, TrainingApplication
+from training.views import CertificateListCreateView, issue_training_certificates
+
+
+class Command(BaseCommand):
+    """
+    Compare one POST per certificate with bulk issuance for a session.
+
+    Every run seeds its own data inside a transaction that is rolled back,
+    so the command is safe to run against a development database.
+    """
+    help = 'Benchmark per-certificate POSTs against issue_training_certificates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participants', type=int, default=10000)
+        parser.add_argument('--single', type=int, default=300,
+                            help='Certificates to create one POST at a time')
+
+    def handle(self, *args, **options):
+        runs = (
+            ('per-certificate', self.run_single, min(options['single'], options['participants'])),
+            ('bulk', self.run_bulk, options['participants']),
+        )
+        for label, run, count in runs:
+            with transaction.atomic():
+                staff, training, users = self.seed(count)
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    run(staff, training, users)
+                    elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f'{label:>16}: {count} certificates in {elapsed:.3f}s '
+                f'({elapsed / count * 1000:.2f} ms each), {len(ctx.captured_queries)} queries'
+            )
+
+    def seed(self, count):
+        staff = User.objects.create(username='bench-staff', role='staff', sex='male')
+        trainer = User.objects.create(username='bench-trainer', role='trainer', sex='male')
+        training = Training.objects.create(
+            training_id='bench', given_by=trainer,
+            training_type=TrainingType.objects.create(training_type='bench'),
+            given_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 1, 3),
+            given_location='bench')
+        User.objects.bulk_create([
+            User(username=f'bench-participant-{n}', role='trainer', sex='female')
+            for n in range(count)
+        ])
+        users = list(User.objects.filter(username__startswith='bench-participant-')
+                     .values_list('id', flat=True))
+        TrainingApplication.objects.bulk_create([
+            TrainingApplication(for_training=training, trainer_id=user_id, status='completed')
+            for user_id in users
+        ])
+        return staff, training, users
+
+    def run_single(self, staff, training, users):
+        factory = APIRequestFactory()
+        view = CertificateListCreateView.as_view()
+        for user_id in users:
+            request = factory.post('/api/training/certificates/', {
+                'certified': user_id, 'given_for': training.pk, 'given_date': '2025-01-03',
+            }, format='json')
+            force_authenticate(request, user=staff)
+            response = view(request)
+            assert response.status_code == 201, response.data
+
+    def run_bulk(self, staff, training, users):
+        request = APIRequestFactory().post(f'/api/training/sessions/{training.pk}/certificates/')
+        force_authenticate(request, user=staff)
+        response = issue_training_certificates(request, pk=training.pk)
+        assert response.status_code == 201 and len(response.data['created']) == len(users)
@@ -0,0 +1,93 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from training.models import (
+    TrainingType, Training, TrainingApplication, PaymentRate, TrainerLevel
+)
+from training.rate_cache import rate_cache
+from training.views import request_payment, request_payment_batch
+
+
+class Command(BaseCommand):
+    """
+    Compare per-application payment requests with the batch endpoint.
+
+    Every run seeds its own data inside a transaction that is rolled back,
+    so the command is safe to run against a development database.
+    """
+    help = 'Benchmark request_payment against request_payment_batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--trainers', type=int, default=10)
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        trainers = max(1, min(options['trainers'], count))
+        for label, run in (('per-application', self.run_single), ('batch', self.run_batch)):
+            with transaction.atomic():
+                applications = self.seed(count, trainers)
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    run(applications)
+                    elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f'{label:>16}: {count} payments in {elapsed:.3f}s, '
+                f'{len(ctx.captured_queries)} queries'
+            )
+
+    def seed(self, count, trainers):
+        rate = PaymentRate.objects.create(level='bench', per_day=100)
+        training_type = TrainingType.objects.create(training_type='bench')
+        User.objects.bulk_create([
+            User(username=f'bench-trainer-{n}', role='trainer', sex='male')
+            for n in range(trainers)
+        ])
+        users = list(User.objects.filter(username__startswith='bench-trainer-').order_by('id'))
+        TrainerLevel.objects.bulk_create([
+            TrainerLevel(trainer=user, trainer_level=rate) for user in users
+        ])
+        # bulk_create sends no post_save, so drop the cached tables by hand
+        rate_cache.invalidate()
+        start = datetime.date(2025, 1, 1)
+        Training.objects.bulk_create([
+            Training(training_id=f'bench-{n}', given_by=users[n % trainers],
+                     training_type=training_type, given_date=start,
+                     end_date=start + datetime.timedelta(days=n % 5),
+                     given_location='bench')
+            for n in range(count)
+        ])
+        trainings = Training.objects.filter(training_id__startswith='bench-').order_by('id')
+        TrainingApplication.objects.bulk_create([
+            TrainingApplication(for_training=training, trainer=users[n % trainers],
+                                status='completed')
+            for n, training in enumerate(trainings)
+        ])
+        return list(
+            TrainingApplication.objects.filter(for_training__training_id__startswith='bench-')
+            .select_related('trainer')
+        )
+
+    def run_single(self, applications):
+        factory = APIRequestFactory()
+        for application in applications:
+            request = factory.post(f'/api/training/payments/{application.pk}/request/')
+            force_authenticate(request, user=application.trainer)
+            response = request_payment(request, pk=application.pk)
+            assert response.status_code == 201, response.data
+
+    def run_batch(self, applications):
+        factory = APIRequestFactory()
+        request = factory.post('/api/training/payments/request/',
+                               {'applications': [app.pk for app in applications]},
+                               format='json')
+        force_authenticate(request, user=User(role='staff'))
+        response = request_payment_batch(request)
+        assert response.status_code == 201, response.data
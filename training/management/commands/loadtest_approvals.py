@@ -0,0 +1,74 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, OperationalError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from training.models import Payment
+from training.views import approve_payment
+
+
+class Command(BaseCommand):
+    """
+    Approve payments from many threads at once against the configured
+    database and report how many approvals failed on lock contention.
+
+    Each thread uses its own database connection, like separate gunicorn
+    workers do. The seeded rows are deleted afterwards.
+    """
+    help = 'Load test concurrent approve_payment calls'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payments', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=16)
+
+    def handle(self, *args, **options):
+        staff = User(role='staff')
+        requester = User.objects.create(username='loadtest-requester', role='trainer', sex='male')
+        Payment.objects.bulk_create([
+            Payment(requested_by=requester, reason=f'loadtest-{n}', amount=1)
+            for n in range(options['payments'])
+        ])
+        ids = list(Payment.objects.filter(requested_by=requester).values_list('id', flat=True))
+
+        factory = APIRequestFactory()
+        errors = {'locked': 0, 'other': 0}
+        lock = threading.Lock()
+
+        def approve(pk):
+            request = factory.post(f'/api/training/payments/{pk}/approve/')
+            force_authenticate(request, user=staff)
+            started = time.perf_counter()
+            try:
+                response = approve_payment(request, pk=pk)
+                failed = response.status_code != 200
+                kind = 'other'
+            except OperationalError as exc:
+                failed = True
+                kind = 'locked' if 'locked' in str(exc) else 'other'
+            finally:
+                connections.close_all()
+            if failed:
+                with lock:
+                    errors[kind] += 1
+            return time.perf_counter() - started
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                latencies = sorted(pool.map(approve, ids))
+            elapsed = time.perf_counter() - started
+            approved = Payment.objects.filter(id__in=ids, status='approved').count()
+        finally:
+            requester.delete()
+
+        self.stdout.write(
+            f'{connection.vendor}: {approved}/{len(ids)} approved in {elapsed:.2f}s '
+            f'({len(ids) / elapsed:.0f} req/s), '
+            f'p50 {latencies[len(latencies) // 2] * 1000:.1f}ms, '
+            f'p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms, '
+            f'{errors["locked"]} "database is locked" errors, {errors["other"]} other errors'
+        )
@@ -0,0 +1,122 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Hold many concurrent connections against a running server and report
+    throughput and latency percentiles.
+
+    Used to compare deployments, e.g. run once against
+    ``gunicorn edi.wsgi`` and once against
+    ``gunicorn -k uvicorn.workers.UvicornWorker edi.asgi`` with
+    ``ASYNC_VIEWS=True``. Connections are reused when the server allows
+    keep-alive and reopened otherwise.
+    """
+    help = 'HTTP load test: req/s and p50/p99 latency for one URL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('url')
+        parser.add_argument('--connections', type=int, default=500)
+        parser.add_argument('--duration', type=float, default=10.0)
+        parser.add_argument('--token', help='Authorization token for the request')
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError('Only http:// URLs are supported')
+        latencies, errors = asyncio.run(self.run(url, options))
+        if not latencies:
+            raise CommandError(f'No successful requests ({errors} errors)')
+        latencies.sort()
+        count = len(latencies)
+        self.stdout.write(
+            f'{count} requests in {options["duration"]:.0f}s '
+            f'({count / options["duration"]:.0f} req/s) with {options["connections"]} connections, '
+            f'p50 {latencies[count // 2] * 1000:.1f}ms, '
+            f'p99 {latencies[max(0, int(count * 0.99) - 1)] * 1000:.1f}ms, '
+            f'{errors} errors'
+        )
+
+    async def run(self, url, options):
+        path = url.path or '/'
+        if url.query:
+            path = f'{path}?{url.query}'
+        headers = [f'GET {path} HTTP/1.1', f'Host: {url.netloc}', 'Connection: keep-alive']
+        if options['token']:
+            headers.append(f'Authorization: Token {options["token"]}')
+        request = ('\r\n'.join(headers) + '\r\n\r\n').encode()
+
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + options['duration']
+
+        async def connection_loop():
+            nonlocal errors
+            reader = writer = None
+            while time.perf_counter() < deadline:
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(
+                            url.hostname, url.port or 80)
+                    started = time.perf_counter()
+                    writer.write(request)
+                    status, keep_alive = await asyncio.wait_for(
+                        read_response(reader), options['timeout'])
+                    if status < 400:
+                        latencies.append(time.perf_counter() - started)
+                    else:
+                        errors += 1
+                    if not keep_alive:
+                        writer.close()
+                        writer = None
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    errors += 1
+                    if writer is not None:
+                        writer.close()
+                    writer = None
+            if writer is not None:
+                writer.close()
+
+        await asyncio.gather(*(connection_loop() for _ in range(options['connections'])))
+        return latencies, errors
+
+
+async def read_response(reader):
+    """
+    Read one HTTP/1.1 response; returns (status, keep_alive)
+    """
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    length = None
+    chunked = False
+    keep_alive = True
+    while True:
+        line = (await reader.readline()).strip()
+        if not line:
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value:
+            chunked = True
+        elif name == 'connection' and value == 'close':
+            keep_alive = False
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        keep_alive = False
+    return status, keep_alive
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from training.dashboard import rebuild_dashboards
+
+
+class Command(BaseCommand):
+    """
+    Recompute the trainer dashboard table from the source tables.
+
+    Signals keep the table current for row-by-row writes; run this after
+    raw SQL or other bulk writes that bypass them, and daily so the
+    upcoming session figures roll forward past sessions that have started.
+    """
+    help = 'Rebuild the precomputed trainer dashboards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_dashboards(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {count} trainer dashboards in {time.perf_counter() - started:.2f}s'))
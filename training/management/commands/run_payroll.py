@@ -0,0 +1,38 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from training.payroll import create_payroll_run
+
+
+class Command(BaseCommand):
+    """
+    Freeze a payroll run, by default for the previous calendar month.
+
+    Meant to be scheduled monthly in place of per-training payment
+    requests; the run can then be read and compared through the
+    ``/api/training/payroll/`` endpoints.
+    """
+    help = 'Create a payroll snapshot for a period'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='period_start', type=datetime.date.fromisoformat)
+        parser.add_argument('--to', dest='period_end', type=datetime.date.fromisoformat)
+
+    def handle(self, *args, **options):
+        period_end = options['period_end']
+        period_start = options['period_start']
+        if period_end is None:
+            period_end = datetime.date.today().replace(day=1) - datetime.timedelta(days=1)
+        if period_start is None:
+            period_start = period_end.replace(day=1)
+        if period_start > period_end:
+            raise CommandError('--from must not be after --to')
+
+        started = time.perf_counter()
+        run, skipped = create_payroll_run(period_start, period_end)
+        self.stdout.write(self.style.SUCCESS(
+            f'Payroll run {run.pk} for {period_start}..{period_end}: {run.line_count} lines, '
+            f'total {run.total_amount}, {skipped} skipped without a level, '
+            f'{time.perf_counter() - started:.2f}s'))
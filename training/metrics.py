@@ -0,0 +1,7 @@
+from monitoring.metrics import Counter
+
+applications_submitted = Counter('edi_training_applications_submitted_total',
+                                 'Training applications submitted')
+payments_requested = Counter('edi_payments_requested_total', 'Payments requested')
+payments_approved = Counter('edi_payments_approved_total', 'Payments approved')
+certificates_issued = Counter('edi_certificates_issued_total', 'Certificates issued')
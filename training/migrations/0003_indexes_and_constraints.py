@@ -0,0 +1,85 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:18
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicates(apps, schema_editor):
+    """
+    Refuse to add the unique constraints while duplicate rows exist, so they
+    can be reviewed by hand instead of silently deleted
+    """
+    Payment = apps.get_model('training', 'Payment')
+    TrainingApplication = apps.get_model('training', 'TrainingApplication')
+    duplicates = {
+        'payments (requested_by, reason)': Payment.objects.exclude(reason='')
+        .values('requested_by', 'reason').annotate(n=Count('id')).filter(n__gt=1).count(),
+        'applications (trainer, for_training)': TrainingApplication.objects
+        .values('trainer', 'for_training').annotate(n=Count('id')).filter(n__gt=1).count(),
+    }
+    found = ', '.join(f'{count} duplicated {name}' for name, count in duplicates.items() if count)
+    if found:
+        raise RuntimeError(f'Resolve {found} before applying this migration')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0002_paymentrate_trainerlevel'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['-given_date', '-id'], name='cert_given_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['certified', '-given_date'], name='cert_certified_given_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['-created_date', '-id'], name='payment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['requested_by', 'reason'], name='payment_requester_reason_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['requested_by', '-created_date'], name='payment_requester_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='training',
+            index=models.Index(fields=['-given_date', '-id'], name='training_given_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trainingapplication',
+            index=models.Index(fields=['-applied_date', '-id'], name='trainapp_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trainingapplication',
+            index=models.Index(fields=['status', '-applied_date'], name='trainapp_status_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trainingapplication',
+            index=models.Index(fields=['trainer', '-applied_date'], name='trainapp_trainer_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warrantymoney',
+            index=models.Index(fields=['-created_date', '-id'], name='warranty_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warrantymoney',
+            index=models.Index(fields=['expiry_date'], name='warranty_expiry_idx'),
+        ),
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(condition=models.Q(('reason', ''), _negated=True), fields=('requested_by', 'reason'), name='unique_payment_per_reason'),
+        ),
+        migrations.AddConstraint(
+            model_name='trainingapplication',
+            constraint=models.UniqueConstraint(fields=('trainer', 'for_training'), name='unique_application_per_trainer'),
+        ),
+    ]
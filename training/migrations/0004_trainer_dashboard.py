@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_role_index'),
+        ('training', '0003_indexes_and_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrainerDashboard',
+            fields=[
+                ('trainer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard', serialize=False, to='accounts.user')),
+                ('applications_pending', models.PositiveIntegerField(default=0)),
+                ('applications_approved', models.PositiveIntegerField(default=0)),
+                ('applications_rejected', models.PositiveIntegerField(default=0)),
+                ('applications_completed', models.PositiveIntegerField(default=0)),
+                ('payments_requested', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payments_approved', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('certificates_issued', models.PositiveIntegerField(default=0)),
+                ('upcoming_sessions', models.PositiveIntegerField(default=0)),
+                ('next_session_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
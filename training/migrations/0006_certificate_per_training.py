@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:41
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicates(apps, schema_editor):
+    """
+    Refuse to add the constraint while a person holds two certificates for
+    the same training, so they can be reviewed by hand
+    """
+    Certificate = apps.get_model('training', 'Certificate')
+    duplicates = (
+        Certificate.objects.values('given_for', 'certified')
+        .annotate(n=Count('id')).filter(n__gt=1).count()
+    )
+    if duplicates:
+        raise RuntimeError(
+            f'Resolve {duplicates} duplicated certificates (given_for, certified) '
+            'before applying this migration')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0005_payroll'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='certificate',
+            constraint=models.UniqueConstraint(fields=('given_for', 'certified'), name='unique_certificate_per_training'),
+        ),
+    ]
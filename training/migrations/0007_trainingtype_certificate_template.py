@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0006_certificate_per_training'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingtype',
+            name='certificate_template',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def rename_complete_status(apps, schema_editor):
+    """
+    Applications used to be completed with the status 'complete', which is
+    not one of the choices; the payment and payroll queries look for
+    'completed'
+    """
+    TrainingApplication = apps.get_model('training', 'TrainingApplication')
+    TrainingApplication.objects.filter(status='complete').update(status='completed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0007_trainingtype_certificate_template'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_complete_status, migrations.RunPython.noop),
+    ]
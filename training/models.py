@@ -6,6 +6,66 @@ import uuid
 User = get_user_model()
 
 
+class RelatedQuerySet(models.QuerySet):
+    """
+    QuerySet that knows which relations its serializers read.
+
+    Subclasses list the forward relations in ``select_related_fields`` and the
+    reverse/many relations in ``prefetch_related_fields``; ``with_related()``
+    applies both so list and detail views issue a constant number of queries.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    def with_related(self):
+        queryset = self
+        if self.select_related_fields:
+            queryset = queryset.select_related(*self.select_related_fields)
+        if self.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*self.prefetch_related_fields)
+        return queryset
+
+
+class TrainingQuerySet(RelatedQuerySet):
+    select_related_fields = ('given_by', 'training_type')
+
+
+class TrainingApplicationQuerySet(RelatedQuerySet):
+    select_related_fields = (
+        'trainer',
+        'for_training__given_by',
+        'for_training__training_type',
+    )
+
+
+class CertificateQuerySet(RelatedQuerySet):
+    select_related_fields = (
+        'certified',
+        'given_for__given_by',
+        'given_for__training_type',
+    )
+
+
+class PaymentQuerySet(RelatedQuerySet):
+    select_related_fields = ('requested_by', 'approved_by')
+
+
+class InnovationQuerySet(RelatedQuerySet):
+    select_related_fields = ('innovator',)
+
+
+class WarrantyMoneyQuerySet(RelatedQuerySet):
+    select_related_fields = ('allowed_for',)
+
+
+class PayrollRunQuerySet(RelatedQuerySet):
+    select_related_fields = ('created_by',)
+
+
+class PayrollLineQuerySet(RelatedQuerySet):
+    select_related_fields = ('trainer', 'training')
+
+
 class TrainingType(models.Model):
     """
     Training Type model defining different types of training
@@ -14,6 +74,8 @@ class TrainingType(models.Model):
     description = models.TextField(blank=True)
     designed_for = models.CharField(max_length=100, blank=True)
     requirement = models.TextField(blank=True)
+    # Django template of the certificate text, one line per PDF line
+    certificate_template = models.TextField(blank=True)
     
     def __str__(self):
         return self.training_type
@@ -29,6 +91,13 @@ class Training(models.Model):
     end_date = models.DateField()
     given_date = models.DateField()
     given_location = models.CharField(max_length=200)
+
+    objects = TrainingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-given_date', '-id'], name='training_given_idx'),
+        ]
     
     
     def __str__(self):
@@ -50,6 +119,19 @@ class TrainingApplication(models.Model):
     trainer = models.ForeignKey(User, on_delete=models.CASCADE, limit_choices_to={'role': 'trainer'})
     applied_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    objects = TrainingApplicationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-applied_date', '-id'], name='trainapp_applied_idx'),
+            models.Index(fields=['status', '-applied_date'], name='trainapp_status_applied_idx'),
+            models.Index(fields=['trainer', '-applied_date'], name='trainapp_trainer_applied_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['trainer', 'for_training'],
+                                    name='unique_application_per_trainer'),
+        ]
     
     def __str__(self):
         return f"Application for {self.for_training.training_type.training_type}"
@@ -64,6 +146,17 @@ class Certificate(models.Model):
     given_for = models.ForeignKey(Training, on_delete=models.CASCADE)
     given_date = models.DateField()
 
+    objects = CertificateQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-given_date', '-id'], name='cert_given_idx'),
+            models.Index(fields=['certified', '-given_date'], name='cert_certified_given_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['given_for', 'certified'],
+                                    name='unique_certificate_per_training'),
+        ]
     
     
     def __str__(self):
@@ -90,6 +183,22 @@ class Payment(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     created_date = models.DateTimeField(auto_now_add=True)
+
+    objects = PaymentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_date', '-id'], name='payment_created_idx'),
+            models.Index(fields=['requested_by', 'reason'], name='payment_requester_reason_idx'),
+            models.Index(fields=['requested_by', '-created_date'],
+                         name='payment_requester_created_idx'),
+        ]
+        constraints = [
+            # Manual payments may leave the reason blank
+            models.UniqueConstraint(fields=['requested_by', 'reason'],
+                                    condition=~models.Q(reason=''),
+                                    name='unique_payment_per_reason'),
+        ]
     
     def __str__(self):
         return f"Payment {self.receipt_id} - {self.status}"
@@ -120,6 +229,8 @@ class Innovation(models.Model):
     description = models.TextField()
     title = models.CharField(max_length=200)
     created_date = models.DateTimeField(auto_now_add=True)
+
+    objects = InnovationQuerySet.as_manager()
     
     def __str__(self):
         return f"Innovation: {self.title}"
@@ -142,7 +253,84 @@ class WarrantyMoney(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     created_date = models.DateTimeField(auto_now_add=True)
     expiry_date = models.DateField(null=True, blank=True)
+
+    objects = WarrantyMoneyQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_date', '-id'], name='warranty_created_idx'),
+            models.Index(fields=['expiry_date'], name='warranty_expiry_idx'),
+        ]
     
     def __str__(self):
         return f"Warranty {self.guarantee} - {self.amount}"
 
+
+class TrainerDashboard(models.Model):
+    """
+    Precomputed per-trainer dashboard figures, refreshed by jobs that
+    ``training.signals`` queue on writes and rebuilt with
+    ``rebuild_dashboards``
+    """
+    trainer = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True,
+                                   related_name='dashboard')
+    applications_pending = models.PositiveIntegerField(default=0)
+    applications_approved = models.PositiveIntegerField(default=0)
+    applications_rejected = models.PositiveIntegerField(default=0)
+    applications_completed = models.PositiveIntegerField(default=0)
+    payments_requested = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payments_approved = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    certificates_issued = models.PositiveIntegerField(default=0)
+    upcoming_sessions = models.PositiveIntegerField(default=0)
+    next_session_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dashboard for {self.trainer}"
+
+
+class PayrollRun(models.Model):
+    """
+    Frozen payroll for a period, its lines keep the rates in force when it ran
+    """
+    period_start = models.DateField()
+    period_end = models.DateField()
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='payroll_runs')
+    created_date = models.DateTimeField(auto_now_add=True)
+    line_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    objects = PayrollRunQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_date', '-id'], name='payroll_run_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Payroll {self.period_start} - {self.period_end}"
+
+
+class PayrollLine(models.Model):
+    """
+    One trainer's payout for one training within a payroll run
+    """
+    run = models.ForeignKey(PayrollRun, on_delete=models.CASCADE, related_name='lines')
+    trainer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payroll_lines')
+    training = models.ForeignKey(Training, on_delete=models.CASCADE, related_name='payroll_lines')
+    level = models.CharField(max_length=15)
+    days = models.PositiveIntegerField()
+    rate = models.DecimalField(max_digits=10, decimal_places=2)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+
+    objects = PayrollLineQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'trainer', 'training'],
+                                    name='unique_payroll_line'),
+        ]
+
+    def __str__(self):
+        return f"{self.trainer} - {self.training_id}: {self.amount}"
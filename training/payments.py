@@ -0,0 +1,115 @@
+from django.db import transaction
+
+from edi.conditional import table_versions
+from .dashboard import schedule_refresh
+from .metrics import payments_requested
+from .models import TrainingApplication, Payment
+from .rate_cache import rate_cache
+from .reports import report_cache
+
+
+def service_days(given_date, end_date):
+    """
+    Number of paid days for a training session, at least one
+    """
+    if end_date == given_date:
+        return 1
+    return (end_date - given_date).days
+
+
+def load_rate_table(trainer_ids):
+    """
+    Map each trainer id to its per-day rate from the in-memory rate cache
+    """
+    rates, levels = rate_cache.load()
+    return {
+        trainer_id: rates[levels[trainer_id]]
+        for trainer_id in trainer_ids
+        if levels.get(trainer_id) in rates
+    }
+
+
+@transaction.atomic
+def request_payments(applications, requested_by=None):
+    """
+    Create Payment rows for a batch of training applications.
+
+    ``applications`` is a TrainingApplication queryset. Amounts are computed
+    from a single joined query and an in-memory rate table, duplicates are
+    detected with one lookup, and the new payments are written with
+    ``bulk_create``, all inside one transaction. ``requested_by`` restricts the
+    batch to a single trainer. Returns one result dict per application.
+    """
+    if requested_by is not None:
+        applications = applications.filter(trainer=requested_by)
+    rows = list(
+        applications.order_by('id').values_list(
+            'id', 'trainer_id', 'for_training__training_id',
+            'for_training__given_date', 'for_training__end_date')
+    )
+    rates = load_rate_table({row[1] for row in rows})
+    existing = set(
+        Payment.objects.filter(
+            requested_by_id__in=rates.keys(),
+            reason__in={row[2] for row in rows})
+        .values_list('requested_by_id', 'reason')
+    )
+
+    results = []
+    pending = []
+    for app_id, trainer_id, training_id, given_date, end_date in rows:
+        if trainer_id not in rates:
+            results.append({'application': app_id, 'status': 'error',
+                            'error': 'Trainer has no payment level'})
+            continue
+        if (trainer_id, training_id) in existing:
+            results.append({'application': app_id, 'status': 'error',
+                            'error': 'Payment already requested for this training'})
+            continue
+        existing.add((trainer_id, training_id))
+        payment = Payment(
+            requested_by_id=trainer_id,
+            reason=training_id,
+            amount=rates[trainer_id] * service_days(given_date, end_date),
+        )
+        pending.append(payment)
+        results.append({'application': app_id, 'status': 'created', 'payment': payment})
+
+    Payment.objects.bulk_create(pending)
+    # bulk_create sends no post_save
+    schedule_refresh(*{payment.requested_by_id for payment in pending})
+    if pending:
+        report_cache.invalidate_on_commit()
+        table_versions.bump_on_commit(Payment)
+        payments_requested.inc(len(pending))
+
+    # Only some backends return primary keys from bulk inserts
+    if any(payment.pk is None for payment in pending):
+        ids = dict(
+            Payment.objects.filter(receipt_id__in=[p.receipt_id for p in pending])
+            .values_list('receipt_id', 'id')
+        )
+        for payment in pending:
+            payment.pk = payment.id = ids[str(payment.receipt_id)]
+
+    for result in results:
+        payment = result.pop('payment', None)
+        if payment is not None:
+            result.update({'payment': payment.id, 'receipt_id': str(payment.receipt_id),
+                           'amount': payment.amount})
+    return results
+
+
+def completed_applications(trainer=None, date_from=None, date_to=None):
+    """
+    Completed applications, optionally narrowed to a trainer and to trainings
+    that ended inside a period
+    """
+    queryset = TrainingApplication.objects.filter(status='completed')
+    if trainer is not None:
+        queryset = queryset.filter(trainer=trainer)
+    if date_from is not None:
+        queryset = queryset.filter(for_training__end_date__gte=date_from)
+    if date_to is not None:
+        queryset = queryset.filter(for_training__end_date__lte=date_to)
+    return queryset
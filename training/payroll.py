@@ -0,0 +1,87 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import PayrollRun, PayrollLine
+from .payments import service_days, completed_applications
+
+
+@transaction.atomic
+def create_payroll_run(period_start, period_end, created_by=None, batch_size=1000):
+    """
+    Freeze the payouts of trainings completed between ``period_start`` and
+    ``period_end`` into a new PayrollRun.
+
+    Every completed application in the period is read together with its
+    trainer's level and rate in one joined query, and the lines are written
+    with ``bulk_create``. Applications whose trainer has no level are left
+    out and counted in the returned ``skipped`` number.
+    """
+    rows = (
+        completed_applications(date_from=period_start, date_to=period_end)
+        .order_by('trainer_id', 'for_training_id')
+        .values_list(
+            'trainer_id', 'for_training_id', 'for_training__given_date', 'for_training__end_date',
+            F('trainer__trainerlevel__trainer_level_id'),
+            F('trainer__trainerlevel__trainer_level__per_day'))
+    )
+    run = PayrollRun.objects.create(period_start=period_start, period_end=period_end,
+                                    created_by=created_by)
+    lines = []
+    skipped = 0
+    for trainer_id, training_id, given_date, end_date, level, rate in rows:
+        if level is None:
+            skipped += 1
+            continue
+        days = service_days(given_date, end_date)
+        lines.append(PayrollLine(run=run, trainer_id=trainer_id, training_id=training_id,
+                                 level=level, days=days, rate=rate, amount=rate * days))
+    PayrollLine.objects.bulk_create(lines, batch_size=batch_size)
+
+    run.line_count = len(lines)
+    run.total_amount = sum((line.amount for line in lines), Decimal('0'))
+    run.save(update_fields=['line_count', 'total_amount'])
+    return run, skipped
+
+
+def diff_payroll_runs(base, other):
+    """
+    Compare two runs line by line, keyed on (trainer, training).
+
+    Returns the lines only in ``other`` (added), only in ``base`` (removed)
+    and in both with a different level, days, rate or amount (changed).
+    """
+    fields = ('trainer_id', 'training_id', 'level', 'days', 'rate', 'amount')
+
+    def load(run):
+        return {
+            (line['trainer_id'], line['training_id']): line
+            for line in PayrollLine.objects.filter(run=run).values(*fields)
+        }
+
+    before, after = load(base), load(other)
+    changed = []
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        if any(old[field] != new[field] for field in fields[2:]):
+            changed.append({
+                'trainer': key[0], 'training': key[1],
+                'before': {field: old[field] for field in fields[2:]},
+                'after': {field: new[field] for field in fields[2:]},
+                'difference': new['amount'] - old['amount'],
+            })
+
+    def listed(lines, keys):
+        return [{'trainer': key[0], 'training': key[1],
+                 **{field: lines[key][field] for field in fields[2:]}}
+                for key in sorted(keys)]
+
+    return {
+        'base': base.pk,
+        'other': other.pk,
+        'added': listed(after, after.keys() - before.keys()),
+        'removed': listed(before, before.keys() - after.keys()),
+        'changed': changed,
+        'total_difference': other.total_amount - base.total_amount,
+    }
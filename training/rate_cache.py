@@ -0,0 +1,121 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from edi.conditional import bump_versions, get_versions
+from .models import PaymentRate, TrainerLevel
+
+
+class RateCache:
+    """
+    Versioned cache of the PaymentRate and TrainerLevel tables.
+
+    Both tables are loaded together into process memory and served from
+    there until the version changes. Saving or deleting either model bumps
+    the version now and again when the transaction commits (see
+    ``training.signals``), so tables another worker loaded while the write
+    was still uncommitted are never served under the final version. When
+    ``RATE_CACHE_BACKEND`` names an entry in ``CACHES`` the version and the
+    loaded tables are shared through that backend, so one process's write
+    invalidates every worker and a fresh worker loads the tables from the
+    cache rather than the database; shared tables expire after
+    ``RATE_CACHE_TIMEOUT`` seconds. The shared version comes from the clock
+    (see ``edi.conditional.get_versions``), so an evicted version never
+    brings back tables stored under an old one. Set it empty to keep the cache local to
+    the process, which is only correct with a single worker.
+    """
+    version_key = 'training:rates:version'
+    data_key = 'training:rates:{version}'
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.local_version = 0
+        self.snapshot = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        alias = self.backend or getattr(settings, 'RATE_CACHE_BACKEND', None)
+        return caches[alias] if alias else None
+
+    def current_version(self):
+        shared = self.shared
+        if shared is None:
+            return self.local_version
+        return get_versions(shared, [self.version_key])[0]
+
+    def load(self):
+        """
+        Return ``(rates, levels)``: level -> per-day rate, trainer id -> level
+        """
+        version = self.current_version()
+        with self.lock:
+            snapshot = self.snapshot
+            if snapshot is not None and snapshot[0] == version:
+                self.hits += 1
+                return snapshot[1]
+            self.misses += 1
+
+        shared = self.shared
+        data = shared.get(self.data_key.format(version=version)) if shared else None
+        if data is None:
+            data = (
+                dict(PaymentRate.objects.values_list('level', 'per_day')),
+                dict(TrainerLevel.objects.values_list('trainer_id', 'trainer_level_id')),
+            )
+            if shared is not None:
+                shared.set(self.data_key.format(version=version), data,
+                           getattr(settings, 'RATE_CACHE_TIMEOUT', 3600))
+        with self.lock:
+            self.snapshot = (version, data)
+        return data
+
+    def rates(self):
+        return self.load()[0]
+
+    def trainer_levels(self):
+        return self.load()[1]
+
+    def level_for(self, trainer_id):
+        return self.trainer_levels().get(trainer_id)
+
+    def rate_for(self, trainer_id):
+        """
+        Per-day rate of a trainer, or None if they have no level
+        """
+        rates, levels = self.load()
+        return rates.get(levels.get(trainer_id))
+
+    def invalidate(self):
+        with self.lock:
+            self.local_version += 1
+            self.snapshot = None
+        shared = self.shared
+        if shared is not None:
+            bump_versions(shared, [self.version_key])
+
+    def invalidate_on_commit(self):
+        self.invalidate()
+        transaction.on_commit(self.invalidate)
+
+    def stats(self):
+        version = self.current_version()
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'version': version,
+            }
+
+    def reset_stats(self):
+        with self.lock:
+            self.hits = self.misses = 0
+
+
+rate_cache = RateCache()
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, DateField, Sum, F
+from django.db.models.functions import TruncMonth, TruncQuarter
+
+from edi.conditional import bump_versions, get_versions
+
+from .models import Training, Certificate, Payment, WarrantyMoney
+
+PAYOUT_STATES = ('approved', 'completed')
+
+
+def payouts_report(params):
+    """
+    Payout totals per trainer level per month
+    """
+    payments = Payment.objects.filter(status__in=params.get('status') or PAYOUT_STATES)
+    if 'date_from' in params:
+        payments = payments.filter(created_date__date__gte=params['date_from'])
+    if 'date_to' in params:
+        payments = payments.filter(created_date__date__lte=params['date_to'])
+    if 'level' in params:
+        payments = payments.filter(requested_by__trainerlevel__trainer_level=params['level'])
+    return list(
+        payments
+        .annotate(month=TruncMonth('created_date', output_field=DateField()),
+                  level=F('requested_by__trainerlevel__trainer_level'))
+        .values('month', 'level')
+        .annotate(payments=Count('id'), total=Sum('amount'))
+        .order_by('month', 'level')
+    )
+
+
+def trainings_report(params):
+    """
+    Training sessions per training type per location
+    """
+    trainings = Training.objects.all()
+    if 'date_from' in params:
+        trainings = trainings.filter(given_date__gte=params['date_from'])
+    if 'date_to' in params:
+        trainings = trainings.filter(given_date__lte=params['date_to'])
+    if 'training_type' in params:
+        trainings = trainings.filter(training_type=params['training_type'])
+    if 'location' in params:
+        trainings = trainings.filter(given_location__icontains=params['location'])
+    return list(
+        trainings
+        .values(training_type_name=F('training_type__training_type'), location=F('given_location'))
+        .annotate(sessions=Count('id'))
+        .order_by('training_type_name', 'location')
+    )
+
+
+def certificates_report(params):
+    """
+    Certificates issued per quarter and training type
+    """
+    certificates = Certificate.objects.all()
+    if 'date_from' in params:
+        certificates = certificates.filter(given_date__gte=params['date_from'])
+    if 'date_to' in params:
+        certificates = certificates.filter(given_date__lte=params['date_to'])
+    if 'training_type' in params:
+        certificates = certificates.filter(given_for__training_type=params['training_type'])
+    return list(
+        certificates
+        .annotate(quarter=TruncQuarter('given_date'))
+        .values('quarter', training_type_name=F('given_for__training_type__training_type'))
+        .annotate(certificates=Count('id'))
+        .order_by('quarter', 'training_type_name')
+    )
+
+
+def warranties_report(params):
+    """
+    Warranty money totals per status per month
+    """
+    warranties = WarrantyMoney.objects.all()
+    if params.get('status'):
+        warranties = warranties.filter(status__in=params['status'])
+    if 'date_from' in params:
+        warranties = warranties.filter(created_date__date__gte=params['date_from'])
+    if 'date_to' in params:
+        warranties = warranties.filter(created_date__date__lte=params['date_to'])
+    return list(
+        warranties
+        .annotate(month=TruncMonth('created_date', output_field=DateField()))
+        .values('month', 'status')
+        .annotate(warranties=Count('id'), total=Sum('amount'))
+        .order_by('month', 'status')
+    )
+
+
+REPORTS = {
+    'payouts': payouts_report,
+    'trainings': trainings_report,
+    'certificates': certificates_report,
+    'warranties': warranties_report,
+}
+
+
+class ReportCache:
+    """
+    Versioned cache of report results.
+
+    Results are stored under a key built from the report name, its filter
+    parameters and a shared version (see ``edi.conditional.get_versions``).
+    Any write to the reported
+    models bumps the version (see ``training.signals``), which orphans every
+    cached result at once; orphans expire after ``REPORT_CACHE_TIMEOUT``.
+    ``REPORT_CACHE_BACKEND`` names the ``CACHES`` alias to use.
+    """
+    version_key = 'training:reports:version'
+    data_key = 'training:reports:{version}:{name}:{digest}'
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.backend or getattr(settings, 'REPORT_CACHE_BACKEND', 'default')]
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'REPORT_CACHE_TIMEOUT', 3600)
+
+    def current_version(self):
+        return get_versions(self.cache, [self.version_key])[0]
+
+    def key(self, name, params):
+        digest = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        return self.data_key.format(version=self.current_version(), name=name, digest=digest)
+
+    def get_or_run(self, name, params):
+        """
+        Rows of report ``name`` for ``params``, computed on a cache miss
+        """
+        key = self.key(name, params)
+        rows = self.cache.get(key)
+        with self.lock:
+            if rows is not None:
+                self.hits += 1
+                return rows
+            self.misses += 1
+        rows = REPORTS[name](params)
+        self.cache.set(key, rows, timeout=self.timeout)
+        return rows
+
+    def invalidate(self):
+        bump_versions(self.cache, [self.version_key])
+
+    def invalidate_on_commit(self):
+        transaction.on_commit(self.invalidate)
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+            }
+
+
+report_cache = ReportCache()
@@ -1,12 +1,15 @@
 from rest_framework import serializers
+from edi.sparse import DynamicFieldsMixin
 from .models import (
     TrainingType, Training, TrainingApplication, 
-    Certificate, Payment, Innovation, WarrantyMoney,PaymentRate, TrainerLevel
+    Certificate, Payment, Innovation, WarrantyMoney,PaymentRate, TrainerLevel,
+    TrainerDashboard, PayrollRun, PayrollLine
 )
 from accounts.serializers import UserSerializer, InnovatorSerializer
+from .certificates import CERTIFICATE_PLACEHOLDERS, unknown_placeholders
 
 
-class TrainingTypeSerializer(serializers.ModelSerializer):
+class TrainingTypeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Training Type serializer
     """
@@ -14,8 +17,16 @@ class TrainingTypeSerializer(serializers.ModelSerializer):
         model = TrainingType
         fields = '__all__'
 
+    def validate_certificate_template(self, value):
+        unknown = unknown_placeholders(value)
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown placeholders {', '.join(unknown)}; use "
+                f"{', '.join(CERTIFICATE_PLACEHOLDERS)}")
+        return value
+
 
-class TrainingSerializer(serializers.ModelSerializer):
+class TrainingSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Training serializer
     """
@@ -34,7 +45,7 @@ class TrainingSerializer(serializers.ModelSerializer):
         return value
 
 
-class TrainingApplicationSerializer(serializers.ModelSerializer):
+class TrainingApplicationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Training Application serializer
     """
@@ -47,9 +58,12 @@ class TrainingApplicationSerializer(serializers.ModelSerializer):
                  'trainer_name', 'applied_date', 'status')
         read_only_fields = ('applied_date',)
         lookup_field='for_training'
+        expandable_fields = ('training_details',)
+        # Duplicates are rejected by the unique_application_per_trainer constraint
+        validators = []
 
 
-class CertificateSerializer(serializers.ModelSerializer):
+class CertificateSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Certificate serializer
     """
@@ -60,14 +74,14 @@ class CertificateSerializer(serializers.ModelSerializer):
         model = Certificate
         fields = ('id', 'certificate_id', 'certified', 'certified_name', 
                  'given_for', 'training_details', 'given_date')
-    
-    def validate_certificate_id(self, value):
-        if Certificate.objects.filter(certificate_id=value).exists():
-            raise serializers.ValidationError("Certificate ID already exists")
-        return value
+        expandable_fields = ('training_details',)
+        # Duplicates are rejected by the certificate_id unique index and the
+        # unique_certificate_per_training constraint
+        validators = []
+        extra_kwargs = {'certificate_id': {'validators': []}}
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Payment serializer
     """
@@ -80,6 +94,8 @@ class PaymentSerializer(serializers.ModelSerializer):
                  'requested_by', 'requested_by_name', 'reason', 'status', 
                  'amount', 'created_date')
         read_only_fields = ('created_date','receipt_id')
+        # Duplicates are rejected by the unique_payment_per_reason constraint
+        validators = []
 
     
     def validate_receipt_id(self, value):
@@ -97,7 +113,7 @@ class TrainerLevelSerializer(serializers.ModelSerializer):
         model= TrainerLevel
         fields= ('trainer','trainer_level')
 
-class InnovationSerializer(serializers.ModelSerializer):
+class InnovationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Innovation serializer
     """
@@ -108,9 +124,10 @@ class InnovationSerializer(serializers.ModelSerializer):
         fields = ('id', 'innovator', 'innovator_details', 'description', 
                  'title', 'created_date')
         read_only_fields = ('created_date',)
+        expandable_fields = ('innovator_details',)
 
 
-class WarrantyMoneySerializer(serializers.ModelSerializer):
+class WarrantyMoneySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Warranty Money serializer
     """
@@ -122,3 +139,91 @@ class WarrantyMoneySerializer(serializers.ModelSerializer):
                  'amount', 'status', 'created_date', 'expiry_date')
         read_only_fields = ('created_date',)
 
+
+
+class PaymentBatchRequestSerializer(serializers.Serializer):
+    """
+    Payment batch request serializer
+
+    Either a list of application ids, or a trainer with an optional period
+    selecting all of their completed applications.
+    """
+    applications = serializers.ListField(child=serializers.IntegerField(), required=False,
+                                         allow_empty=False, max_length=5000)
+    trainer = serializers.IntegerField(required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if 'applications' in attrs and 'trainer' in attrs:
+            raise serializers.ValidationError("Give either applications or trainer, not both")
+        if 'applications' not in attrs and 'trainer' not in attrs:
+            raise serializers.ValidationError("Must include applications or trainer")
+        return attrs
+
+
+class TrainerDashboardSerializer(serializers.ModelSerializer):
+    """
+    Trainer dashboard serializer
+    """
+    class Meta:
+        model = TrainerDashboard
+        fields = ('trainer', 'applications_pending', 'applications_approved',
+                  'applications_rejected', 'applications_completed',
+                  'payments_requested', 'payments_approved', 'certificates_issued',
+                  'upcoming_sessions', 'next_session_date', 'updated_at')
+
+
+class ReportFilterSerializer(serializers.Serializer):
+    """
+    Report filter parameters, each report uses the ones that apply to it
+    """
+    STATUS_CHOICES = sorted(
+        dict(Payment.STATUS_CHOICES + WarrantyMoney.STATUS_CHOICES).items())
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    training_type = serializers.IntegerField(required=False)
+    location = serializers.CharField(required=False, max_length=200)
+    level = serializers.CharField(required=False, max_length=15)
+    status = serializers.ListField(child=serializers.ChoiceField(choices=STATUS_CHOICES),
+                                   required=False)
+
+
+class PayrollRunSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Payroll run serializer
+    """
+    created_by_name = serializers.CharField(source='created_by.full_name', read_only=True,
+                                            default=None)
+
+    class Meta:
+        model = PayrollRun
+        fields = ('id', 'period_start', 'period_end', 'created_by', 'created_by_name',
+                  'created_date', 'line_count', 'total_amount')
+        read_only_fields = ('created_by', 'created_date', 'line_count', 'total_amount')
+
+    def validate(self, attrs):
+        if attrs['period_start'] > attrs['period_end']:
+            raise serializers.ValidationError("period_start must not be after period_end")
+        return attrs
+
+
+class PayrollLineSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Payroll line serializer
+    """
+    trainer_name = serializers.CharField(source='trainer.full_name', read_only=True)
+    training_code = serializers.CharField(source='training.training_id', read_only=True)
+
+    class Meta:
+        model = PayrollLine
+        fields = ('id', 'run', 'trainer', 'trainer_name', 'training', 'training_code',
+                  'level', 'days', 'rate', 'amount')
+
+
+class CertificateIssueSerializer(serializers.Serializer):
+    """
+    Bulk certificate issue serializer, the date defaults to the training's end
+    """
+    given_date = serializers.DateField(required=False)
@@ -0,0 +1,71 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from edi.conditional import table_versions
+from .dashboard import schedule_refresh
+from .metrics import applications_submitted, certificates_issued, payments_requested
+from .models import (
+    TrainingType, PaymentRate, TrainerLevel, Training, TrainingApplication, Certificate, Payment, WarrantyMoney
+)
+from .rate_cache import rate_cache
+from .reports import report_cache
+
+
+@receiver([post_save, post_delete], sender=PaymentRate)
+@receiver([post_save, post_delete], sender=TrainerLevel)
+def invalidate_rate_cache(sender, **kwargs):
+    rate_cache.invalidate_on_commit()
+
+
+@receiver([post_save, post_delete], sender=TrainingType)
+@receiver([post_save, post_delete], sender=PaymentRate)
+@receiver([post_save, post_delete], sender=Training)
+@receiver([post_save, post_delete], sender=Certificate)
+@receiver([post_save, post_delete], sender=Payment)
+def bump_table_version(sender, **kwargs):
+    table_versions.bump_on_commit(sender)
+
+
+@receiver([post_save, post_delete], sender=Training)
+def refresh_training_dashboard(sender, instance, **kwargs):
+    schedule_refresh(instance.given_by_id)
+
+
+@receiver([post_save, post_delete], sender=TrainingApplication)
+def refresh_application_dashboard(sender, instance, **kwargs):
+    schedule_refresh(instance.trainer_id)
+
+
+@receiver([post_save, post_delete], sender=Payment)
+def refresh_payment_dashboard(sender, instance, **kwargs):
+    schedule_refresh(instance.requested_by_id)
+
+
+@receiver([post_save, post_delete], sender=Certificate)
+def refresh_certificate_dashboard(sender, instance, **kwargs):
+    # The training may already be gone when certificates are deleted with it,
+    # its own post_delete then refreshes the trainer
+    schedule_refresh(*Training.objects.filter(pk=instance.given_for_id)
+                     .values_list('given_by_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Training)
+@receiver([post_save, post_delete], sender=Certificate)
+@receiver([post_save, post_delete], sender=Payment)
+@receiver([post_save, post_delete], sender=WarrantyMoney)
+@receiver([post_save, post_delete], sender=TrainerLevel)
+def invalidate_report_cache(sender, **kwargs):
+    report_cache.invalidate_on_commit()
+
+
+@receiver(post_save, sender=TrainingApplication)
+@receiver(post_save, sender=Certificate)
+@receiver(post_save, sender=Payment)
+def count_created(sender, created, **kwargs):
+    if created:
+        counters = {
+            TrainingApplication: applications_submitted,
+            Certificate: certificates_issued,
+            Payment: payments_requested,
+        }
+        counters[sender].inc()
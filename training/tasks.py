@@ -0,0 +1,35 @@
+import datetime
+
+from jobs.queue import task
+from accounts.models import User
+from .certificates import render_certificates
+from .dashboard import rebuild_dashboards, refresh_dashboards
+from .models import Certificate
+from .payroll import create_payroll_run
+
+
+@task('training.payroll_run')
+def payroll_run(job, period_start, period_end, created_by=None):
+    run, skipped = create_payroll_run(
+        datetime.date.fromisoformat(period_start),
+        datetime.date.fromisoformat(period_end),
+        created_by=User.objects.filter(pk=created_by).first() if created_by else None,
+    )
+    return {'run': run.pk, 'line_count': run.line_count,
+            'total_amount': str(run.total_amount), 'skipped': skipped}
+
+
+@task('training.refresh_dashboards')
+def refresh_dashboards_job(job, trainers):
+    return {'dashboards': len(refresh_dashboards(trainers))}
+
+
+@task('training.rebuild_dashboards')
+def rebuild_dashboards_job(job):
+    return {'dashboards': rebuild_dashboards()}
+
+
+@task('training.render_certificates')
+def render_certificates_job(job, training):
+    certificates = Certificate.objects.with_related().filter(given_for=training).iterator()
+    return {'rendered': render_certificates(certificates, progress=job.set_progress)}
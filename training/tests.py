@@ -1,3 +1,984 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import shutil
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from jobs.models import Job
+from jobs.queue import run_pending
+from .models import (
+    TrainingType, Training, TrainingApplication,
+    Certificate, Payment, WarrantyMoney, PaymentRate, TrainerLevel, TrainerDashboard,
+    PayrollRun
+)
+from .certificates import write_certificate_pdf
+from .payroll import create_payroll_run
+from .rate_cache import rate_cache, RateCache
+from .reports import report_cache
+from edi.response_cache import response_cache
+
+
+class TrainingTestMixin:
+    """
+    Shared fixtures for the training API tests
+    """
+    def setUp(self):
+        rate_cache.invalidate()
+        report_cache.invalidate()
+        self.staff = User.objects.create_user(
+            username='staff', password='password123', role='staff', sex='male')
+        self.training_type = TrainingType.objects.create(training_type='Leadership')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def make_trainer(self, n):
+        return User.objects.create_user(
+            username=f'trainer{n}', password='password123', role='trainer',
+            first_name='Trainer', last_name=str(n), sex='female')
+
+    def make_training(self, n, trainer, given_date=None, days=2):
+        given_date = given_date or datetime.date(2025, 1, 1)
+        return Training.objects.create(
+            training_id=f'TR-{n}', given_by=trainer, training_type=self.training_type,
+            given_date=given_date, end_date=given_date + datetime.timedelta(days=days),
+            given_location='Addis Ababa')
+
+
+class ConstantQueryCountTests(TrainingTestMixin, TestCase):
+    """
+    List endpoints must not issue one query per row
+    """
+    def seed(self, start, count):
+        for n in range(start, start + count):
+            trainer = self.make_trainer(n)
+            training = self.make_training(n, trainer)
+            TrainingApplication.objects.create(for_training=training, trainer=trainer)
+            Certificate.objects.create(certified=trainer, given_for=training,
+                                       given_date=training.end_date)
+            Payment.objects.create(requested_by=trainer, approved_by=self.staff,
+                                   reason=training.training_id, amount=100)
+            WarrantyMoney.objects.create(guarantee=f'G-{n}', allowed_for=trainer, amount=50)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, url_name):
+        url = reverse(url_name)
+        self.seed(0, 1)
+        single = self.count_queries(url)
+        self.seed(1, 10)
+        self.assertEqual(self.count_queries(url), single)
+
+    def test_application_list(self):
+        self.assertConstantQueries('application_list_create')
+
+    def test_certificate_list(self):
+        self.assertConstantQueries('certificate_list_create')
+
+    def test_payment_list(self):
+        self.assertConstantQueries('payment_list_create')
+
+    def test_warranty_list(self):
+        self.assertConstantQueries('warranty_list_create')
+
+    def test_training_list(self):
+        self.assertConstantQueries('training_list_create')
+
+    def test_application_detail_single_query(self):
+        self.seed(0, 1)
+        application = TrainingApplication.objects.get()
+        url = reverse('application_detail', args=[application.pk])
+        self.assertEqual(self.count_queries(url), 1)
+
+
+class CursorPaginationTests(TrainingTestMixin, TestCase):
+    """
+    List endpoints page by cursor and keep an unpaginated mode
+    """
+    def setUp(self):
+        super().setUp()
+        trainer = self.make_trainer(0)
+        Payment.objects.bulk_create([
+            Payment(requested_by=trainer, reason=f'TR-{n}', amount=n) for n in range(7)
+        ])
+        self.url = reverse('payment_list_create')
+
+    def test_walks_every_row_once(self):
+        seen = self.walk(f'{self.url}?page_size=3')
+        self.assertEqual(seen, list(Payment.objects.order_by('-created_date', '-id')
+                                    .values_list('id', flat=True)))
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(f'{self.url}?page_size=100000')
+        self.assertEqual(len(response.data['results']), 7)
+
+    def walk(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return seen
+
+    def test_duplicate_sort_values_are_walked_by_key(self):
+        # More rows sharing one amount than DRF's offset cursor can skip
+        trainer = User.objects.get(username='trainer0')
+        Payment.objects.bulk_create([
+            Payment(requested_by=trainer, reason=f'DUP-{n}', amount=5) for n in range(1100)
+        ])
+        seen = self.walk(f'{self.url}?ordering=amount&page_size=400')
+        self.assertEqual(seen, list(Payment.objects.order_by('amount', 'id')
+                                    .values_list('id', flat=True)))
+
+    def test_previous_link_returns_the_same_rows(self):
+        first = self.client.get(f'{self.url}?ordering=status&page_size=3').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual([item['id'] for item in back['results']],
+                         [item['id'] for item in first['results']])
+        self.assertIsNone(back['previous'])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(f'{self.url}?cursor=bm9wZQ==')
+        self.assertEqual(response.status_code, 404)
+
+    def test_all_mode_is_limited_to_reference_tables(self):
+        response = self.client.get(f'{self.url}?all=true')
+        self.assertEqual(len(response.data['results']), 7)
+        response = self.client.get(f'{reverse("training_type_list_create")}?all=true')
+        self.assertIsInstance(response.data, list)
+
+
+class PaymentBatchRequestTests(TrainingTestMixin, TestCase):
+    """
+    Batch payment requests compute amounts in bulk and skip duplicates
+    """
+    def setUp(self):
+        super().setUp()
+        rate = PaymentRate.objects.create(level='senior', per_day=100)
+        self.trainer = self.make_trainer(0)
+        TrainerLevel.objects.create(trainer=self.trainer, trainer_level=rate)
+        self.applications = [
+            TrainingApplication.objects.create(
+                for_training=self.make_training(n, self.trainer, days=n),
+                trainer=self.trainer, status='completed')
+            for n in range(3)
+        ]
+        self.url = reverse('request_payment_batch')
+
+    def test_creates_payments_with_computed_amounts(self):
+        ids = [app.pk for app in self.applications]
+        response = self.client.post(self.url, {'applications': ids}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([r['status'] for r in response.data['results']], ['created'] * 3)
+        amounts = Payment.objects.order_by('reason').values_list('reason', 'amount')
+        self.assertEqual([(r, int(a)) for r, a in amounts],
+                         [('TR-0', 100), ('TR-1', 100), ('TR-2', 200)])
+
+    def test_duplicates_and_missing_ids_are_reported(self):
+        Payment.objects.create(requested_by=self.trainer, reason='TR-0')
+        ids = [app.pk for app in self.applications] + [9999]
+        response = self.client.post(self.url, {'applications': ids}, format='json')
+        statuses = {r['application']: r['status'] for r in response.data['results']}
+        self.assertEqual(statuses[self.applications[0].pk], 'error')
+        self.assertEqual(statuses[9999], 'error')
+        self.assertEqual(Payment.objects.count(), 3)
+
+    def test_uncompleted_applications_are_skipped(self):
+        pending = self.applications[0]
+        pending.status = 'approved'
+        pending.save()
+        ids = [app.pk for app in self.applications]
+        response = self.client.post(self.url, {'applications': ids}, format='json')
+        results = {r['application']: r for r in response.data['results']}
+        self.assertEqual(results[pending.pk]['status'], 'error')
+        self.assertEqual(results[pending.pk]['error'], 'Application is not completed')
+        self.assertEqual(Payment.objects.count(), 2)
+        self.assertFalse(Payment.objects.filter(reason='TR-0').exists())
+
+    def test_trainer_period_mode(self):
+        response = self.client.post(self.url, {
+            'trainer': self.trainer.pk, 'date_from': '2025-01-02'}, format='json')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_trainer_cannot_request_for_others(self):
+        other = self.make_trainer(1)
+        self.client.force_authenticate(other)
+        ids = [app.pk for app in self.applications]
+        self.client.post(self.url, {'applications': ids}, format='json')
+        self.assertFalse(Payment.objects.exists())
+
+
+class RateCacheTests(TrainingTestMixin, TestCase):
+    """
+    Rates are served from memory until PaymentRate or TrainerLevel changes
+    """
+    def setUp(self):
+        super().setUp()
+        self.rate = PaymentRate.objects.create(level='junior', per_day=80)
+        self.trainer = self.make_trainer(0)
+        TrainerLevel.objects.create(trainer=self.trainer, trainer_level=self.rate)
+        rate_cache.reset_stats()
+
+    def test_lookups_hit_memory_after_first_load(self):
+        self.assertEqual(rate_cache.rate_for(self.trainer.pk), 80)
+        with self.assertNumQueries(0):
+            self.assertEqual(rate_cache.rate_for(self.trainer.pk), 80)
+            self.assertIsNone(rate_cache.rate_for(self.staff.pk))
+        stats = rate_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+
+    def test_save_and_delete_invalidate(self):
+        rate_cache.load()
+        self.rate.per_day = 90
+        self.rate.save()
+        self.assertEqual(rate_cache.rate_for(self.trainer.pk), 90)
+        TrainerLevel.objects.get().delete()
+        self.assertIsNone(rate_cache.rate_for(self.trainer.pk))
+
+    def test_shared_backend_propagates_invalidation(self):
+        worker_a, worker_b = RateCache('default'), RateCache('default')
+        worker_a.invalidate()
+        self.assertEqual(worker_a.rate_for(self.trainer.pk), 80)
+        with self.assertNumQueries(0):
+            self.assertEqual(worker_b.rate_for(self.trainer.pk), 80)
+        PaymentRate.objects.filter(pk='junior').update(per_day=70)
+        worker_b.invalidate()
+        self.assertEqual(worker_a.rate_for(self.trainer.pk), 70)
+
+    def test_rows_loaded_before_commit_are_dropped(self):
+        worker_b = RateCache('default')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rate.per_day = 90
+            self.rate.save()
+            # Another worker may load the old committed rows meanwhile
+            worker_b.load()
+            uncommitted = worker_b.current_version()
+        self.assertNotEqual(worker_b.current_version(), uncommitted)
+        self.assertEqual(worker_b.rate_for(self.trainer.pk), 90)
+
+    def test_evicted_version_does_not_revive_old_tables(self):
+        # The version key alone is evicted, twice; the tables stored under
+        # the versions it had are still in the cache
+        caches['default'].delete(RateCache.version_key)
+        self.assertEqual(RateCache('default').rate_for(self.trainer.pk), 80)
+        self.rate.per_day = 90
+        self.rate.save()
+        self.assertEqual(RateCache('default').rate_for(self.trainer.pk), 90)
+        caches['default'].delete(RateCache.version_key)
+        self.assertEqual(RateCache('default').rate_for(self.trainer.pk), 90)
+
+    def test_reference_views_do_not_query_rates(self):
+        rate_cache.load()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('payment_rate_list_create'))
+        self.assertEqual(response.data, [{'level': 'junior', 'per_day': '80.00'}])
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('payment_trainer'))
+        self.assertEqual(response.data, [{'trainer': self.trainer.pk, 'trainer_level': 'junior'}])
+
+
+
+class ConditionalGetTests(TrainingTestMixin, TestCase):
+    """
+    Reference lists answer a matching If-None-Match with 304 without querying
+    """
+    def test_not_modified_until_table_changes(self):
+        url = reverse('training_type_list_create')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['ETag']), (304, etag))
+        self.assertEqual(self.client.get(url + '?fields=id', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+                         .status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {'training_type': 'Finance'}, format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_payment_rates(self):
+        url = reverse('payment_rate_list_create')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            PaymentRate.objects.create(level='senior', per_day=120)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+def query_plan(queryset):
+    """
+    EXPLAIN output for a queryset, steering PostgreSQL away from sequential
+    scans that it would prefer on tiny test tables
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return queryset.explain()
+
+
+class IndexUsageTests(TrainingTestMixin, TestCase):
+    """
+    The planner uses the composite indexes for the hot list/filter queries
+    """
+    def setUp(self):
+        super().setUp()
+        self.trainer = self.make_trainer(0)
+
+    def assertUsesIndex(self, queryset, *names):
+        plan = query_plan(queryset)
+        self.assertTrue(any(name in plan for name in names), plan)
+
+    def test_payment_duplicate_check(self):
+        self.assertUsesIndex(
+            Payment.objects.filter(requested_by=self.trainer, reason='TR-1'),
+            'payment_requester_reason_idx', 'unique_payment_per_reason')
+
+    def test_payment_list_order(self):
+        self.assertUsesIndex(Payment.objects.order_by('-created_date', '-id')[:50],
+                             'payment_created_idx')
+
+    def test_application_status_filter(self):
+        self.assertUsesIndex(
+            TrainingApplication.objects.filter(status='pending').order_by('-applied_date'),
+            'trainapp_status_applied_idx')
+
+    def test_application_trainer_filter(self):
+        self.assertUsesIndex(
+            TrainingApplication.objects.filter(trainer=self.trainer).order_by('-applied_date'),
+            'trainapp_trainer_applied_idx', 'unique_application_per_trainer')
+
+    def test_certificate_holder_filter(self):
+        self.assertUsesIndex(
+            Certificate.objects.filter(certified=self.trainer).order_by('-given_date'),
+            'cert_certified_given_idx')
+
+    def test_warranty_expiry_filter(self):
+        self.assertUsesIndex(
+            WarrantyMoney.objects.filter(expiry_date__lte=datetime.date(2025, 1, 1)),
+            'warranty_expiry_idx')
+
+    def test_duplicate_payment_rejected_by_constraint(self):
+        training = self.make_training(1, self.trainer)
+        application = TrainingApplication.objects.create(for_training=training,
+                                                         trainer=self.trainer)
+        TrainerLevel.objects.create(trainer=self.trainer,
+                                    trainer_level=PaymentRate.objects.create(level='a', per_day=1))
+        self.client.force_authenticate(self.trainer)
+        url = reverse('request_payment', args=[application.pk])
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(self.client.post(url).status_code, 400)
+        self.assertEqual(Payment.objects.count(), 1)
+
+
+class ExportTests(TrainingTestMixin, TestCase):
+    """
+    Exports stream the rows the matching list view would return
+    """
+    def setUp(self):
+        super().setUp()
+        self.trainer = self.make_trainer(0)
+        other = self.make_trainer(1)
+        for n in range(5):
+            Payment.objects.create(requested_by=self.trainer, reason=f'TR-{n}', amount=n)
+        Payment.objects.create(requested_by=other, reason='TR-other', amount=9)
+        self.url = reverse('payment_export')
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_csv_export(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = self.read_csv(response)
+        self.assertEqual(rows[0][:3], ['id', 'receipt_id', 'requested_by'])
+        self.assertEqual(len(rows), 7)
+
+    def test_csv_cells_never_start_a_formula(self):
+        Payment.objects.filter(reason='TR-0').update(reason='=HYPERLINK("http://x")')
+        Payment.objects.filter(reason='TR-1').update(reason='@SUM(A1)')
+        rows = self.read_csv(self.client.get(self.url))
+        reasons = {row[6] for row in rows[1:]}
+        self.assertIn('\'=HYPERLINK("http://x")', reasons)
+        self.assertIn("'@SUM(A1)", reasons)
+        self.assertIn('TR-2', reasons)
+
+    def test_export_is_scoped_like_the_list(self):
+        self.client.force_authenticate(self.trainer)
+        rows = self.read_csv(self.client.get(self.url))
+        self.assertEqual({row[2] for row in rows[1:]}, {'trainer0'})
+
+    def test_xlsx_export(self):
+        response = self.client.get(self.url, {'type': 'xlsx'})
+        content = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 7)
+        self.assertIn('TR-other', sheet)
+
+    def test_export_is_read_only(self):
+        self.assertEqual(self.client.post(self.url, {}).status_code, 405)
+
+
+class BulkTransitionTests(TrainingTestMixin, TestCase):
+    """
+    Bulk transitions only move rows allowed by the state machine
+    """
+    def setUp(self):
+        super().setUp()
+        trainer = self.make_trainer(0)
+        self.applications = [
+            TrainingApplication.objects.create(
+                for_training=self.make_training(n, trainer), trainer=trainer, status=state)
+            for n, state in enumerate(['pending', 'pending', 'completed', 'rejected'])
+        ]
+        self.url = reverse('application_transition')
+
+    def test_moves_only_allowed_rows(self):
+        ids = [app.pk for app in self.applications] + [9999]
+        # Lock, update, and the trainer lookup for the dashboard refresh
+        with self.assertNumQueries(5):
+            response = self.client.post(self.url, {'ids': ids, 'state': 'approved'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        pending_a, pending_b, completed, rejected = self.applications
+        self.assertEqual(response.data['updated'], [pending_a.pk, pending_b.pk, rejected.pk])
+        self.assertEqual(response.data['skipped'], [completed.pk, 9999])
+        self.assertEqual(TrainingApplication.objects.filter(status='approved').count(), 3)
+
+    def test_unknown_state_is_rejected(self):
+        response = self.client.post(self.url, {'ids': [1], 'state': 'pending'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_trainers_cannot_transition(self):
+        self.client.force_authenticate(self.applications[0].trainer)
+        response = self.client.post(self.url, {'ids': [1], 'state': 'approved'}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_payment_approval_records_approver(self):
+        payment = Payment.objects.create(requested_by=self.applications[0].trainer, reason='x')
+        response = self.client.post(reverse('payment_transition'),
+                                    {'ids': [payment.pk], 'state': 'approved'}, format='json')
+        self.assertEqual(response.data['updated'], [payment.pk])
+        payment.refresh_from_db()
+        self.assertEqual((payment.status, payment.approved_by), ('approved', self.staff))
+
+
+class FilterSearchOrderingTests(TrainingTestMixin, TestCase):
+    """
+    List views narrow, search and order in the database
+    """
+    def setUp(self):
+        super().setUp()
+        self.trainer = self.make_trainer(0)
+        self.other = self.make_trainer(1)
+        for n, (user, state) in enumerate([(self.trainer, 'pending'), (self.trainer, 'approved'),
+                                           (self.other, 'approved'), (self.other, 'rejected')]):
+            Payment.objects.create(requested_by=user, reason=f'TR-{n}', status=state, amount=10 * n)
+        self.url = reverse('payment_list_create')
+
+    def ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [item['reason'] for item in response.data['results']]
+
+    def test_filters(self):
+        self.assertEqual(sorted(self.ids(status='approved')), ['TR-1', 'TR-2'])
+        self.assertEqual(sorted(self.ids(status=['pending', 'rejected'])), ['TR-0', 'TR-3'])
+        self.assertEqual(sorted(self.ids(requested_by=self.other.pk, amount_min=30)), ['TR-3'])
+        self.assertEqual(len(self.ids(created_date_after='2000-01-01')), 4)
+        self.assertEqual(self.ids(created_date_before='2000-01-01'), [])
+
+    def test_search(self):
+        self.assertEqual(sorted(self.ids(search='trainer1')), ['TR-2', 'TR-3'])
+        self.assertEqual(self.ids(search='TR-2'), ['TR-2'])
+
+    def test_whitelisted_ordering_pages_through_cursor(self):
+        first = self.client.get(self.url, {'ordering': 'amount', 'page_size': 2})
+        second = self.client.get(first.data['next'])
+        reasons = [item['reason'] for item in first.data['results'] + second.data['results']]
+        self.assertEqual(reasons, ['TR-0', 'TR-1', 'TR-2', 'TR-3'])
+
+    def test_unlisted_ordering_falls_back_to_default(self):
+        self.assertEqual(self.ids(ordering='receipt_id'), self.ids())
+
+
+class SparseFieldsetTests(TrainingTestMixin, TestCase):
+    """
+    ``?fields=`` and ``?expand=`` trim both the response and the query
+    """
+    def setUp(self):
+        super().setUp()
+        trainer = self.make_trainer(0)
+        training = self.make_training(0, trainer)
+        TrainingApplication.objects.create(trainer=trainer, for_training=training)
+        self.url = reverse('application_list_create')
+
+    def fetch(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        select = [q['sql'] for q in queries.captured_queries
+                  if 'training_trainingapplication' in q['sql'].split('FROM')[1]][0]
+        return response.data['results'][0], select
+
+    def test_fields_limit_keys_and_columns(self):
+        item, sql = self.fetch(fields='id,status')
+        self.assertEqual(set(item), {'id', 'status'})
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('"trainer_id"', sql.split('FROM')[0])
+
+    def test_expand_controls_nested_training(self):
+        full, full_sql = self.fetch()
+        self.assertIn('training_details', full)
+        self.assertIn('JOIN', full_sql)
+
+        bare, _ = self.fetch(expand='')
+        self.assertNotIn('training_details', bare)
+        self.assertIn('trainer_name', bare)
+
+        item, sql = self.fetch(fields='id', expand='training_details')
+        self.assertEqual(set(item), {'id', 'training_details'})
+        self.assertEqual(item['training_details']['training_id'], 'TR-0')
+        self.assertIn('JOIN', sql)
+
+
+class TrainerDashboardTests(TrainingTestMixin, TestCase):
+    """
+    The dashboard table follows writes and is served in one lookup
+    """
+    def setUp(self):
+        super().setUp()
+        self.trainer = self.make_trainer(0)
+        self.url = reverse('trainer_dashboard')
+        with self.captureOnCommitCallbacks(execute=True):
+            past = self.make_training(0, self.trainer)
+            upcoming = self.make_training(1, self.trainer, given_date=datetime.date(2999, 1, 1))
+            self.applications = [
+                TrainingApplication.objects.create(
+                    for_training=training, trainer=self.trainer, status=state)
+                for training, state in [(past, 'completed'), (upcoming, 'pending')]
+            ]
+            Payment.objects.create(requested_by=self.trainer, reason='TR-0', amount=100,
+                                   status='approved')
+            Payment.objects.create(requested_by=self.trainer, reason='TR-1', amount=50)
+            Certificate.objects.create(certified=self.staff, given_for=past,
+                                       given_date=datetime.date(2025, 1, 3))
+        run_pending()
+
+    def dashboard(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_signals_maintain_summary(self):
+        data = self.dashboard(trainer=self.trainer.pk)
+        self.assertEqual((data['applications_pending'], data['applications_completed']), (1, 1))
+        self.assertEqual((data['payments_requested'], data['payments_approved']),
+                         ('150.00', '100.00'))
+        self.assertEqual((data['certificates_issued'], data['upcoming_sessions']), (1, 1))
+        self.assertEqual(data['next_session_date'], '2999-01-01')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.applications[1].status = 'approved'
+            self.applications[1].save()
+            Certificate.objects.all().delete()
+        # Refreshed by the queued job, not by the request
+        self.assertEqual(self.dashboard(trainer=self.trainer.pk)['applications_pending'], 1)
+        run_pending()
+        data = self.dashboard(trainer=self.trainer.pk)
+        self.assertEqual((data['applications_pending'], data['applications_approved']), (0, 1))
+        self.assertEqual(data['certificates_issued'], 0)
+
+    def test_bulk_transition_refreshes_summary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('payment_transition'),
+                             {'ids': list(Payment.objects.values_list('id', flat=True)),
+                              'state': 'approved'}, format='json')
+        run_pending()
+        self.assertEqual(self.dashboard(trainer=self.trainer.pk)['payments_approved'], '150.00')
+
+    def test_served_in_one_query(self):
+        self.client.force_authenticate(self.trainer)
+        with self.assertNumQueries(1):
+            data = self.dashboard()
+        self.assertEqual(data['trainer'], self.trainer.pk)
+
+    def test_trainers_only_see_their_own(self):
+        self.client.force_authenticate(self.trainer)
+        response = self.client.get(self.url, {'trainer': self.staff.pk})
+        self.assertEqual(response.status_code, 403)
+
+    def test_only_trainers_have_dashboards(self):
+        response = self.client.get(self.url, {'trainer': self.staff.pk})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertFalse(TrainerDashboard.objects.filter(pk=self.staff.pk).exists())
+
+    def test_failed_refresh_does_not_fail_the_write(self):
+        self.client.force_authenticate(self.staff)
+        payment = Payment.objects.get(reason='TR-1')
+        with mock.patch('training.dashboard.enqueue', side_effect=DatabaseError), \
+                self.assertLogs('training.dashboard', 'ERROR'), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('approve_payment', args=[payment.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_failed_refresh_is_retried_by_the_queue(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.filter(reason='TR-1').get().delete()
+        with mock.patch('training.dashboard.compute_dashboards', side_effect=DatabaseError):
+            run_pending()
+        job = Job.objects.get(name='training.refresh_dashboards', status='queued')
+        Job.objects.filter(pk=job.pk).update(run_after=job.created_date)
+        run_pending()
+        self.assertEqual(self.dashboard(trainer=self.trainer.pk)['payments_requested'], '100.00')
+
+    def test_rebuild_repairs_bypassed_writes(self):
+        Payment.objects.update(amount=1)
+        self.assertEqual(self.dashboard(trainer=self.trainer.pk)['payments_requested'], '150.00')
+        call_command('rebuild_dashboards', stdout=io.StringIO())
+        self.assertEqual(self.dashboard(trainer=self.trainer.pk)['payments_requested'], '2.00')
+        self.assertEqual(TrainerDashboard.objects.count(), 1)
+
+
+class ReportTests(TrainingTestMixin, TestCase):
+    """
+    Reports group in the database and are served from cache until a write
+    """
+    def setUp(self):
+        super().setUp()
+        senior, junior = self.make_trainer(0), self.make_trainer(1)
+        PaymentRate.objects.create(level='senior', per_day=100)
+        PaymentRate.objects.create(level='junior', per_day=50)
+        TrainerLevel.objects.create(trainer=senior, trainer_level_id='senior')
+        TrainerLevel.objects.create(trainer=junior, trainer_level_id='junior')
+        for n, (user, amount, state, month) in enumerate([
+                (senior, 100, 'approved', 1), (senior, 200, 'completed', 1),
+                (junior, 50, 'approved', 1), (junior, 70, 'approved', 2),
+                (junior, 999, 'pending', 2)]):
+            payment = Payment.objects.create(requested_by=user, reason=f'TR-{n}',
+                                             amount=amount, status=state)
+            Payment.objects.filter(pk=payment.pk).update(
+                created_date=datetime.datetime(2025, month, 10, tzinfo=datetime.timezone.utc))
+        for n, month in enumerate([2, 5, 5]):
+            training = self.make_training(n, senior, given_date=datetime.date(2025, month, 1))
+            Certificate.objects.create(certified=self.staff, given_for=training,
+                                       given_date=training.end_date)
+
+    def report(self, name, **params):
+        response = self.client.get(reverse('report_detail', args=[name]), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_payouts_per_level_per_month(self):
+        rows = [(str(row['month']), row['level'], row['payments'], row['total'])
+                for row in self.report('payouts')]
+        self.assertEqual(rows, [
+            ('2025-01-01', 'junior', 1, 50), ('2025-01-01', 'senior', 2, 300),
+            ('2025-02-01', 'junior', 1, 70),
+        ])
+        rows = self.report('payouts', level='junior', date_from='2025-02-01')
+        self.assertEqual([row['total'] for row in rows], [70])
+
+    def test_trainings_and_certificates(self):
+        self.assertEqual(
+            [(row['training_type_name'], row['location'], row['sessions'])
+             for row in self.report('trainings')],
+            [('Leadership', 'Addis Ababa', 3)])
+        self.assertEqual(
+            [(str(row['quarter']), row['certificates']) for row in self.report('certificates')],
+            [('2025-01-01', 1), ('2025-04-01', 2)])
+
+    def test_cached_until_write(self):
+        self.report('payouts')
+        with self.assertNumQueries(0):
+            self.report('payouts')
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.filter(status='pending').get().delete()
+            Payment.objects.create(requested_by=self.staff, amount=5, status='approved')
+        self.assertEqual(len(self.report('payouts')), 4)
+
+    def test_evicted_version_does_not_revive_old_results(self):
+        caches['default'].delete(report_cache.version_key)
+        self.assertEqual(len(self.report('payouts')), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(requested_by=self.staff, amount=5, status='approved')
+        self.assertEqual(len(self.report('payouts')), 4)
+        caches['default'].delete(report_cache.version_key)
+        self.assertEqual(len(self.report('payouts')), 4)
+
+    def test_invalid_requests(self):
+        response = self.client.get(reverse('report_detail', args=['nope']))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('report_detail', args=['payouts']),
+                                   {'date_from': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        self.client.force_authenticate(User.objects.get(username='trainer0'))
+        response = self.client.get(reverse('report_detail', args=['payouts']))
+        self.assertEqual(response.status_code, 403)
+
+
+class PayrollRunTests(TrainingTestMixin, TestCase):
+    """
+    Payroll runs freeze rates at run time and can be compared
+    """
+    def setUp(self):
+        super().setUp()
+        self.rate = PaymentRate.objects.create(level='senior', per_day=100)
+        self.trainers = [self.make_trainer(n) for n in range(3)]
+        for trainer in self.trainers[:2]:
+            TrainerLevel.objects.create(trainer=trainer, trainer_level=self.rate)
+        for n, trainer in enumerate(self.trainers):
+            for m in range(3):
+                training = self.make_training(f'{n}-{m}', trainer, days=m + 1,
+                                              given_date=datetime.date(2025, 3, 1 + m))
+                TrainingApplication.objects.create(for_training=training, trainer=trainer,
+                                                   status='completed')
+        self.url = reverse('payroll_run_list_create')
+        self.period = {'period_start': '2025-03-01', 'period_end': '2025-03-31'}
+
+    def run_payroll(self, **headers):
+        response = self.client.post(self.url, self.period, format='json', **headers)
+        self.assertEqual(response.status_code, 202)
+        run_pending()
+        job = self.client.get(response['Location']).data
+        self.assertEqual(job['status'], 'succeeded', job['error'])
+        return job['result']
+
+    def test_run_snapshots_lines(self):
+        # Run insert, one joined read, one bulk insert and the totals update
+        with self.assertNumQueries(6):
+            run, skipped = create_payroll_run(datetime.date(2025, 3, 1),
+                                              datetime.date(2025, 3, 31))
+        self.assertEqual((run.line_count, skipped, run.total_amount), (6, 3, 1200))
+
+        result = self.run_payroll()
+        self.assertEqual((result['line_count'], result['skipped']), (6, 3))
+        lines = self.client.get(reverse('payroll_line_list', args=[result['run']]),
+                                {'trainer': self.trainers[0].pk})
+        self.assertEqual([(line['days'], line['amount']) for line in lines.data['results']],
+                         [(1, '100.00'), (2, '200.00'), (3, '300.00')])
+
+    def test_idempotency_key_returns_same_job(self):
+        first = self.client.post(self.url, self.period, format='json', HTTP_IDEMPOTENCY_KEY='m3')
+        second = self.client.post(self.url, self.period, format='json', HTTP_IDEMPOTENCY_KEY='m3')
+        self.assertEqual(first.data['id'], second.data['id'])
+        run_pending()
+        self.assertEqual(PayrollRun.objects.count(), 1)
+        other_period = {**self.period, 'period_end': '2025-03-30'}
+        response = self.client.post(self.url, other_period, format='json',
+                                    HTTP_IDEMPOTENCY_KEY='m3')
+        self.assertEqual(response.status_code, 422)
+
+    def test_rate_change_does_not_touch_old_run_and_shows_in_diff(self):
+        first = self.run_payroll()['run']
+        self.rate.per_day = 150
+        self.rate.save()
+        TrainerLevel.objects.create(trainer=self.trainers[2], trainer_level=self.rate)
+        second = self.run_payroll()['run']
+
+        self.assertEqual(PayrollRun.objects.get(pk=first).total_amount, 1200)
+        diff = self.client.get(reverse('payroll_diff', args=[first, second])).data
+        self.assertEqual(len(diff['added']), 3)
+        self.assertEqual(diff['removed'], [])
+        self.assertEqual(len(diff['changed']), 6)
+        self.assertEqual(diff['total_difference'], 2700 - 1200)
+
+    def test_invalid_period_and_permissions(self):
+        response = self.client.post(self.url, {'period_start': '2025-04-01',
+                                               'period_end': '2025-03-01'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.client.force_authenticate(self.trainers[0])
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+
+class ResponseCacheTests(TrainingTestMixin, TestCase):
+    """
+    List responses are cached per audience until a tagged table changes
+    """
+    def setUp(self):
+        super().setUp()
+        self.trainer = self.make_trainer(0)
+        self.training = self.make_training(0, self.trainer)
+        response_cache.reset_stats()
+
+    def test_hit_until_write(self):
+        url = reverse('training_list_create')
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(response_cache.stats()['training_list_create'],
+                         {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+        self.training.given_location = 'Adama'
+        self.training.save()
+        self.assertEqual(self.client.get(url).data['results'][0]['given_location'], 'Adama')
+        self.trainer.first_name = 'Renamed'
+        self.trainer.save()
+        self.assertTrue(self.client.get(url).data['results'][0]['given_by_name'].startswith('Renamed'))
+
+    def test_entries_are_per_audience(self):
+        Certificate.objects.create(certificate_id='C-1', certified=self.trainer, given_for=self.training,
+                                   given_date=datetime.date(2025, 1, 5))
+        url = reverse('certificate_list_create')
+        self.assertEqual(len(self.client.get(url).data['results']), 1)
+        self.client.force_authenticate(self.make_trainer(1))
+        self.assertEqual(self.client.get(url).data['results'], [])
+
+    def test_bulk_transition_invalidates(self):
+        payment = Payment.objects.create(requested_by=self.trainer, reason='TR-0', amount=100)
+        url = reverse('payment_list_create')
+        self.assertEqual(self.client.get(url).data['results'][0]['status'], 'pending')
+        self.client.post(reverse('payment_transition'), {'ids': [payment.pk], 'state': 'approved'},
+                         format='json')
+        self.assertEqual(self.client.get(url).data['results'][0]['status'], 'approved')
+
+
+class CertificateIssueTests(TrainingTestMixin, TestCase):
+    """
+    A session's certificates are issued in one transaction of constant size
+    """
+    def setUp(self):
+        super().setUp()
+        self.trainer = self.make_trainer(0)
+        self.training = self.make_training(0, self.trainer)
+        self.participants = [self.make_trainer(n) for n in range(1, 6)]
+        for user, state in zip(self.participants,
+                               ['approved', 'completed', 'completed', 'pending', 'rejected']):
+            TrainingApplication.objects.create(for_training=self.training, trainer=user,
+                                               status=state)
+        self.url = reverse('issue_training_certificates', args=[self.training.pk])
+
+    def test_issues_to_approved_and_completed_only(self):
+        Certificate.objects.create(certified=self.participants[0], given_for=self.training,
+                                   given_date=self.training.end_date)
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['skipped'], [self.participants[0].pk])
+        certified = set(Certificate.objects.filter(pk__in=response.data['created'])
+                        .values_list('certified_id', flat=True))
+        self.assertEqual(certified, {user.pk for user in self.participants[1:3]})
+
+        again = self.client.post(self.url, {'given_date': '2025-02-01'}, format='json')
+        self.assertEqual((again.status_code, again.data['created']), (200, []))
+
+    def test_only_own_sessions_for_trainers(self):
+        self.client.force_authenticate(self.participants[0])
+        self.assertEqual(self.client.post(self.url).status_code, 403)
+        self.client.force_authenticate(self.trainer)
+        self.assertEqual(self.client.post(self.url).status_code, 201)
+
+    def test_single_duplicate_rejected_by_constraint(self):
+        data = {'certified': self.participants[0].pk, 'given_for': self.training.pk,
+                'given_date': '2025-01-03'}
+        url = reverse('certificate_list_create')
+        self.assertEqual(self.client.post(url, data, format='json').status_code, 201)
+        self.assertEqual(self.client.post(url, data, format='json').status_code, 400)
+
+
+class CertificatePdfTests(TrainingTestMixin, TestCase):
+    """
+    Certificate PDFs are rendered once per content and revalidated by ETag
+    """
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media = media
+
+        self.trainee = self.make_trainer(1)
+        self.training = self.make_training(0, self.make_trainer(0))
+        self.certificate = Certificate.objects.create(
+            certified=self.trainee, given_for=self.training, given_date=datetime.date(2025, 1, 3))
+        self.url = reverse('certificate_pdf', args=[self.certificate.pk])
+
+    def files(self):
+        return sorted(str(path) for path in Path(self.media).rglob('*.pdf'))
+
+    def test_rendered_once_and_revalidated(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content)
+        self.assertTrue(body.startswith(b'%PDF-1.4'))
+        self.assertIn(b'(Trainer 1) Tj', body)
+        self.assertEqual(len(self.files()), 1)
+
+        etag = response['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(self.files()), 1)
+
+    def test_template_change_renders_new_document(self):
+        etag = self.client.get(self.url)['ETag']
+        self.training.training_type.certificate_template = 'Award\n{{ name }} - {{ training_id }}'
+        self.training.training_type.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'(Trainer 1 - TR-0) Tj', b''.join(response.streaming_content))
+        self.assertEqual(len(self.files()), 2)
+
+    def test_template_is_not_a_django_template(self):
+        self.training.training_type.certificate_template = \
+            '{{ name }} {% debug %} {{ settings.SECRET_KEY }}'
+        self.training.training_type.save()
+        self.assertIn(b'(Trainer 1 {% debug %} {{ settings.SECRET_KEY }}) Tj',
+                      b''.join(self.client.get(self.url).streaming_content))
+        response = self.client.patch(
+            reverse('training_type_detail', args=[self.training.training_type.pk]),
+            {'certificate_template': '{{ name }} {{ secret }}'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_partial_files_are_unique_and_cleaned_up(self):
+        path = Path(settings.MEDIA_ROOT) / 'certificates' / 'test.pdf'
+        with mock.patch('training.certificates.render_pdf', side_effect=RuntimeError), \
+                self.assertRaises(RuntimeError):
+            write_certificate_pdf(path, ['x'])
+        self.assertEqual(list(path.parent.iterdir()), [])
+        self.assertTrue(write_certificate_pdf(path, ['x']))
+        self.assertEqual(list(path.parent.iterdir()), [path])
+
+    def test_other_users_cannot_download(self):
+        self.client.force_authenticate(self.make_trainer(2))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_batch_render_job(self):
+        for n in range(2, 5):
+            Certificate.objects.create(certified=self.make_trainer(n), given_for=self.training,
+                                       given_date=datetime.date(2025, 1, 3))
+        response = self.client.post(
+            reverse('render_training_certificates', args=[self.training.pk]))
+        self.assertEqual(response.status_code, 202)
+        with self.settings(CERTIFICATE_RENDER_PROCESSES=2):
+            run_pending()
+        job = self.client.get(response['Location']).data
+        self.assertEqual((job['status'], job['result']), ('succeeded', {'rendered': 4}))
+        self.assertEqual(len(self.files()), 4)
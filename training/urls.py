@@ -1,4 +1,5 @@
 from django.urls import path
+from edi.async_views import async_view
 from . import views
 
 urlpatterns = [
@@ -7,11 +8,15 @@ urlpatterns = [
     path('types/<int:pk>/', views.TrainingTypeDetailView.as_view(), name='training_type_detail'),
     
     # Training endpoints
-    path('sessions/', views.TrainingListCreateView.as_view(), name='training_list_create'),
+    path('sessions/', async_view(views.TrainingListCreateView.as_view()), name='training_list_create'),
     path('sessions/<int:pk>/', views.TrainingDetailView.as_view(), name='training_detail'),
+    path('sessions/<int:pk>/certificates/', views.issue_training_certificates, name='issue_training_certificates'),
+    path('sessions/<int:pk>/certificates/render/', views.render_training_certificates, name='render_training_certificates'),
     
     # Training Application endpoints
-    path('applications/', views.TrainingApplicationListCreateView.as_view(), name='application_list_create'),
+    path('applications/', async_view(views.TrainingApplicationListCreateView.as_view()), name='application_list_create'),
+    path('applications/export/', views.TrainingApplicationExportView.as_view(), name='application_export'),
+    path('applications/transition/', views.TrainingApplicationTransitionView.as_view(), name='application_transition'),
     path('applications/<int:pk>/', views.TrainingApplicationDetailView.as_view(), name='application_detail'),
     path('applications/<int:pk>/approve/', views.approve_training_application, name='approve_application'),
     path('applications/<int:pk>/reject/', views.reject_training_application, name='reject_application'),
@@ -19,24 +24,43 @@ urlpatterns = [
     path('applications/<int:pk>/complete/', views.complete_training_application, name='complete_application'),
     
     # Certificate endpoints
-    path('certificates/', views.CertificateListCreateView.as_view(), name='certificate_list_create'),
+    path('certificates/', async_view(views.CertificateListCreateView.as_view()), name='certificate_list_create'),
+    path('certificates/export/', views.CertificateExportView.as_view(), name='certificate_export'),
     path('certificates/<int:pk>/', views.CertificateDetailView.as_view(), name='certificate_detail'),
+    path('certificates/<int:pk>/pdf/', views.certificate_pdf, name='certificate_pdf'),
     
     # Payment endpoints
-    path('payments/', views.PaymentListCreateView.as_view(), name='payment_list_create'),
+    path('payments/', async_view(views.PaymentListCreateView.as_view()), name='payment_list_create'),
+    path('payments/export/', views.PaymentExportView.as_view(), name='payment_export'),
     path('payments/rate/', views.PaymentRateView.as_view(), name='payment_rate_list_create'),
     path('payments/trainer/', views.TrainerLevelView.as_view(), name='payment_trainer'),
+    path('payments/request/', views.request_payment_batch, name='request_payment_batch'),
+    path('payments/transition/', views.PaymentTransitionView.as_view(), name='payment_transition'),
     path('payments/<int:pk>/', views.PaymentDetailView.as_view(), name='payment_detail'),
     path('payments/<int:pk>/approve/', views.approve_payment, name='approve_payment'),
     path('payments/<int:pk>/reject/', views.reject_payment, name= 'reject_payment'),
     path('payments/<int:pk>/request/', views.request_payment, name="request_payment"),
     
+    # Dashboard endpoint
+    path('dashboard/', views.trainer_dashboard, name='trainer_dashboard'),
+    
+    # Report endpoints
+    path('reports/', views.report_list, name='report_list'),
+    path('reports/<slug:name>/', views.report_detail, name='report_detail'),
+    
+    # Payroll endpoints
+    path('payroll/', views.PayrollRunListCreateView.as_view(), name='payroll_run_list_create'),
+    path('payroll/<int:pk>/', views.PayrollRunDetailView.as_view(), name='payroll_run_detail'),
+    path('payroll/<int:pk>/lines/', views.PayrollLineListView.as_view(), name='payroll_line_list'),
+    path('payroll/<int:pk>/diff/<int:other_pk>/', views.payroll_diff, name='payroll_diff'),
+    
     # Innovation endpoints
     path('innovations/', views.InnovationListCreateView.as_view(), name='innovation_list_create'),
     path('innovations/<int:pk>/', views.InnovationDetailView.as_view(), name='innovation_detail'),
     
     # Warranty Money endpoints
     path('warranties/', views.WarrantyMoneyListCreateView.as_view(), name='warranty_list_create'),
+    path('warranties/transition/', views.WarrantyMoneyTransitionView.as_view(), name='warranty_transition'),
     path('warranties/<int:pk>/', views.WarrantyMoneyDetailView.as_view(), name='warranty_detail'),
 ]
 
@@ -1,19 +1,51 @@
-from rest_framework import generics, permissions, status
+import logging
+
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from accounts.models import User
+from edi.conditional import ConditionalGetMixin
+from edi.files import serve_media
+from edi.response_cache import CachedListMixin
+from edi.sparse import SparseQuerysetMixin
+from django.conf import settings
 from django.shortcuts import get_object_or_404
-from django.db import IntegrityError
+from django.http import Http404, HttpResponseNotModified
+from django.utils.http import parse_etags
+from django.db import IntegrityError, transaction
 
 from django.db.models import Q
 from .models import (
     TrainingType, Training, TrainingApplication, 
-    Certificate, Payment, Innovation, WarrantyMoney, PaymentRate, TrainerLevel
+    Certificate, Payment, Innovation, WarrantyMoney, PaymentRate, TrainerLevel,
+    TrainerDashboard, PayrollRun, PayrollLine
 )
 from .serializers import (
     TrainingTypeSerializer, TrainingSerializer, TrainingApplicationSerializer,
     CertificateSerializer, PaymentSerializer, InnovationSerializer, 
-   PaymentRateSerializer,TrainerLevelSerializer, WarrantyMoneySerializer
+   PaymentRateSerializer,TrainerLevelSerializer, WarrantyMoneySerializer,
+   PaymentBatchRequestSerializer, TrainerDashboardSerializer, ReportFilterSerializer,
+   PayrollRunSerializer, PayrollLineSerializer, CertificateIssueSerializer
+)
+from .certificates import (
+    issue_certificates, certificate_document, certificate_path, write_certificate_pdf
+)
+from .dashboard import refresh_dashboards, schedule_refresh
+from .metrics import payments_approved
+from .payroll import diff_payroll_runs
+from .payments import service_days, request_payments, completed_applications
+from .rate_cache import rate_cache
+from .reports import REPORTS, report_cache
+from .filters import (
+    TrainingFilter, TrainingApplicationFilter, CertificateFilter,
+    PaymentFilter, InnovationFilter, WarrantyMoneyFilter
 )
+from edi.exports import ExportMixin
+from edi.transitions import BulkTransitionView
+from jobs.queue import IdempotencyKeyReused, enqueue
+from jobs.views import accepted
+
+logger = logging.getLogger(__name__)
 
 
 class IsTrainerOrStaff(permissions.BasePermission):
@@ -38,16 +70,19 @@ class IsStaffOrAdminRworker(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated and request.user.role in ['staff', 'admin',]
 # Training Type Views
-class TrainingTypeListCreateView(generics.ListCreateAPIView):
+class TrainingTypeListCreateView(ConditionalGetMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     List and create training types
     """
+    version_models = (TrainingType,)
     queryset = TrainingType.objects.all()
     serializer_class = TrainingTypeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # A small reference table the forms load whole with ?all=true
+    allow_all = True
 
 
-class TrainingTypeDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TrainingTypeDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a training type
     """
@@ -57,21 +92,26 @@ class TrainingTypeDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # Training Views
-class TrainingListCreateView(generics.ListCreateAPIView):
+class TrainingListCreateView(CachedListMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     List and create training sessions
     """
-    queryset = Training.objects.all()
+    cache_tags = (Training, TrainingType, User)
+    queryset = Training.objects.with_related()
     serializer_class = TrainingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-given_date', '-id')
+    filterset_class = TrainingFilter
+    search_fields = ['=training_id', '^training_type__training_type', '^given_location']
+    ordering_fields = ['given_date', 'end_date', 'training_id']
     
     def get_queryset(self):
-        queryset = Training.objects.all()
+        queryset = Training.objects.with_related()
         if self.request.user.role == 'trainer':
             # Trainers can only see their own training sessions
             # given_by=self.request.user
             queryset = queryset.filter()
-        return queryset.order_by('-given_date')
+        return queryset.order_by(*self.ordering)
     
     def perform_create(self, serializer):
         if self.request.user.role in['admin','rworker','staff']:
@@ -80,16 +120,16 @@ class TrainingListCreateView(generics.ListCreateAPIView):
             serializer.save()
 
 
-class TrainingDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TrainingDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a training session
     """
-    queryset = Training.objects.all()
+    queryset = Training.objects.with_related()
     serializer_class = TrainingSerializer
     permission_classes = [IsTrainerOrStaff]
     
     def get_queryset(self):
-        queryset = Training.objects.all()
+        queryset = Training.objects.with_related()
         if self.request.user.role == 'trainer':
             # Trainers can only access their own training sessions
             queryset = queryset.filter(given_by=self.request.user)
@@ -97,16 +137,20 @@ class TrainingDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # Training Application Views
-class TrainingApplicationListCreateView(generics.ListCreateAPIView):
+class TrainingApplicationListCreateView(SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     List and create training applications
     """
-    queryset = TrainingApplication.objects.all()
+    queryset = TrainingApplication.objects.with_related()
     serializer_class = TrainingApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-applied_date', '-id')
+    filterset_class = TrainingApplicationFilter
+    search_fields = ['=for_training__training_id', '^trainer__username']
+    ordering_fields = ['applied_date', 'status']
     
     def get_queryset(self):
-        queryset = TrainingApplication.objects.all()
+        queryset = TrainingApplication.objects.with_related()
         if self.request.user.role == 'trainer':
             # Trainers can see applications for their training sessions
             queryset = queryset.filter(trainer=self.request.user)
@@ -116,18 +160,59 @@ class TrainingApplicationListCreateView(generics.ListCreateAPIView):
         else:
             # Other users can only see their own applications
             queryset = queryset.filter(trainer=self.request.user)
-        return queryset.order_by('-applied_date')
+        return queryset.order_by(*self.ordering)
+
+    def perform_create(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise serializers.ValidationError("This trainer has already applied for this training")
+
+
+class TrainingApplicationExportView(ExportMixin, TrainingApplicationListCreateView):
+    """
+    Export training applications as CSV or XLSX
+    """
+    export_filename = 'applications'
+    export_fields = (
+        ('id', 'id'),
+        ('training_id', 'for_training__training_id'),
+        ('training_type', 'for_training__training_type__training_type'),
+        ('trainer', 'trainer__username'),
+        ('trainer_first_name', 'trainer__first_name'),
+        ('trainer_last_name', 'trainer__last_name'),
+        ('applied_date', 'applied_date'),
+        ('status', 'status'),
+    )
 
 
-class TrainingApplicationDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TrainingApplicationDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a training application
     """
-    queryset = TrainingApplication.objects.all()
+    queryset = TrainingApplication.objects.with_related()
     serializer_class = TrainingApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
+class TrainingApplicationTransitionView(BulkTransitionView):
+    """
+    Approve, reject or complete many training applications at once
+    """
+    queryset = TrainingApplication.objects.all()
+    permission_classes = [IsStaffOrAdmin]
+    transitions = {
+        'approved': ('pending', 'rejected'),
+        'rejected': ('pending', 'approved'),
+        'completed': ('approved',),
+    }
+
+    def transitioned(self, ids, state):
+        schedule_refresh(*TrainingApplication.objects.filter(id__in=ids)
+                         .values_list('trainer_id', flat=True).distinct())
+
+
 @api_view(['POST'])
 @permission_classes([IsStaffOrAdmin])
 def approve_training_application(request, pk):
@@ -157,7 +242,7 @@ def complete_training_application(request, pk):
         if request.user.role == 'trainer' and application.trainer != request.user:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
-        application.status = 'complete'
+        application.status = 'completed'
         application.save()
         serializer = TrainingApplicationSerializer(application)
         return Response(serializer.data)
@@ -208,31 +293,21 @@ def apply(request, pk):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Check if the trainer has already applied for this training
-        existing_application = TrainingApplication.objects.filter(
-            trainer=request.user,
-            for_training=training
-        ).first()
-        
-        if existing_application:
-            return Response(
-                {"error": "You have already applied for this training"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         # Prepare data for the application
         application_data = request.data.copy()
-        print('APPLICATION:' ,application_data)
         application_data['trainer'] = request.user.id
         application_data['for_training'] = training.id
-        print('APPLICATION:' ,application_data)
+        logger.debug('Training application received',
+                     extra={'training': training.id, 'trainer': request.user.id})
         
         # Create and validate the serializer
         serializer = TrainingApplicationSerializer(data=application_data)
         
         if serializer.is_valid():
-            # Save the application
-            application = serializer.save()
+            # Save the application; a second application for the same
+            # training is rejected by the unique constraint
+            with transaction.atomic():
+                application = serializer.save()
             
             return Response(
                 {
@@ -254,7 +329,7 @@ def apply(request, pk):
         )
     except IntegrityError:
         return Response(
-            {"error": "Application already exists for this training"}, 
+            {"error": "You have already applied for this training"}, 
             status=status.HTTP_400_BAD_REQUEST
         )
     # except Exception as e:
@@ -457,76 +532,264 @@ def withdraw_application(request, app_id):
         )
 
 # Certificate Views
-class CertificateListCreateView(generics.ListCreateAPIView):
+class CertificateListCreateView(CachedListMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     List and create certificates
     """
-    queryset = Certificate.objects.all()
+    cache_tags = (Certificate, Training, TrainingType, User)
+    queryset = Certificate.objects.with_related()
     serializer_class = CertificateSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-given_date', '-id')
+    filterset_class = CertificateFilter
+    search_fields = ['=certificate_id', '^certified__username', '=given_for__training_id']
+    ordering_fields = ['given_date']
     
     def get_queryset(self):
-        queryset = Certificate.objects.all()
+        queryset = Certificate.objects.with_related()
         if self.request.user.role == 'trainer' or \
             self.request.user.role=='rworker' or \
                 self.request.user.role=='trainee' :
             # Trainees can see certificates for their training sessions
             queryset = queryset.filter(certified=self.request.user)
-        return queryset.order_by('-given_date')
-    
-    
+        return queryset.order_by(*self.ordering)
+
+    def perform_create(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise serializers.ValidationError(
+                "This certificate ID is taken or the person is already certified for this training")
+
 
-class CertificateDetailView(generics.RetrieveUpdateDestroyAPIView):
+
+class CertificateExportView(ExportMixin, CertificateListCreateView):
+    """
+    Export certificates as CSV or XLSX
+    """
+    export_filename = 'certificates'
+    export_fields = (
+        ('id', 'id'),
+        ('certificate_id', 'certificate_id'),
+        ('certified', 'certified__username'),
+        ('certified_first_name', 'certified__first_name'),
+        ('certified_last_name', 'certified__last_name'),
+        ('training_id', 'given_for__training_id'),
+        ('training_type', 'given_for__training_type__training_type'),
+        ('given_date', 'given_date'),
+    )
+
+
+class CertificateDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a certificate
     """
-    queryset = Certificate.objects.all()
+    queryset = Certificate.objects.with_related()
     serializer_class = CertificateSerializer
     permission_classes = [IsTrainerOrStaff]
 
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise serializers.ValidationError(
+                "This certificate ID is taken or the person is already certified for this training")
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def certificate_pdf(request, pk):
+    """
+    Download a certificate as PDF.
+
+    Documents are cached on disk under a hash of their content, which is
+    also the ETag, so a repeated download with ``If-None-Match`` is answered
+    with 304 before the file is even opened.
+    """
+    certificate = get_object_or_404(Certificate.objects.with_related(), pk=pk)
+    user = request.user
+    if user.role not in ['staff', 'admin'] and \
+            user.pk not in (certificate.certified_id, certificate.given_for.given_by_id):
+        return Response(
+            {"error": "You can only download your own certificates"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    digest, lines = certificate_document(certificate)
+    etag = f'"{digest}"'
+    if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        path = certificate_path(digest)
+        write_certificate_pdf(path, lines)
+        response = serve_media(request, path.relative_to(settings.MEDIA_ROOT),
+                               filename=f'certificate-{certificate.certificate_id}.pdf',
+                               content_type='application/pdf')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsTrainerOrStaff])
+def render_training_certificates(request, pk):
+    """
+    Queue rendering of every certificate PDF of a training
+    """
+    training = get_object_or_404(Training, pk=pk)
+    if request.user.role not in ['staff', 'admin'] and training.given_by_id != request.user.pk:
+        return Response(
+            {"error": "Only the trainer of this session or staff can render its certificates"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return accepted(request, enqueue('training.render_certificates', {'training': training.pk},
+                                     user=request.user))
+
+
+@api_view(['POST'])
+@permission_classes([IsTrainerOrStaff])
+def issue_training_certificates(request, pk):
+    """
+    Issue certificates to every approved or completed participant of a
+    training in one transaction; participants already certified are skipped
+    """
+    training = get_object_or_404(Training, pk=pk)
+    if request.user.role not in ['staff', 'admin'] and training.given_by_id != request.user.pk:
+        return Response(
+            {"error": "Only the trainer of this session or staff can issue its certificates"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    serializer = CertificateIssueSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    created, skipped = issue_certificates(training, serializer.validated_data.get('given_date'))
+    return Response(
+        {
+            "message": f"{len(created)} certificates issued",
+            "created": created,
+            "skipped": skipped,
+        },
+        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    )
+
 
 # Payment Views
-class PaymentListCreateView(generics.ListCreateAPIView):
+class PaymentListCreateView(CachedListMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     List and create payments
     """
-    queryset = Payment.objects.all()
+    cache_tags = (Payment, User)
+    queryset = Payment.objects.with_related()
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-created_date', '-id')
+    filterset_class = PaymentFilter
+    search_fields = ['=receipt_id', '^requested_by__username', '=reason']
+    ordering_fields = ['created_date', 'amount', 'status']
     
     def get_queryset(self):
-        queryset = Payment.objects.all()
+        queryset = Payment.objects.with_related()
         if self.request.user.role in ['staff', 'admin']:
             # Staff and admin can see all payments
             pass
         else:
             # Other users can only see their own payments
             queryset = queryset.filter(requested_by=self.request.user)
-        return queryset.order_by('-created_date')
+        return queryset.order_by(*self.ordering)
     
     def perform_create(self, serializer):
-        serializer.save(requested_by=self.request.user)
+        try:
+            with transaction.atomic():
+                serializer.save(requested_by=self.request.user)
+        except IntegrityError:
+            raise serializers.ValidationError("A payment with this reason already exists")
 
-class PaymentRateView(generics.ListCreateAPIView):
+class PaymentExportView(ExportMixin, PaymentListCreateView):
+    """
+    Export payments as CSV or XLSX
+    """
+    export_filename = 'payments'
+    export_fields = (
+        ('id', 'id'),
+        ('receipt_id', 'receipt_id'),
+        ('requested_by', 'requested_by__username'),
+        ('requested_by_first_name', 'requested_by__first_name'),
+        ('requested_by_last_name', 'requested_by__last_name'),
+        ('approved_by', 'approved_by__username'),
+        ('reason', 'reason'),
+        ('status', 'status'),
+        ('amount', 'amount'),
+        ('created_date', 'created_date'),
+    )
+
+class PaymentRateView(ConditionalGetMixin, generics.ListCreateAPIView):
+    """
+    List payment rates from the rate cache and create new ones
+    """
+    version_models = (PaymentRate,)
     queryset=PaymentRate.objects.all()
     serializer_class= PaymentRateSerializer
     permission_classes=[permissions.IsAuthenticated]
+    pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        rates = [PaymentRate(level=level, per_day=per_day)
+                 for level, per_day in sorted(rate_cache.rates().items())]
+        return Response(self.get_serializer(rates, many=True).data)
 
 class TrainerLevelView(generics.ListCreateAPIView):
+    """
+    List trainer levels from the rate cache and assign new ones
+    """
     queryset=TrainerLevel.objects.all()
     serializer_class= TrainerLevelSerializer
     permission_classes=[permissions.IsAuthenticated]
+    pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        levels = [TrainerLevel(trainer_id=trainer_id, trainer_level_id=level)
+                  for trainer_id, level in sorted(rate_cache.trainer_levels().items())]
+        return Response(self.get_serializer(levels, many=True).data)
 
 
-class PaymentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PaymentDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a payment
     """
-    queryset = Payment.objects.all()
+    queryset = Payment.objects.with_related()
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
+class PaymentTransitionView(BulkTransitionView):
+    """
+    Approve, reject or complete many payments at once
+    """
+    queryset = Payment.objects.all()
+    permission_classes = [IsStaffOrAdmin]
+    transitions = {
+        'approved': ('pending',),
+        'rejected': ('pending',),
+        'completed': ('approved',),
+    }
+
+    def get_extra_updates(self, state):
+        if state == 'approved':
+            return {'approved_by': self.request.user}
+        return {}
+
+    def transitioned(self, ids, state):
+        schedule_refresh(*Payment.objects.filter(id__in=ids)
+                         .values_list('requested_by_id', flat=True).distinct())
+        report_cache.invalidate_on_commit()
+        if state == 'approved':
+            payments_approved.inc(len(ids))
+
+
 @api_view(['POST'])
 @permission_classes([IsStaffOrAdmin])
 def approve_payment(request, pk):
@@ -538,6 +801,7 @@ def approve_payment(request, pk):
         payment.status = 'approved'
         # payment.requested_by = request.user
         payment.save()
+        payments_approved.inc()
         serializer = PaymentSerializer(payment)
         return Response(serializer.data)
     except Payment.DoesNotExist:
@@ -565,22 +829,17 @@ def request_payment(request, pk):
     """
     Handles a payment request for a specific training.
     """
-    service_days=0
     # Get the training object or return 404 if not found
     trapp = get_object_or_404(TrainingApplication, id=pk)
 
     training_start= trapp.for_training.given_date
     training_end= trapp.for_training.end_date
 
-    level= get_object_or_404(TrainerLevel,trainer=request.user).trainer_level
-    rate_perday= get_object_or_404(PaymentRate, level=level).per_day
+    rate_perday= rate_cache.rate_for(request.user.id)
+    if rate_perday is None:
+        raise Http404('Trainer has no payment level')
 
-    if training_end==training_start:
-        service_days=1
-    else:
-        service_days= (training_end - training_start).days
-        
-    calculated_payments= rate_perday * service_days
+    calculated_payments= rate_perday * service_days(training_start, training_end)
 
 
     # print('LEVEL', level)
@@ -600,20 +859,15 @@ def request_payment(request, pk):
     requested_data["reason"] = trapp.for_training.training_id
     requested_data["amount"]= calculated_payments
 
-    # Check if the user has already requested for this payment
-    if Payment.objects.filter(requested_by=request.user, reason=requested_data["reason"]).exists():
-        return Response(
-            {"error": "You have already requested payment for this training."},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-
     # Create and validate the serializer
     serializer = PaymentSerializer(data=requested_data)
 
     if serializer.is_valid():
         try:
-            # Save the application
-            payment_requested = serializer.save()
+            # Save the request; a repeated request for the same training is
+            # rejected by the unique constraint
+            with transaction.atomic():
+                payment_requested = serializer.save()
             return Response(
                 {
                     "message": "Payment request submitted successfully",
@@ -623,7 +877,7 @@ def request_payment(request, pk):
             )
         except IntegrityError:
             return Response(
-                {"error": "A payment request for this training already exists."},
+                {"error": "You have already requested payment for this training."},
                 status=status.HTTP_400_BAD_REQUEST
             )
     else:
@@ -631,48 +885,257 @@ def request_payment(request, pk):
             {"errors": serializer.errors},
             status=status.HTTP_400_BAD_REQUEST
         )
-    
+
+
+
+@api_view(["POST"])
+@permission_classes([IsTrainerOrStaff])
+def request_payment_batch(request):
+    """
+    Request payments for many training applications at once.
+
+    Accepts either ``applications`` (a list of application ids) or
+    ``trainer`` with optional ``date_from``/``date_to`` to select all of that
+    trainer's completed applications. Only completed applications are paid;
+    listed ids that are not are reported as errors. Trainers can only
+    request their own payments. Returns one result per application.
+    """
+    serializer = PaymentBatchRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+
+    requested_by = None
+    if request.user.role not in ['staff', 'admin']:
+        requested_by = request.user
+
+    if 'applications' in data:
+        applications = completed_applications().filter(id__in=data['applications'])
+    else:
+        applications = completed_applications(
+            trainer=data['trainer'],
+            date_from=data.get('date_from'),
+            date_to=data.get('date_to'),
+        )
+
+    try:
+        results = request_payments(applications, requested_by=requested_by)
+    except IntegrityError:
+        return Response(
+            {"error": "Some of these payments were requested concurrently, please retry"},
+            status=status.HTTP_409_CONFLICT
+        )
+    found = {result['application'] for result in results}
+    missing = [app_id for app_id in dict.fromkeys(data.get('applications', []))
+               if app_id not in found]
+    if missing:
+        uncompleted = TrainingApplication.objects.filter(id__in=missing)
+        if requested_by is not None:
+            uncompleted = uncompleted.filter(trainer=requested_by)
+        uncompleted = set(uncompleted.values_list('id', flat=True))
+        for app_id in missing:
+            results.append({'application': app_id, 'status': 'error',
+                            'error': 'Application is not completed' if app_id in uncompleted
+                            else 'Application not found'})
+
+    created = sum(1 for result in results if result['status'] == 'created')
+    return Response(
+        {
+            "message": f"{created} payment requests submitted",
+            "results": results,
+        },
+        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsTrainerOrStaff])
+def trainer_dashboard(request):
+    """
+    Precomputed dashboard figures of the current trainer, staff and admins
+    may pass ``?trainer=<id>``. Rows missing from the summary table are
+    built on first access; only trainers have a dashboard.
+    """
+    trainer_id = request.user.pk
+    if 'trainer' in request.query_params:
+        if request.user.role not in ['staff', 'admin']:
+            return Response(
+                {"error": "Only staff can view other trainers' dashboards"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            trainer_id = int(request.query_params['trainer'])
+        except ValueError:
+            return Response({"error": "trainer must be an id"}, status=status.HTTP_400_BAD_REQUEST)
+
+    dashboard = TrainerDashboard.objects.filter(pk=trainer_id, trainer__role='trainer').first()
+    if dashboard is None:
+        dashboard = refresh_dashboards([trainer_id]).get(trainer_id)
+        if dashboard is None:
+            return Response({"error": "Trainer not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(TrainerDashboardSerializer(dashboard).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsStaffOrAdmin])
+def report_list(request):
+    """
+    Names of the available management reports
+    """
+    return Response({"reports": sorted(REPORTS)})
+
+
+@api_view(['GET'])
+@permission_classes([IsStaffOrAdmin])
+def report_detail(request, name):
+    """
+    Aggregated management report, grouped in the database and cached per
+    filter combination until the underlying tables change
+    """
+    if name not in REPORTS:
+        return Response({"error": "Unknown report"}, status=status.HTTP_404_NOT_FOUND)
+    serializer = ReportFilterSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        "report": name,
+        "filters": serializer.data,
+        "results": report_cache.get_or_run(name, serializer.validated_data),
+    })
+
+
+
+# Payroll Views
+class PayrollRunListCreateView(SparseQuerysetMixin, generics.ListCreateAPIView):
+    """
+    List payroll runs, or queue a job freezing a new one for
+    ``period_start``..``period_end``; send an ``Idempotency-Key`` header to
+    make retried submissions return the same job, reusing a key for another
+    period is a 422
+    """
+    queryset = PayrollRun.objects.with_related()
+    serializer_class = PayrollRunSerializer
+    permission_classes = [IsStaffOrAdmin]
+    ordering = ('-created_date', '-id')
+    filterset_fields = ('period_start', 'period_end', 'created_by')
+    ordering_fields = ['created_date', 'period_start', 'total_amount']
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            job = enqueue(
+                'training.payroll_run',
+                {
+                    'period_start': serializer.validated_data['period_start'].isoformat(),
+                    'period_end': serializer.validated_data['period_end'].isoformat(),
+                    'created_by': request.user.pk,
+                },
+                user=request.user,
+                idempotency_key=request.headers.get('Idempotency-Key'),
+            )
+        except IdempotencyKeyReused as e:
+            return Response({"error": str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        return accepted(request, job)
+
+
+class PayrollRunDetailView(SparseQuerysetMixin, generics.RetrieveDestroyAPIView):
+    """
+    Retrieve or delete a payroll run
+    """
+    queryset = PayrollRun.objects.with_related()
+    serializer_class = PayrollRunSerializer
+    permission_classes = [IsStaffOrAdmin]
+
+
+class PayrollLineListView(SparseQuerysetMixin, generics.ListAPIView):
+    """
+    Lines of a payroll run
+    """
+    serializer_class = PayrollLineSerializer
+    permission_classes = [IsStaffOrAdmin]
+    ordering = ('id',)
+    filterset_fields = ('trainer', 'training', 'level')
+    ordering_fields = ['amount', 'days']
+
+    def get_queryset(self):
+        get_object_or_404(PayrollRun.objects.only('id'), pk=self.kwargs['pk'])
+        return PayrollLine.objects.with_related().filter(run_id=self.kwargs['pk'])
+
+
+@api_view(['GET'])
+@permission_classes([IsStaffOrAdmin])
+def payroll_diff(request, pk, other_pk):
+    """
+    Lines added, removed or changed between two payroll runs
+    """
+    base = get_object_or_404(PayrollRun, pk=pk)
+    other = get_object_or_404(PayrollRun, pk=other_pk)
+    return Response(diff_payroll_runs(base, other))
 
 # Innovation Views
-class InnovationListCreateView(generics.ListCreateAPIView):
+class InnovationListCreateView(SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     List and create innovations
     """
-    queryset = Innovation.objects.all()
+    queryset = Innovation.objects.with_related()
     serializer_class = InnovationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-created_date', '-id')
+    filterset_class = InnovationFilter
+    search_fields = ['^title']
+    ordering_fields = ['created_date', 'title']
     
     def get_queryset(self):
-        return Innovation.objects.all().order_by('-created_date')
+        return Innovation.objects.with_related().order_by(*self.ordering)
 
 
-class InnovationDetailView(generics.RetrieveUpdateDestroyAPIView):
+class InnovationDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete an innovation
     """
-    queryset = Innovation.objects.all()
+    queryset = Innovation.objects.with_related()
     serializer_class = InnovationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
 # Warranty Money Views
-class WarrantyMoneyListCreateView(generics.ListCreateAPIView):
+class WarrantyMoneyListCreateView(SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     List and create warranty money records
     """
-    queryset = WarrantyMoney.objects.all()
+    queryset = WarrantyMoney.objects.with_related()
     serializer_class = WarrantyMoneySerializer
     permission_classes = [IsStaffOrAdmin]
+    ordering = ('-created_date', '-id')
+    filterset_class = WarrantyMoneyFilter
+    search_fields = ['=guarantee', '^allowed_for__username']
+    ordering_fields = ['created_date', 'amount']
     
     def get_queryset(self):
-        return WarrantyMoney.objects.all().order_by('-created_date')
+        return WarrantyMoney.objects.with_related().order_by(*self.ordering)
 
 
-class WarrantyMoneyDetailView(generics.RetrieveUpdateDestroyAPIView):
+class WarrantyMoneyDetailView(SparseQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete a warranty money record
     """
-    queryset = WarrantyMoney.objects.all()
+    queryset = WarrantyMoney.objects.with_related()
     serializer_class = WarrantyMoneySerializer
     permission_classes = [IsStaffOrAdmin]
 
+
+class WarrantyMoneyTransitionView(BulkTransitionView):
+    """
+    Activate, expire or claim many warranty money records at once
+    """
+    queryset = WarrantyMoney.objects.all()
+    permission_classes = [IsStaffOrAdmin]
+    transitions = {
+        'active': ('pending',),
+        'expired': ('pending', 'active'),
+        'claimed': ('active',),
+    }
+
+    def transitioned(self, ids, state):
+        report_cache.invalidate_on_commit()